@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+bench_card_fields.py -- card field extraction: parity + timing
+
+Compares extract_card_fields (four precompiled searches) with two single-pass
+candidates on a card-text corpus:
+
+    combined   one alternation regex with named groups, consumed via finditer
+    anchored   one scan for "₹"/digit runs, then anchored .match() per field
+
+Corpus: card texts from the recorded HTTP cache (HTTP_CACHE_DIR, see
+scrapers/http_cache.py) when there is one, else a synthetic fixture.
+
+Run from project root:  python scripts/bench_card_fields.py [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from neuraestate.scrapers import mb_scraper as mb  # noqa: E402
+from neuraestate.scrapers.http_cache import ResponseCache  # noqa: E402
+
+FIELDS = ("price_inr", "bhk", "bathrooms", "area_sqft")
+
+# BHK / Bath / area can never match at the same position, so they share one
+# optional suffix; "₹" is matched alone and PRICE_RE re-applied there, so a
+# price never swallows digits another field would start on.
+COMBINED_RE = re.compile(
+    r"₹|(\d+)(?:\s*(?P<bhk>BHK)|\s*(?P<bath>Bath)"
+    r"|(?P<frac>\.\d+)?\s*(?P<unit>sq\.?\s*ft|sqft|sq ft|sqm|sq\.?\s*m|sq\.?\s*yd|sqyd|acre)s?)?",
+    re.I,
+)
+ANCHOR_RE = re.compile(r"₹|\d+")
+
+
+def combined(text):
+    price = bhk = bath = area = None
+    for m in COMBINED_RE.finditer(text):
+        kind = m.lastgroup
+        if kind is None:
+            if price is None and m.group(1) is None:
+                price = mb.PRICE_RE.match(text, m.start())
+        elif kind == "bhk":
+            bhk = bhk or m
+        elif kind == "bath":
+            bath = bath or m
+        elif area is None:
+            area = mb.AREA_RE.match(text, m.start())
+    return _fields(price, bhk, bath, area)
+
+
+def anchored(text):
+    price = bhk = bath = area = None
+    for m in ANCHOR_RE.finditer(text):
+        pos = m.start()
+        if text[pos] == "₹":
+            price = price or mb.PRICE_RE.match(text, pos)
+            continue
+        bhk = bhk or mb.BHK_RE.match(text, pos)
+        bath = bath or mb.BATH_RE.match(text, pos)
+        area = area or mb.AREA_RE.match(text, pos)
+        if price and bhk and bath and area:
+            break
+    return _fields(price, bhk, bath, area)
+
+
+def _fields(price, bhk, bath, area):
+    return {
+        "price_inr": mb._price_from_match(price),
+        "bhk": int(bhk.group(1)) if bhk else None,
+        "bathrooms": int(bath.group(1)) if bath else None,
+        "area_sqft": mb._area_from_match(area),
+    }
+
+
+def reference(text):
+    """The per-field helpers as extract_listing_cards used them before."""
+    m = mb.BHK_RE.search(text)
+    b = mb.BATH_RE.search(text)
+    return {
+        "price_inr": mb.parse_price_to_inr(text),
+        "bhk": int(m.group(1)) if m else None,
+        "bathrooms": int(b.group(1)) if b else None,
+        "area_sqft": mb.parse_area_to_sqft(text),
+    }
+
+
+def synthetic_corpus(n=5000, seed=7):
+    rnd = random.Random(seed)
+    units = ["sqft", "sq ft", "sq.ft.", "Sq. M", "sqyd", "acres", "sqm"]
+    prices = ["1.2 Cr", "85 Lac", "45,000", "3.75 Crore", "12 K", "92.5 lakh", ""]
+    out = []
+    for _ in range(n):
+        out.append(
+            f"{rnd.randint(1, 5)} BHK Flat for Sale in Sector {rnd.randint(1, 150)}, Noida "
+            f"₹{rnd.choice(prices)} ₹{rnd.randint(4000, 15000):,} per sqft "
+            f"Carpet Area {rnd.randint(300, 3000)}{rnd.choice(['', '.5'])} {rnd.choice(units)} "
+            f"Status Ready to Move Floor {rnd.randint(1, 20)} out of {rnd.randint(20, 40)} "
+            f"{rnd.choice(['', str(rnd.randint(1, 4)) + ' Baths '])}Transaction Resale "
+            f"Posted: Dec {rnd.randint(1, 28)}, 2024"
+        )
+    return out
+
+
+def cached_corpus():
+    out = []
+    cache = ResponseCache(mode="replay")
+    for url, resp in cache.iter_responses():
+        if resp.status_code == 200 and "html" in resp.headers.get("Content-Type", ""):
+            out.extend(c["card_text"] for c in mb.extract_listing_cards(resp.text, url))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    texts = cached_corpus() or synthetic_corpus()
+    print(f"corpus: {len(texts)} card texts")
+
+    expected = [reference(t) for t in texts]
+    candidates = {"extract_card_fields": mb.extract_card_fields, "combined": combined, "anchored": anchored}
+    for name, fn in candidates.items():
+        bad = sum(fn(t) != e for t, e in zip(texts, expected))
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for t in texts:
+                fn(t)
+        per_card = (time.perf_counter() - t0) / (args.repeat * len(texts)) * 1e6
+        print(f"{name:<20} {per_card:8.2f} us/card  mismatches={bad}")
+
+
+if __name__ == "__main__":
+    main()
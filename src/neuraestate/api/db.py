@@ -2,16 +2,17 @@
 from typing import Generator
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
 
+from ..db.engine import get_engine
+
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL not set in .env")
 
 # SQLAlchemy engine & session (sync)
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = get_engine("api", DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
 def get_db() -> Generator[Session, None, None]:
@@ -0,0 +1,149 @@
+# src/neuraestate/api/export.py
+"""
+Encoders for GET /listings/export.
+
+The endpoint streams rows from a server-side cursor in partitions of
+EXPORT_CHUNK_ROWS; encode_stream() turns each partition into one body
+chunk, so memory stays bounded by the chunk size whatever the export size.
+
+    ndjson   one JSON object per line
+    csv      header row, then one line per row
+    parquet  one row group per partition; the footer is sent last
+
+An export holds a database connection for as long as the client takes to
+download it, so exports use their own small pool (EXPORT_MAX_CONCURRENT
+connections) and ExportSlots turns callers beyond that into a quick 503
+instead of a queue; /listings and the admin endpoints never wait on them.
+"""
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import os
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .responses import dumps
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+EXPORT_QUEUE_TIMEOUT_S = float(os.getenv("EXPORT_QUEUE_TIMEOUT_S", "2"))
+# per statement (DECLARE / each FETCH of the cursor)
+EXPORT_STATEMENT_TIMEOUT_MS = int(os.getenv("EXPORT_STATEMENT_TIMEOUT_MS", "60000"))
+# a client that stops reading for this long gets its connection closed by the server
+EXPORT_IDLE_TIMEOUT_MS = int(os.getenv("EXPORT_IDLE_TIMEOUT_MS", "60000"))
+
+# format -> (media type, file extension)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# arrow types for the listing columns (see listing_queries.LISTING_COLUMNS)
+_ARROW_TYPES = {
+    "id": "int64",
+    "price": "float64",
+    "area_sqft": "float64",
+    "bhk": "int32",
+    "bathrooms": "float64",
+}
+
+
+class ExportSlots:
+    """At most `limit` exports at once; acquire() waits up to `wait_s` for a free slot."""
+
+    def __init__(self, limit: int = EXPORT_MAX_CONCURRENT, wait_s: float = EXPORT_QUEUE_TIMEOUT_S):
+        self._sem = asyncio.Semaphore(max(1, limit))
+        self.wait_s = wait_s
+
+    async def acquire(self) -> Optional[Callable[[], None]]:
+        """A release function (safe to call more than once), or None if no slot freed up in time."""
+        try:
+            await asyncio.wait_for(self._sem.acquire(), self.wait_s)
+        except asyncio.TimeoutError:
+            return None
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self._sem.release()
+
+        return release
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _ndjson(columns: Sequence[str], rows: List[Sequence[Any]]) -> bytes:
+    return b"".join(dumps(dict(zip(columns, r))) + b"\n" for r in rows)
+
+
+def _csv(rows: List[Sequence[Any]], header: Sequence[str] = ()) -> bytes:
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    if header:
+        w.writerow(header)
+    w.writerows(rows)
+    return buf.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file for ParquetWriter; take() hands over what was written so far."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._parts.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def take(self) -> bytes:
+        out, self._parts = b"".join(self._parts), []
+        return out
+
+
+async def _parquet(columns: Sequence[str], partitions: AsyncIterator[List[Sequence[Any]]]) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(c, pa.type_for_alias(_ARROW_TYPES.get(c, "string"))) for c in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        async for rows in partitions:
+            cols = list(zip(*rows))
+            writer.write_table(pa.table([pa.array(col, f.type) for col, f in zip(cols, schema)], schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+async def encode_stream(fmt: str, columns: Sequence[str],
+                        partitions: AsyncIterator[List[Sequence[Any]]]) -> AsyncIterator[bytes]:
+    """Body chunks for `fmt`, one per partition of rows (tuples in `columns` order)."""
+    if fmt == "parquet":
+        async for chunk in _parquet(columns, partitions):
+            if chunk:
+                yield chunk
+        return
+    if fmt == "csv":
+        yield _csv([], header=columns)
+    async for rows in partitions:
+        yield _ndjson(columns, rows) if fmt == "ndjson" else _csv(rows)
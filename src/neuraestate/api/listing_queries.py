@@ -0,0 +1,190 @@
+# src/neuraestate/api/listing_queries.py
+"""
+SQL for GET /listings, built once per (schema, filter shape).
+
+The schema is inspected once (detect_schema_caps) instead of trying a query
+and retrying a simpler one when it fails: ods_listings as created by the
+ETL has no `url` column, and user_listings may not exist on a read-only
+database. A filter shape is which of LISTING_FILTERS are set, so there are
+only 2**5 statements per schema; listing_statements() caches them and
+warm_listing_statements() builds all of them at startup.
+
+Every request of a shape sends byte-identical SQL, so with the psycopg 3
+driver (DB_PREPARE_THRESHOLD, see db/engine.py) each pooled connection
+prepares it server-side and later requests skip parsing and planning.
+
+    caps = conn.run_sync(detect_schema_caps)
+    params = filter_params(city="pune", min_bhk=2)
+    count_stmt, page_stmt = listing_statements(caps, filter_shape(params))
+"""
+from __future__ import annotations
+
+import functools
+import itertools
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.elements import TextClause
+
+LISTING_FILTERS = ("city", "min_bhk", "max_price", "min_area", "max_area")
+LISTING_COLUMNS = ("id", "external_id", "title", "price", "area_sqft", "bhk", "bathrooms",
+                   "city", "location", "image_url", "url")
+
+Shape = Tuple[bool, ...]
+
+SCHEMA_CAPS_SQL = """
+    SELECT table_name, column_name
+    FROM information_schema.columns
+    WHERE table_schema = current_schema()
+      AND table_name IN ('ods_listings', 'user_listings')
+"""
+
+
+@dataclass(frozen=True)
+class SchemaCaps:
+    ods_columns: FrozenSet[str]
+    user_listings: bool
+
+    @property
+    def ods_url(self) -> bool:
+        return "url" in self.ods_columns
+
+
+def detect_schema_caps(conn: Connection) -> SchemaCaps:
+    """What the listing queries may reference (use conn.run_sync() on async connections)."""
+    ods, user = set(), False
+    for table_name, column_name in conn.execute(text(SCHEMA_CAPS_SQL)):
+        if table_name == "ods_listings":
+            ods.add(column_name)
+        else:
+            user = True
+    return SchemaCaps(ods_columns=frozenset(ods), user_listings=user)
+
+
+# -----------------------
+# Filters
+# -----------------------
+# {price} is price_inr for ods_listings and price for user_listings
+_FILTER_SQL = {
+    "city": "(lower(coalesce(city,'')) LIKE :city OR lower(coalesce(title,'')) LIKE :city)",
+    "min_bhk": "coalesce(bhk,0) >= :min_bhk",
+    "max_price": "coalesce({price},0) <= :max_price",
+    "min_area": "coalesce(area_sqft,0) >= :min_area",
+    "max_area": "coalesce(area_sqft,0) <= :max_area",
+}
+
+
+def filter_params(city: str = "", min_bhk: int = 0, max_price: float = 0.0,
+                  min_area: float = 0.0, max_area: float = 0.0) -> Dict[str, Any]:
+    """Bind params for the filters that are set (empty / 0 means "not set")."""
+    params: Dict[str, Any] = {}
+    if city:
+        params["city"] = f"%{city.lower()}%"
+    if min_bhk and min_bhk > 0:
+        params["min_bhk"] = int(min_bhk)
+    if max_price and max_price > 0:
+        params["max_price"] = float(max_price)
+    if min_area and min_area > 0:
+        params["min_area"] = float(min_area)
+    if max_area and max_area > 0:
+        params["max_area"] = float(max_area)
+    return params
+
+
+def filter_shape(params: Dict[str, Any]) -> Shape:
+    return tuple(name in params for name in LISTING_FILTERS)
+
+
+def _where(shape: Shape, price_col: str) -> str:
+    clauses = ["1=1"] + [
+        _FILTER_SQL[name].format(price=price_col) for name, on in zip(LISTING_FILTERS, shape) if on
+    ]
+    return " AND ".join(clauses)
+
+
+# -----------------------
+# Statements
+# -----------------------
+def _ods_select(where: str, caps: SchemaCaps) -> str:
+    placeholder = "('https://example.com/listing/' || source_id::text)"
+    url = f"COALESCE(NULLIF(url::text,''), {placeholder})" if caps.ods_url else placeholder
+    return f"""
+        SELECT
+          id,
+          source_id::text AS external_id,
+          title,
+          NULLIF(price_inr::text, '')::double precision AS price,
+          area_sqft::double precision AS area_sqft,
+          bhk::integer AS bhk,
+          bathrooms::double precision AS bathrooms,
+          city::text AS city,
+          coalesce(city::text, '') AS location,
+          image_url::text AS image_url,
+          {url}::text AS url,
+          processed_at AS ts
+        FROM ods_listings
+        WHERE {where}"""
+
+
+def _user_select(where: str) -> str:
+    return f"""
+        SELECT
+          (1000000000 + id) AS id,   -- avoid id collision
+          NULL::text AS external_id,
+          title,
+          price::double precision AS price,
+          area_sqft::double precision AS area_sqft,
+          bhk::integer AS bhk,
+          bathrooms::double precision AS bathrooms,
+          city::text AS city,
+          coalesce(city::text, '') AS location,
+          NULL::text AS image_url,
+          ('/seller/' || id)::text AS url,
+          created_at AS ts
+        FROM user_listings
+        WHERE {where}"""
+
+
+def _union(caps: SchemaCaps, shape: Shape) -> str:
+    union = _ods_select(_where(shape, "price_inr"), caps)
+    if caps.user_listings:
+        union += "\n        UNION ALL" + _user_select(_where(shape, "price"))
+    return union
+
+
+@functools.lru_cache(maxsize=None)
+def listing_statements(caps: SchemaCaps, shape: Shape) -> Tuple[TextClause, TextClause]:
+    """(count, page) statements for `shape`; page takes :limit and :offset as well."""
+    count_sql = f"SELECT (SELECT COUNT(*) FROM ods_listings WHERE {_where(shape, 'price_inr')})"
+    if caps.user_listings:
+        count_sql += f" + (SELECT COUNT(*) FROM user_listings WHERE {_where(shape, 'price')})"
+    count_sql += " AS total"
+
+    page_sql = f"""
+      SELECT {", ".join(LISTING_COLUMNS)}
+      FROM ({_union(caps, shape)}
+      ) q
+      ORDER BY ts DESC NULLS LAST, id DESC
+      LIMIT :limit OFFSET :offset
+    """
+    return text(count_sql), text(page_sql)
+
+
+@functools.lru_cache(maxsize=None)
+def export_statement(caps: SchemaCaps, shape: Shape) -> TextClause:
+    """Every row matching `shape`, unordered (no sort to spill for a full export)."""
+    return text(f"""
+      SELECT {", ".join(LISTING_COLUMNS)}
+      FROM ({_union(caps, shape)}
+      ) q
+    """)
+
+
+def warm_listing_statements(caps: SchemaCaps) -> int:
+    """Build the statements for every filter shape; returns how many shapes."""
+    shapes = list(itertools.product((False, True), repeat=len(LISTING_FILTERS)))
+    for shape in shapes:
+        listing_statements(caps, shape)
+    return len(shapes)
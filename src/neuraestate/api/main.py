@@ -169,14 +169,45 @@
 
 
 # src/neuraestate/api/main.py
+import asyncio
+import logging
 import os
-from typing import Any, Dict, List, Optional
+import signal
+from contextlib import asynccontextmanager
+from typing import Any, Coroutine, Dict, List, Optional, Union
 
-from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.engine import Result
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.elements import TextClause
+
+from ..db.engine import get_async_engine, get_engine
+from . import metrics, model_reload, slow_queries
+from .export import (
+    EXPORT_CHUNK_ROWS,
+    EXPORT_FORMATS,
+    EXPORT_IDLE_TIMEOUT_MS,
+    EXPORT_MAX_CONCURRENT,
+    EXPORT_STATEMENT_TIMEOUT_MS,
+    ExportSlots,
+    encode_stream,
+    parquet_available,
+)
+from .responses import FastJSONResponse, rows_as_dicts
+from .listing_queries import (
+    LISTING_COLUMNS,
+    SchemaCaps,
+    detect_schema_caps,
+    export_statement,
+    filter_params,
+    filter_shape,
+    listing_statements,
+    warm_listing_statements,
+)
 
 # ---------------------------
 # Config / DB
@@ -185,11 +216,50 @@ DATABASE_URL = os.getenv(
     "DATABASE_URL", "postgresql://postgres:postgres@db:5432/neuraestate"
 )
 
-# create SQLAlchemy engine & session factory
-engine = create_engine(DATABASE_URL, future=True)
+# create SQLAlchemy engine & session factory (pool settings: see db/engine.py)
+engine = get_engine("api", DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+# read endpoints are async and use their own pool (psycopg 3 async driver).
+# A request runs at most API_QUERY_FANOUT queries at once (see _gather), so the
+# pool serves API_READ_CONCURRENCY requests at full fan-out before any waits.
+API_QUERY_FANOUT = int(os.getenv("API_QUERY_FANOUT", "2"))
+API_READ_CONCURRENCY = int(os.getenv("API_READ_CONCURRENCY", "10"))
+async_engine = get_async_engine("api", DATABASE_URL, pool_size=API_READ_CONCURRENCY * API_QUERY_FANOUT)
+# /listings/export holds a connection per download: separate, small pool (see export.py)
+export_engine = get_async_engine("api-export", DATABASE_URL, pool_size=EXPORT_MAX_CONCURRENT, max_overflow=0)
+export_slots = ExportSlots()
+
+logger = logging.getLogger("neuraestate")
+
+# model served by /predict; loaded and swapped by a background thread (see model_reload.py)
+price_models = model_reload.ModelReloader()
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    try:
+        await _schema_caps()
+    except Exception as e:  # DB not reachable yet: detected on first request instead
+        logger.warning("Schema detection at startup failed: %s", e)
+    price_models.start()
+    try:
+        # `kill -HUP <pid>` after publishing a model: reload without waiting for the next poll
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, price_models.trigger)
+    except (AttributeError, NotImplementedError, RuntimeError):  # no SIGHUP on Windows / not main thread
+        pass
+    yield
+    price_models.stop()
+
+
+app = FastAPI(title="NeuraEstate API (fixed pagination & filters)", lifespan=_lifespan)
 
-app = FastAPI(title="NeuraEstate API (fixed pagination & filters)")
+# per-route request timings and per-statement SQL timings, served at /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+metrics.instrument_engine(export_engine.sync_engine)
+# opt-in (SLOW_QUERY_MS > 0): slow statements + EXPLAIN plans at /admin/slow-queries
+slow_query_log = slow_queries.install([engine, async_engine.sync_engine], explain_engine=engine)
 
 # ---------------------------
 # Local response models (keeps compatibility with frontend)
@@ -251,6 +321,44 @@ def get_db() -> Session:
         db.close()
 
 
+# ---------------------------
+# Async read helpers
+# ---------------------------
+async def _fetch(sql: Union[str, TextClause], params: Optional[Dict[str, Any]] = None, timeout_ms: Optional[int] = None) -> Result:
+    """
+    Run one read query on its own pooled connection and return the buffered
+    result, so independent queries of a request can be awaited together
+    with _gather().
+    """
+    async with async_engine.connect() as conn:
+        if timeout_ms:
+            await conn.execute(text(f"SET LOCAL statement_timeout TO {int(timeout_ms)}"))
+        return await conn.execute(text(sql) if isinstance(sql, str) else sql, params or {})
+
+
+async def _fetch_serial(*queries: Union[str, TextClause]) -> List[Result]:
+    """Run cheap queries one after another on a single pooled connection."""
+    async with async_engine.connect() as conn:
+        return [await conn.execute(text(q) if isinstance(q, str) else q) for q in queries]
+
+
+async def _gather(*fetches: Coroutine[Any, Any, Result], return_exceptions: bool = False) -> List[Any]:
+    """
+    asyncio.gather() for _fetch() calls, holding at most API_QUERY_FANOUT
+    pooled connections for this request at a time.
+    """
+    slots = asyncio.Semaphore(API_QUERY_FANOUT)
+
+    async def one(fetch):
+        try:
+            async with slots:
+                return await fetch
+        finally:
+            fetch.close()  # no-op once awaited; avoids "never awaited" if cancelled while queued
+
+    return await asyncio.gather(*(one(f) for f in fetches), return_exceptions=return_exceptions)
+
+
 # ---------------------------
 # Health
 # ---------------------------
@@ -259,25 +367,60 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+USER_LISTINGS_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS user_listings (
+        id SERIAL PRIMARY KEY,
+        title TEXT NOT NULL,
+        price DOUBLE PRECISION NULL,
+        area_sqft DOUBLE PRECISION NULL,
+        bhk INTEGER NULL,
+        bathrooms DOUBLE PRECISION NULL,
+        city TEXT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+    """,
+    # range predicates in /admin/stats and the recency sort in /listings
+    "CREATE INDEX IF NOT EXISTS ix_user_listings_created_at ON user_listings (created_at);",
+]
+
+
 # Ensure user_listings table exists (lightweight bootstrap)
 def _ensure_user_listings(db: Session) -> None:
-    db.execute(text(
-        """
-        CREATE TABLE IF NOT EXISTS user_listings (
-            id SERIAL PRIMARY KEY,
-            title TEXT NOT NULL,
-            price DOUBLE PRECISION NULL,
-            area_sqft DOUBLE PRECISION NULL,
-            bhk INTEGER NULL,
-            bathrooms DOUBLE PRECISION NULL,
-            city TEXT NULL,
-            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-        );
-        """
-    ))
+    for ddl in USER_LISTINGS_DDL:
+        db.execute(text(ddl))
     db.commit()
 
 
+_caps: Optional[SchemaCaps] = None
+
+
+async def _schema_caps() -> SchemaCaps:
+    """
+    Bootstrap user_listings and detect what the listing queries can use.
+    Runs once (at startup, or on the first request if the DB was down then).
+    """
+    global _caps
+    if _caps is None:
+        try:
+            async with async_engine.begin() as conn:
+                for ddl in USER_LISTINGS_DDL:
+                    await conn.execute(text(ddl))
+        except Exception as e:  # e.g. read-only role; queries adapt to what exists
+            logger.warning("Could not create user_listings: %s", e)
+        async with async_engine.connect() as conn:
+            _caps = await conn.run_sync(detect_schema_caps)
+        shapes = warm_listing_statements(_caps)
+        # only the text() objects: each pooled connection prepares a shape server-side on first use
+        logger.info("Listing schema: %s (%d filter shapes built)", _caps, shapes)
+    return _caps
+
+
 @app.post("/seller/listings", response_model=SellerListingOut)
 def create_seller_listing(payload: SellerListingIn, db: Session = Depends(get_db)):
     try:
@@ -298,18 +441,28 @@ def create_seller_listing(payload: SellerListingIn, db: Session = Depends(get_db
 
 
 @app.get("/seller/listings", response_model=List[SellerListingOut])
-def list_seller_listings(limit: int = Query(20, ge=1, le=200), db: Session = Depends(get_db)):
+async def list_seller_listings(limit: int = Query(20, ge=1, le=200)):
     try:
-        _ensure_user_listings(db)
-        rows = db.execute(text("SELECT id, title, price, area_sqft, bhk, bathrooms, city, created_at FROM user_listings ORDER BY created_at DESC, id DESC LIMIT :limit"), {"limit": int(limit)}).mappings().all()
-        return [dict(r) for r in rows]
+        await _schema_caps()
+        res = await _fetch("SELECT id, title, price, area_sqft, bhk, bathrooms, city, created_at FROM user_listings ORDER BY created_at DESC, id DESC LIMIT :limit", {"limit": int(limit)})
+        return FastJSONResponse(rows_as_dicts(res))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list seller listings: {e}")
 
 
+class CityStats(BaseModel):
+    city: Optional[str]
+    total: int
+    new_today: int
+
+
 class AdminStats(BaseModel):
     total_properties: int
     new_listings_today: int
+    # only with ?breakdown=true
+    new_listings_7d: Optional[int] = None
+    new_listings_30d: Optional[int] = None
+    by_city: Optional[List[CityStats]] = None
 
 class AdminAnalytics(BaseModel):
     prices: List[float]
@@ -318,69 +471,137 @@ class AdminAnalytics(BaseModel):
     bhks: List[int]
 
 
+# One pass per table. Windows are half-open ranges on the raw column
+# (no ::date cast), so the timestamp indexes apply; CURRENT_DATE compares
+# correctly against both timestamp and timestamptz columns.
+def _window_counts(ts: str) -> str:
+    return f"""
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE {ts} >= CURRENT_DATE AND {ts} < CURRENT_DATE + 1) AS today,
+        COUNT(*) FILTER (WHERE {ts} >= CURRENT_DATE - 6 AND {ts} < CURRENT_DATE + 1) AS d7,
+        COUNT(*) FILTER (WHERE {ts} >= CURRENT_DATE - 29 AND {ts} < CURRENT_DATE + 1) AS d30"""
+
+
+ADMIN_STATS_SQL = f"""
+    WITH o AS (SELECT {_window_counts("processed_at")} FROM ods_listings),
+         u AS (SELECT {_window_counts("created_at")} FROM user_listings)
+    SELECT o.total + u.total AS total, o.today + u.today AS today,
+           o.d7 + u.d7 AS d7, o.d30 + u.d30 AS d30
+    FROM o CROSS JOIN u
+"""
+
+ADMIN_STATS_BY_CITY_SQL = """
+    SELECT city, SUM(total)::bigint AS total, SUM(today)::bigint AS new_today
+    FROM (
+        SELECT city, COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE processed_at >= CURRENT_DATE AND processed_at < CURRENT_DATE + 1) AS today
+        FROM ods_listings GROUP BY city
+        UNION ALL
+        SELECT city, COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE created_at >= CURRENT_DATE AND created_at < CURRENT_DATE + 1) AS today
+        FROM user_listings GROUP BY city
+    ) t
+    GROUP BY city
+    ORDER BY total DESC, city
+    LIMIT :limit
+"""
+
+
 @app.get("/admin/stats", response_model=AdminStats)
-def admin_stats(db: Session = Depends(get_db)):
+async def admin_stats(
+    breakdown: bool = Query(False, description="Add 7/30-day counts and a per-city breakdown"),
+    city_limit: int = Query(50, ge=1, le=500),
+):
     try:
-        _ensure_user_listings(db)
-        total_ods = int(db.execute(text("SELECT COUNT(*) FROM ods_listings")).scalar_one() or 0)
-        total_user = int(db.execute(text("SELECT COUNT(*) FROM user_listings")).scalar_one() or 0)
-        total = total_ods + total_user
-
-        new_today_ods = int(db.execute(text("SELECT COUNT(*) FROM ods_listings WHERE processed_at::date = CURRENT_DATE")).scalar_one() or 0)
-        new_today_user = int(db.execute(text("SELECT COUNT(*) FROM user_listings WHERE created_at::date = CURRENT_DATE")).scalar_one() or 0)
-        return {"total_properties": total, "new_listings_today": new_today_ods + new_today_user}
+        await _schema_caps()
+        if breakdown:
+            stats_res, city_res = await _gather(
+                _fetch(ADMIN_STATS_SQL),
+                _fetch(ADMIN_STATS_BY_CITY_SQL, {"limit": int(city_limit)}),
+            )
+        else:
+            stats_res, city_res = await _fetch(ADMIN_STATS_SQL), None
+        row = stats_res.mappings().one()
+        out: Dict[str, Any] = {"total_properties": int(row["total"] or 0), "new_listings_today": int(row["today"] or 0)}
+        if breakdown:
+            out["new_listings_7d"] = int(row["d7"] or 0)
+            out["new_listings_30d"] = int(row["d30"] or 0)
+            out["by_city"] = [dict(r) for r in city_res.mappings().all()]
+        return out
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to compute admin stats: {e}")
 
 
+@app.get("/admin/slow-queries")
+def admin_slow_queries(limit: int = Query(50, ge=1, le=500)):
+    """Statements slower than SLOW_QUERY_MS, grouped by fingerprint, with EXPLAIN plans."""
+    if slow_query_log is None:
+        raise HTTPException(status_code=404, detail="Slow-query log is disabled; set SLOW_QUERY_MS to enable it")
+    return slow_query_log.snapshot(limit)
+
+
+@app.get("/admin/model")
+def admin_model():
+    """Price model currently served by /predict and the registry's current version."""
+    return price_models.status()
+
+
+@app.post("/admin/model/reload", status_code=202)
+def admin_model_reload():
+    """Check the registry for a new model now; loading happens in the background."""
+    price_models.trigger()
+    return {"requested": True, "serving": price_models.version}
+
+
 @app.get("/admin/analytics", response_model=AdminAnalytics)
-def admin_analytics(db: Session = Depends(get_db)):
+async def admin_analytics():
     """Return sanitized arrays for charts using both tables."""
     try:
-        _ensure_user_listings(db)
-        # Prices from marketplace
-        prices_rows = db.execute(text("""
-            SELECT NULLIF(price_inr::text,'')::double precision AS price
-            FROM ods_listings
-            WHERE NULLIF(price_inr::text,'') IS NOT NULL
-            LIMIT 2000
-        """)).fetchall()
-        prices = [float(r[0]) for r in prices_rows if r[0] is not None]
-
-        # Areas and prices (paired) for scatter
-        ap_rows = db.execute(text("""
-            SELECT area_sqft::double precision AS area, NULLIF(price_inr::text,'')::double precision AS price
-            FROM ods_listings
-            WHERE area_sqft IS NOT NULL AND area_sqft > 0 AND NULLIF(price_inr::text,'') IS NOT NULL
-            LIMIT 2000
-        """)).fetchall()
+        await _schema_caps()
+        # five LIMIT 2000 reads: cheaper in sequence on one connection than
+        # holding five pooled connections for one chart request
+        prices_res, ap_res, up_res, bhk_res, ub_res = await _fetch_serial(
+            # Prices from marketplace
+            """
+                SELECT NULLIF(price_inr::text,'')::double precision AS price
+                FROM ods_listings
+                WHERE NULLIF(price_inr::text,'') IS NOT NULL
+                LIMIT 2000
+            """,
+            # Areas and prices (paired) for scatter
+            """
+                SELECT area_sqft::double precision AS area, NULLIF(price_inr::text,'')::double precision AS price
+                FROM ods_listings
+                WHERE area_sqft IS NOT NULL AND area_sqft > 0 AND NULLIF(price_inr::text,'') IS NOT NULL
+                LIMIT 2000
+            """,
+            # Include user_listings as well
+            """
+                SELECT area_sqft::double precision AS area, price::double precision AS price
+                FROM user_listings
+                WHERE area_sqft IS NOT NULL AND area_sqft > 0 AND price IS NOT NULL
+                LIMIT 2000
+            """,
+            # BHKs
+            "SELECT bhk FROM ods_listings WHERE bhk IS NOT NULL LIMIT 2000",
+            "SELECT bhk FROM user_listings WHERE bhk IS NOT NULL LIMIT 2000",
+        )
+        prices = [float(r[0]) for r in prices_res if r[0] is not None]
+
+        ap_rows = ap_res.fetchall()
         areas = [float(r[0]) for r in ap_rows if r[0] is not None and r[1] is not None]
         areas_for_prices = [float(r[1]) for r in ap_rows if r[0] is not None and r[1] is not None]
 
-        # Include user_listings as well
-        up_rows = db.execute(text("""
-            SELECT area_sqft::double precision AS area, price::double precision AS price
-            FROM user_listings
-            WHERE area_sqft IS NOT NULL AND area_sqft > 0 AND price IS NOT NULL
-            LIMIT 2000
-        """)).fetchall()
-        for a, p in up_rows:
+        for a, p in up_res:
             if a is not None and p is not None and a > 0 and p > 0:
                 areas.append(float(a))
                 areas_for_prices.append(float(p))
                 prices.append(float(p))
 
-        # BHKs
-        bhk_rows = db.execute(text("""
-            SELECT bhk FROM ods_listings WHERE bhk IS NOT NULL LIMIT 2000
-        """)).fetchall()
-        bhks = [int(r[0]) for r in bhk_rows if r[0] is not None]
-        ub_rows = db.execute(text("""
-            SELECT bhk FROM user_listings WHERE bhk IS NOT NULL LIMIT 2000
-        """)).fetchall()
-        bhks.extend([int(r[0]) for r in ub_rows if r[0] is not None])
-
-        return {"prices": prices, "areas": areas, "areas_for_prices": areas_for_prices, "bhks": bhks}
+        bhks = [int(r[0]) for r in bhk_res if r[0] is not None]
+        bhks.extend([int(r[0]) for r in ub_res if r[0] is not None])
+
+        return FastJSONResponse({"prices": prices, "areas": areas, "areas_for_prices": areas_for_prices, "bhks": bhks})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to compute analytics: {e}")
 
@@ -389,7 +610,7 @@ def admin_analytics(db: Session = Depends(get_db)):
 # /listings: filters + pagination
 # ---------------------------
 @app.get("/listings", response_model=ListingsResponse)
-def list_listings(
+async def list_listings(
     page: int = Query(1, ge=1),
     per_page: int = Query(50, ge=1, le=1000),
     city: str = Query("", description="Partial city/title search"),
@@ -397,184 +618,107 @@ def list_listings(
     max_price: float = Query(0.0, ge=0.0),
     min_area: float = Query(0.0, ge=0.0),
     max_area: float = Query(0.0, ge=0.0),
-    db: Session = Depends(get_db),
-) -> Dict[str, Any]:
+):
     """
     Return paginated listings from ods_listings with the chosen filters.
     Important: this function computes a COUNT(*) with the same WHERE clauses
     (so the frontend can compute correct number of pages).
     """
 
-    # Build WHERE clauses and parameter dict
-    where_clauses: List[str] = ["1=1"]
-    params: Dict[str, Any] = {}
-
-    if city:
-        # case-insensitive partial match against city and title
-        where_clauses.append("(lower(coalesce(city,'') ) LIKE :city OR lower(coalesce(title,'')) LIKE :city)")
-        params["city"] = f"%{city.lower()}%"
-
-    if min_bhk and min_bhk > 0:
-        where_clauses.append("coalesce(bhk,0) >= :min_bhk")
-        params["min_bhk"] = int(min_bhk)
+    try:
+        caps = await _schema_caps()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to inspect listings schema: {e}")
 
-    if max_price and max_price > 0:
-        # price stored in price_inr - defensive coalesce
-        where_clauses.append("coalesce(price_inr,0) <= :max_price")
-        params["max_price"] = float(max_price)
+    params = filter_params(city, min_bhk, max_price, min_area, max_area)
+    count_stmt, page_stmt = listing_statements(caps, filter_shape(params))
+    params_paged = {**params, "limit": int(per_page), "offset": int((page - 1) * per_page)}
 
-    if min_area and min_area > 0:
-        where_clauses.append("coalesce(area_sqft,0) >= :min_area")
-        params["min_area"] = float(min_area)
+    # Apply a short statement timeout so slow queries don't freeze the UI
+    timeout_ms = 4000  # 4s
 
-    if max_area and max_area > 0:
-        where_clauses.append("coalesce(area_sqft,0) <= :max_area")
-        params["max_area"] = float(max_area)
+    # count and page are independent: run them concurrently
+    total_res, rows_result = await _gather(
+        _fetch(count_stmt, params, timeout_ms),
+        _fetch(page_stmt, params_paged, timeout_ms),
+        return_exceptions=True,
+    )
+    if isinstance(total_res, BaseException):
+        raise HTTPException(status_code=500, detail=f"Failed to compute total listings: {total_res}")
+    if isinstance(rows_result, BaseException):
+        raise HTTPException(status_code=500, detail=f"Failed to query listings: {rows_result}")
+    total = int(total_res.scalar() or 0)
 
-    where_sql = " AND ".join(where_clauses)
+    # rows are already typed by the SQL casts: shape them once and serialize
+    # directly instead of re-validating every item through ListingsResponse
+    return FastJSONResponse({"total": total, "page": page, "per_page": per_page, "items": rows_as_dicts(rows_result)})
 
-    # Apply a short statement timeout so slow queries don't freeze the UI
-    try:
-        db.execute(text("SET LOCAL statement_timeout TO 4000"))  # 4s
-    except Exception:
-        pass
 
-    # 1) total count (include both marketplace and user-submitted listings)
-    where_sql_ods = where_sql.replace("coalesce(price_inr,0)", "coalesce(price_inr,0)")
-    where_sql_user = where_sql
-    # Adjust column names for user_listings (price_inr -> price)
-    where_sql_user = where_sql_user.replace("coalesce(price_inr,0)", "coalesce(price,0)")
-
-    count_sql = (
-        "SELECT (" 
-        f"SELECT COUNT(*) FROM ods_listings WHERE {where_sql_ods}" 
-        ") + (" 
-        f"SELECT COUNT(*) FROM user_listings WHERE {where_sql_user}" 
-        ") AS total;"
-    )
+@app.get("/listings/export")
+async def export_listings(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    city: str = Query("", description="Partial city/title search"),
+    min_bhk: int = Query(0, ge=0),
+    max_price: float = Query(0.0, ge=0.0),
+    min_area: float = Query(0.0, ge=0.0),
+    max_area: float = Query(0.0, ge=0.0),
+):
+    """
+    Every listing matching the /listings filters, in one response.
+    Rows are streamed from a server-side cursor EXPORT_CHUNK_ROWS at a time,
+    so there is no count query, no OFFSET scan and no full result in memory.
+    """
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export needs pyarrow installed on the server")
     try:
-        total_res: Result = db.execute(text(count_sql), params)
-        total = int(total_res.scalar() or 0)
+        caps = await _schema_caps()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to compute total listings: {e}")
-
-    # 2) paginated select (union marketplace + user listings)
-    limit = int(per_page)
-    offset = int((page - 1) * per_page)
-
-    select_sql = f"""
-      SELECT id, external_id, title, price, area_sqft, bhk, bathrooms, city, location, image_url, url
-      FROM (
-        SELECT
-          id,
-          source_id::text AS external_id,
-          title,
-          NULLIF(price_inr::text, '')::double precision AS price,
-          area_sqft::double precision AS area_sqft,
-          bhk::integer AS bhk,
-          bathrooms::double precision AS bathrooms,
-          city::text AS city,
-          coalesce(city::text, '') AS location,
-          image_url::text AS image_url,
-          COALESCE(NULLIF(url::text,''), ('https://example.com/listing/' || source_id::text))::text AS url,
-          processed_at AS ts
-        FROM ods_listings
-        WHERE {where_sql_ods}
-        UNION ALL
-        SELECT
-          (1000000000 + id) AS id,   -- avoid id collision
-          NULL::text AS external_id,
-          title,
-          price::double precision AS price,
-          area_sqft::double precision AS area_sqft,
-          bhk::integer AS bhk,
-          bathrooms::double precision AS bathrooms,
-          city::text AS city,
-          coalesce(city::text, '') AS location,
-          NULL::text AS image_url,
-          ('/seller/' || id)::text AS url,
-          created_at AS ts
-        FROM user_listings
-        WHERE {where_sql_user}
-      ) q
-      ORDER BY ts DESC NULLS LAST, id DESC
-      LIMIT :limit OFFSET :offset;
-    """
+        raise HTTPException(status_code=500, detail=f"Failed to inspect listings schema: {e}")
 
-    params_paged = params.copy()
-    params_paged["limit"] = limit
-    params_paged["offset"] = offset
+    params = filter_params(city, min_bhk, max_price, min_area, max_area)
+    stmt = export_statement(caps, filter_shape(params))
 
-    try:
-        rows_result: Result = db.execute(text(select_sql), params_paged)
-        rows = rows_result.mappings().all()  # RowMapping objects (dict-like)
-    except Exception as e:
-        # If referencing 'url' caused problems (older schema), fall back to a simpler select
-        fallback_sql = f"""
-          SELECT
-            id,
-            source_id::text AS external_id,
-            title,
-            NULLIF(price_inr::text, '')::double precision AS price,
-            area_sqft::double precision AS area_sqft,
-            bhk::integer AS bhk,
-            bathrooms::double precision AS bathrooms,
-            city::text AS city,
-            coalesce(city::text, '') AS location,
-            image_url::text AS image_url,
-            ('https://example.com/listing/' || source_id::text)::text AS url
-          FROM ods_listings
-          WHERE {where_sql}
-          ORDER BY processed_at DESC NULLS LAST, id DESC
-          LIMIT :limit OFFSET :offset;
-        """
-        try:
-            rows_result = db.execute(text(fallback_sql), params_paged)
-            rows = rows_result.mappings().all()
-        except Exception as e2:
-            raise HTTPException(status_code=500, detail=f"Failed to query listings (primary & fallback): {e2}")
-
-    # convert RowMappings to plain dicts and ensure required 'id' exists
-    items: List[Dict[str, Any]] = []
-    for r in rows:
-        rowdict = dict(r)
-        # ensure id present and int
-        if "id" not in rowdict or rowdict["id"] is None:
-            # If somehow id is missing, skip that row (shouldn't happen)
-            continue
-        # guarantee types for JSON
-        items.append(
-            {
-                "id": int(rowdict.get("id")),
-                "external_id": rowdict.get("external_id"),
-                "title": rowdict.get("title"),
-                "price": float(rowdict["price"]) if rowdict.get("price") is not None else None,
-                "area_sqft": float(rowdict["area_sqft"]) if rowdict.get("area_sqft") is not None else None,
-                "bhk": int(rowdict["bhk"]) if rowdict.get("bhk") is not None else None,
-                "bathrooms": float(rowdict["bathrooms"]) if rowdict.get("bathrooms") is not None else None,
-                "city": rowdict.get("city"),
-                "location": rowdict.get("location"),
-                "image_url": rowdict.get("image_url"),
-                "url": rowdict.get("url"),
-            }
-        )
+    release = await export_slots.acquire()
+    if release is None:
+        raise HTTPException(status_code=503, detail="Too many exports in progress; retry shortly",
+                            headers={"Retry-After": "10"})
 
-    return {"total": total, "page": page, "per_page": per_page, "items": items}
+    async def partitions():
+        try:
+            async with export_engine.connect() as conn:
+                await conn.execute(text(f"SET LOCAL statement_timeout TO {EXPORT_STATEMENT_TIMEOUT_MS}"))
+                await conn.execute(text(f"SET LOCAL idle_in_transaction_session_timeout TO {EXPORT_IDLE_TIMEOUT_MS}"))
+                result = await conn.stream(stmt, params)
+                async for rows in result.partitions(EXPORT_CHUNK_ROWS):
+                    yield rows
+        finally:
+            release()
+
+    media_type, ext = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        encode_stream(format, LISTING_COLUMNS, partitions()),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="listings.{ext}"'},
+        background=BackgroundTask(release),  # also frees the slot if the body never started
+    )
 
 
 # ---------------------------
 # /summary: small stats used on admin/sidebar
 # ---------------------------
 @app.get("/summary", response_model=PriceSummary)
-def summary(db: Session = Depends(get_db)):
+async def summary():
     """
     Return a small price summary computed from ods_listings.
     Uses database aggregation for min and max; median computed in Python by fetching price_inr values (safe for ~10k rows).
     """
+    # fetch numeric prices and area for computing median and avg per sqft
+    sql = "SELECT NULLIF(price_inr::text,'')::double precision AS price, area_sqft::double precision AS area_sqft FROM ods_listings WHERE NULLIF(price_inr::text,'') IS NOT NULL;"
+    sql_pps = "SELECT NULLIF(price_inr::text,'')::double precision AS price, area_sqft::double precision as area FROM ods_listings WHERE NULLIF(price_inr::text,'') IS NOT NULL AND area_sqft IS NOT NULL AND area_sqft > 0;"
+    res, res_pps = await _gather(_fetch(sql), _fetch(sql_pps), return_exceptions=True)
     try:
-        # fetch numeric prices and area for computing median and avg per sqft
-        sql = text("SELECT NULLIF(price_inr::text,'')::double precision AS price, area_sqft::double precision AS area_sqft FROM ods_listings WHERE NULLIF(price_inr::text,'') IS NOT NULL;")
-        res: Result = db.execute(sql)
+        if isinstance(res, BaseException):
+            raise res
         rows = res.fetchall()
         prices = [r[0] for r in rows if r[0] is not None]
         areas = [r[1] for r in rows if r[1] is not None and r[1] > 0]
@@ -597,9 +741,9 @@ def summary(db: Session = Depends(get_db)):
     # average price per sqft: compute only for rows where area exists
     price_per_sqft_values = []
     try:
-        sql_pps = text("SELECT NULLIF(price_inr::text,'')::double precision AS price, area_sqft::double precision as area FROM ods_listings WHERE NULLIF(price_inr::text,'') IS NOT NULL AND area_sqft IS NOT NULL AND area_sqft > 0;")
-        res2 = db.execute(sql_pps).fetchall()
-        for price, area in res2:
+        if isinstance(res_pps, BaseException):
+            raise res_pps
+        for price, area in res_pps.fetchall():
             if price is not None and area:
                 price_per_sqft_values.append(price / area)
         avg_price_per_sqft = float(sum(price_per_sqft_values) / len(price_per_sqft_values)) if price_per_sqft_values else None
@@ -666,14 +810,23 @@ from .schemas import PredictInput, PredictOutput
 @app.post("/predict", response_model=PredictOutput)
 def predict_price(inp: PredictInput):
     """
-    Simple rule-based prediction (placeholder).
+    Price from the trained model (compact export) when one is available,
+    otherwise a simple rule-based estimate.
     Returns predicted price and optional valuation when actual_price is provided.
     """
     try:
-        # Basic rule-based prediction (existing logic you used)
-        base_pps = 5000.0  # base INR per sqft (adjust later for city)
-        bhk_factor = 1.0 + max(0, (inp.bhk - 1)) * 0.25  # +25% per extra BHK
-        predicted_price = float(inp.area_sqft) * base_pps * bhk_factor
+        version, model = price_models.current()  # never blocks on a load in progress
+        if model is not None:
+            predicted_price = model.predict_one(
+                area_sqft=inp.area_sqft, bhk=inp.bhk, bathrooms=inp.bathrooms, city=inp.city
+            )
+            model_version = model.meta.get("model_version") or version
+        else:
+            # Basic rule-based prediction (existing logic you used)
+            base_pps = 5000.0  # base INR per sqft (adjust later for city)
+            bhk_factor = 1.0 + max(0, (inp.bhk - 1)) * 0.25  # +25% per extra BHK
+            predicted_price = float(inp.area_sqft) * base_pps * bhk_factor
+            model_version = "v0-local"
         predicted_pps = predicted_price / float(inp.area_sqft)
 
         # Optional valuation classification when actual_price provided
@@ -690,7 +843,7 @@ def predict_price(inp: PredictInput):
         return {
             "predicted_price_inr": round(predicted_price, 2),
             "predicted_price_per_sqft": round(predicted_pps, 2),
-            "model_version": "v0-local",
+            "model_version": model_version,
             "valuation": valuation,
         }
     except Exception as e:
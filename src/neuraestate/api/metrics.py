@@ -0,0 +1,241 @@
+# src/neuraestate/api/metrics.py
+"""
+In-process request and SQL metrics, exposed in Prometheus text format.
+
+    app.add_middleware(MetricsMiddleware)   # per-route latency/size, in-flight
+    instrument_engine(engine)               # per-statement SQL timing
+    GET /metrics                            # render()
+
+Routes are labelled by their template ("/listings", not "/listings?page=3"),
+and SQL by a normalised fingerprint (literals and bind params replaced by ?),
+so label cardinality stays bounded. No external client library is needed;
+scrape the endpoint with Prometheus as usual.
+"""
+from __future__ import annotations
+
+import bisect
+import functools
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+SQL_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# distinct SQL fingerprints tracked before new ones are folded into "other"
+MAX_SQL_FINGERPRINTS = 200
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in items) + "}"
+
+
+def _fmt_value(v: float) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+# -----------------------
+# Metric types
+# -----------------------
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, v in items:
+            yield f"{self.name}{_fmt_labels(labels)} {_fmt_value(v)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float]):
+        self.name, self.help = name, help
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][idx] += 1
+            s[1] += value
+            s[2] += 1
+
+    def series_count(self) -> int:
+        return len(self._series)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        for labels, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                yield f"{self.name}_bucket{_fmt_labels(labels, ('le', _fmt_value(float(bound))))} {cumulative}"
+            yield f"{self.name}_bucket{_fmt_labels(labels, ('le', '+Inf'))} {n}"
+            yield f"{self.name}_sum{_fmt_labels(labels)} {_fmt_value(total)}"
+            yield f"{self.name}_count{_fmt_labels(labels)} {n}"
+
+
+http_requests = Counter("http_requests_total", "HTTP requests by route template, method and status.")
+http_latency = Histogram("http_request_duration_seconds", "Time from request start to last body byte sent.", LATENCY_BUCKETS)
+http_size = Histogram("http_response_size_bytes", "Response body size.", SIZE_BUCKETS)
+http_in_flight = Gauge("http_requests_in_flight", "Requests currently being handled.")
+sql_latency = Histogram("db_query_duration_seconds", "SQL statement execution time by fingerprint.", SQL_BUCKETS)
+sql_errors = Counter("db_query_errors_total", "SQL statements that raised, by fingerprint.")
+
+REGISTRY: List = [http_requests, http_latency, http_size, http_in_flight, sql_latency, sql_errors]
+
+
+def render(metrics: Optional[Iterable] = None) -> str:
+    lines: List[str] = []
+    for m in metrics or REGISTRY:
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        lines.extend(m.samples())
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------
+# ASGI middleware
+# -----------------------
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    if route is None:
+        # older Starlette does not record the matched route in the scope
+        from starlette.routing import Match
+
+        app = scope.get("app")
+        for r in getattr(getattr(app, "router", None), "routes", []):
+            if r.matches(scope)[0] == Match.FULL:
+                route = r
+                break
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware buffering, safe for streaming)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            route = _route_template(scope)
+            method = scope.get("method", "GET")
+            http_requests.inc(method=method, route=route, status=str(status))
+            http_latency.observe(time.perf_counter() - t0, method=method, route=route)
+            http_size.observe(size, method=method, route=route)
+
+
+# -----------------------
+# SQL timing
+# -----------------------
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_SQL_PARAM = re.compile(r"%\([^)]+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")  # not ::casts
+_SQL_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SQL_SPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(statement: str, max_len: int = 200) -> str:
+    """Statement shape: literals and bind params -> ?, IN-lists collapsed, whitespace squashed."""
+    s = _SQL_STRING.sub("?", statement)
+    s = _SQL_PARAM.sub("?", s)
+    s = _SQL_NUMBER.sub("?", s)
+    s = _SQL_IN_LIST.sub("(?)", s)
+    s = _SQL_SPACE.sub(" ", s).strip().rstrip(";").strip()
+    return s[:max_len]
+
+
+def _label_for(statement: str) -> str:
+    fp = fingerprint(statement)
+    if sql_latency.series_count() >= MAX_SQL_FINGERPRINTS and (("statement", fp),) not in sql_latency._series:
+        return "other"
+    return fp
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement on `engine` (pass AsyncEngine.sync_engine for async engines)."""
+    if getattr(engine, "_neuraestate_metrics", False):
+        return
+    engine._neuraestate_metrics = True
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("metrics_t0")
+        if stack:
+            sql_latency.observe(time.perf_counter() - stack.pop(), statement=_label_for(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        stack = ctx.connection.info.get("metrics_t0") if ctx.connection is not None else None
+        if stack:
+            stack.pop()
+        if ctx.statement:
+            sql_errors.inc(statement=_label_for(ctx.statement))
@@ -0,0 +1,129 @@
+# src/neuraestate/api/model_reload.py
+"""
+Hot reload of the price model served by /predict.
+
+A background thread watches the model registry (ml/registry.py): every
+MODEL_RELOAD_INTERVAL_S seconds, or at once on SIGHUP / POST
+/admin/model/reload, it reads CURRENT and, if it names a new version,
+loads that version's compact model and swaps it in with a single
+assignment. Requests keep using the previous model meanwhile, so /predict
+never waits for a load; a version that fails to load is logged and the
+previous model stays in service.
+
+Without a registry, the fixed PRICE_MODEL_PATH file is served instead and
+reloaded when its modification time changes (train_model.py replaces it
+with an atomic rename).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..ml import registry
+from ..ml.compact_model import CompactForest
+
+logger = logging.getLogger("neuraestate")
+
+MODEL_RELOAD_INTERVAL_S = float(os.getenv("MODEL_RELOAD_INTERVAL_S", "30"))  # 0 = only on signal
+# compact export written next to the joblib by ml/train_model.py (used when the registry is empty)
+PRICE_MODEL_PATH = os.getenv(
+    "PRICE_MODEL_PATH", os.path.join(os.path.dirname(__file__), "..", "ml", registry.COMPACT_FILE)
+)
+
+
+class ModelReloader:
+    def __init__(self, registry_dir=registry.REGISTRY_DIR, fallback_path=PRICE_MODEL_PATH,
+                 interval_s: float = MODEL_RELOAD_INTERVAL_S,
+                 loader: Callable[[Path], CompactForest] = CompactForest.load):
+        self.registry_dir = Path(registry_dir)
+        self.fallback_path = Path(fallback_path)
+        self.interval_s = interval_s
+        self._loader = loader
+        # (version, model) replaced as one object: readers never see a mix
+        self._state: Tuple[Optional[str], Optional[CompactForest]] = (None, None)
+        self._failed: Optional[str] = None
+        self._loaded_at: Optional[datetime] = None
+        self._load_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def current(self) -> Tuple[Optional[str], Optional[CompactForest]]:
+        """(version, model) being served; (None, None) until the first load finishes."""
+        return self._state
+
+    @property
+    def model(self) -> Optional[CompactForest]:
+        return self._state[1]
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._state[0]
+
+    def _source(self) -> Optional[Tuple[str, Path]]:
+        """(version key, npz path) that should be served, or None if there is no model."""
+        version = registry.current_version(self.registry_dir)
+        if version:
+            return version, self.registry_dir / version / registry.COMPACT_FILE
+        try:
+            mtime = self.fallback_path.stat().st_mtime_ns
+        except OSError:
+            return None
+        return f"file@{mtime}", self.fallback_path
+
+    def check(self) -> bool:
+        """Load the current version if it is not the one being served. True if swapped."""
+        with self._load_lock:
+            source = self._source()
+            if source is None or source[0] in (self.version, self._failed):
+                return False
+            key, path = source
+            try:
+                model = self._loader(path)
+            except Exception as e:
+                self._failed = key
+                logger.warning("Could not load price model %s from %s: %s", key, path, e)
+                return False
+            previous = self.version
+            self._state = (key, model)
+            self._failed = None
+            self._loaded_at = datetime.now(timezone.utc)
+            logger.info("Serving price model %s (was %s)", key, previous)
+            return True
+
+    def trigger(self) -> None:
+        """Ask the background thread to check for a new version now."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.check()
+            except Exception:  # never let the watcher die
+                logger.exception("Price model reload check failed")
+            self._wake.wait(self.interval_s if self.interval_s > 0 else None)
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="price-model-reload", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    def status(self) -> Dict[str, Any]:
+        version, model = self._state
+        return {
+            "version": version,
+            "loaded_at": self._loaded_at.isoformat() if self._loaded_at else None,
+            "registry_current": registry.current_version(self.registry_dir),
+            "failed_version": self._failed,
+            "reload_interval_s": self.interval_s,
+            "metadata": getattr(model, "meta", None),
+        }
@@ -0,0 +1,80 @@
+# src/neuraestate/api/responses.py
+"""
+JSON response for endpoints that return many rows.
+
+Returning a Response from a FastAPI handler skips response_model validation
+and the jsonable_encoder pass, so rows shaped once from the DB result are
+serialized directly. orjson is used when installed (it handles datetime
+natively and is several times faster than json); otherwise the stdlib json
+module with compact separators. NaN and +/-inf become null either way
+(orjson's behaviour; the bare NaN json would write is not valid JSON).
+
+    return FastJSONResponse({"total": total, "items": rows_as_dicts(result)})
+"""
+from __future__ import annotations
+
+import json
+import math
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from fastapi.responses import Response
+from sqlalchemy.engine import Result
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to json
+    orjson = None
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        s = obj.isoformat()
+        return s[:-6] + "Z" if s.endswith("+00:00") else s  # same as pydantic / OPT_UTC_Z
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj: Any) -> Any:
+    """Copy of `obj` with non-finite floats (and Decimals) replaced by None."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, Decimal):
+        return obj if obj.is_finite() else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(
+        content, default=_json_default, ensure_ascii=False, separators=(",", ":"), allow_nan=False
+    ).encode("utf-8")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+    try:
+        return _stdlib_dumps(content)
+    except ValueError:  # NaN / inf somewhere: rare, so only then pay for the copy
+        return _stdlib_dumps(_finite(content))
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rows_as_dicts(result: Result) -> List[Dict[str, Any]]:
+    """One dict per row, keyed by column label (types come from the SQL casts)."""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
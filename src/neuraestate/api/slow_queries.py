@@ -0,0 +1,200 @@
+# src/neuraestate/api/slow_queries.py
+"""
+Opt-in slow-query recorder.
+
+Set SLOW_QUERY_MS (e.g. 200) to record every statement slower than that:
+its fingerprint (see metrics.fingerprint), the SQL, bound params and the
+duration go into an in-memory ring buffer, and for SELECTs an
+`EXPLAIN (ANALYZE, BUFFERS)` plan is captured in a background thread so
+the request that was slow is not made slower. Plans are taken at most once
+per fingerprint every SLOW_QUERY_EXPLAIN_EVERY_S seconds, because ANALYZE
+re-runs the query.
+
+/listings builds a different statement per filter combination, so the
+per-fingerprint summary shows directly which combinations are slow and
+which relations they sequentially scan.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metrics import fingerprint
+
+logger = logging.getLogger("neuraestate")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))  # 0 = disabled
+SLOW_QUERY_BUFFER = int(os.getenv("SLOW_QUERY_BUFFER", "200"))
+SLOW_QUERY_EXPLAIN_EVERY_S = float(os.getenv("SLOW_QUERY_EXPLAIN_EVERY_S", "300"))
+# EXPLAIN ANALYZE executes the query again; never let it run away
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "10000"))
+
+_SEQ_SCAN = re.compile(r"Seq Scan on (\S+)")
+_SELECT = re.compile(r"^\s*(?:\(\s*)*(?:SELECT|WITH)\b", re.IGNORECASE)
+
+
+def _safe_params(parameters: Any) -> Any:
+    """Bound params for display: long strings and sequences are truncated."""
+    if isinstance(parameters, dict):
+        return {k: _safe_params(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_safe_params(v) for v in parameters[:20]]
+    if isinstance(parameters, (str, bytes)):
+        return parameters[:200]
+    if parameters is None or isinstance(parameters, (int, float, bool)):
+        return parameters
+    return str(parameters)[:200]
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements plus a per-fingerprint summary."""
+
+    def __init__(self, threshold_ms: float, maxlen: int = SLOW_QUERY_BUFFER,
+                 explain_every_s: float = SLOW_QUERY_EXPLAIN_EVERY_S,
+                 explain_engine: Optional[Engine] = None):
+        self.threshold_ms = threshold_ms
+        self.explain_every_s = explain_every_s
+        self.explain_engine = explain_engine
+        self._entries: deque = deque(maxlen=maxlen)
+        self._by_fp: Dict[str, Dict[str, Any]] = {}
+        self._last_explain: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # threads are only started on the first submit
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    # -----------------------
+    # Recording
+    # -----------------------
+    def record(self, statement: str, parameters: Any, duration_ms: float,
+               paramstyle: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if duration_ms < self.threshold_ms:
+            return None
+        fp = fingerprint(statement)
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "fingerprint": fp,
+            "sql": statement.strip()[:4000],
+            "params": _safe_params(parameters),
+            "duration_ms": round(duration_ms, 2),
+            "plan": None,
+            "seq_scans": [],
+        }
+        with self._lock:
+            self._entries.append(entry)
+            agg = self._by_fp.setdefault(fp, {"fingerprint": fp, "count": 0, "total_ms": 0.0,
+                                              "max_ms": 0.0, "seq_scans": [], "last_plan_at": None})
+            agg["count"] += 1
+            agg["total_ms"] += duration_ms
+            agg["max_ms"] = max(agg["max_ms"], duration_ms)
+            explain = self._should_explain(fp, statement, parameters, paramstyle)
+        if explain:
+            self._executor.submit(self._explain, entry, statement, parameters)
+        return entry
+
+    def _should_explain(self, fp: str, statement: str, parameters: Any, paramstyle: Optional[str]) -> bool:
+        if self.explain_engine is None or not _SELECT.match(statement):
+            return False
+        if not isinstance(parameters, (dict, tuple, list)):
+            return False
+        # the plan is taken on explain_engine; its driver must accept the same placeholders
+        if paramstyle and paramstyle != self.explain_engine.dialect.paramstyle:
+            return False
+        now = time.monotonic()
+        last = self._last_explain.get(fp)
+        if last is not None and now - last < self.explain_every_s:
+            return False
+        self._last_explain[fp] = now
+        return True
+
+    def _explain(self, entry: Dict[str, Any], statement: str, parameters: Any) -> None:
+        conn = self.explain_engine.raw_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"SET LOCAL statement_timeout = {int(SLOW_QUERY_EXPLAIN_TIMEOUT_MS)}")
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) " + statement, parameters)
+            plan = "\n".join(r[0] for r in cur.fetchall())
+            cur.close()
+        except Exception as e:
+            plan = f"EXPLAIN failed: {e}"
+            logger.warning("slow-query EXPLAIN failed for %s: %s", entry["fingerprint"][:80], e)
+        finally:
+            try:
+                conn.rollback()  # never keep anything ANALYZE touched
+            finally:
+                conn.close()
+        seq = sorted(set(_SEQ_SCAN.findall(plan)))
+        with self._lock:
+            entry["plan"] = plan
+            entry["seq_scans"] = seq
+            agg = self._by_fp.get(entry["fingerprint"])
+            if agg is not None:
+                agg["seq_scans"] = seq
+                agg["last_plan_at"] = entry["at"]
+
+    # -----------------------
+    # Reading
+    # -----------------------
+    def snapshot(self, limit: int = 50) -> Dict[str, Any]:
+        with self._lock:
+            recent = [dict(e) for e in list(self._entries)[-limit:]][::-1]
+            summary = [
+                {**a, "total_ms": round(a["total_ms"], 2), "max_ms": round(a["max_ms"], 2),
+                 "avg_ms": round(a["total_ms"] / a["count"], 2)}
+                for a in self._by_fp.values()
+            ]
+        summary.sort(key=lambda a: a["total_ms"], reverse=True)
+        return {"threshold_ms": self.threshold_ms, "by_fingerprint": summary, "recent": recent}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_fp.clear()
+            self._last_explain.clear()
+
+    # -----------------------
+    # Wiring
+    # -----------------------
+    def attach(self, engine: Engine) -> None:
+        """Time statements on `engine` (pass AsyncEngine.sync_engine for async engines)."""
+        paramstyle = engine.dialect.paramstyle
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("slow_query_t0", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            stack = conn.info.get("slow_query_t0")
+            if not stack:
+                return
+            duration_ms = (time.perf_counter() - stack.pop()) * 1000
+            if not executemany:
+                self.record(statement, parameters, duration_ms, paramstyle)
+
+        @event.listens_for(engine, "handle_error")
+        def _error(ctx):
+            stack = ctx.connection.info.get("slow_query_t0") if ctx.connection is not None else None
+            if stack:
+                stack.pop()
+
+
+def install(engines: List[Engine], explain_engine: Optional[Engine],
+            threshold_ms: float = SLOW_QUERY_MS) -> Optional[SlowQueryLog]:
+    """Attach a recorder to `engines` if threshold_ms > 0; returns None when disabled."""
+    if threshold_ms <= 0:
+        return None
+    log = SlowQueryLog(threshold_ms, explain_engine=explain_engine)
+    for e in engines:
+        log.attach(e)
+    logger.info("slow-query log enabled: threshold %.0f ms", threshold_ms)
+    return log
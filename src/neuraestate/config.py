@@ -18,6 +18,20 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = Field(default="INFO")
     APP_ENV: str = Field(default="dev")
 
+    # Connection pool (applies to every engine built by neuraestate.db.engine).
+    # Budget per process is roughly (pool size + overflow) x components in use.
+    DB_POOL_SIZE: int = Field(default=5)
+    DB_MAX_OVERFLOW: int = Field(default=5)
+    DB_POOL_RECYCLE: int = Field(default=1800)          # seconds
+    DB_POOL_TIMEOUT: float = Field(default=30.0)        # seconds to wait for a free connection
+    DB_STATEMENT_TIMEOUT_MS: int = Field(default=0)     # 0 = server default
+    DB_USE_NULLPOOL: bool = Field(default=False)        # behind pgbouncer/RDS proxy: let it pool
+    DB_APP_NAME: str = Field(default="neuraestate")     # application_name prefix, "-<component>" appended
+    # psycopg 3 only: prepare a statement server-side once a connection has run it
+    # this many times (0 = on first use, -1 = never). Off with NullPool, where
+    # connections are not reused; set -1 behind pgbouncer in transaction mode.
+    DB_PREPARE_THRESHOLD: int = Field(default=1)
+
 # Instantiate settings once, so you can import anywhere
 settings = Settings()
 
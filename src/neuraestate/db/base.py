@@ -1,6 +1,6 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from ..config import settings
+from .engine import get_engine
 from contextlib import contextmanager
 
 
@@ -9,13 +9,8 @@ class Base(DeclarativeBase):
     pass
 
 
-# Create the SQLAlchemy engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=False,            # set to True for raw SQL debugging
-    future=True,           # enforce SQLAlchemy 2.x style
-    pool_pre_ping=True     # recycle dead connections automatically
-)
+# Create the SQLAlchemy engine (shared pool, settings in db/engine.py)
+engine = get_engine("app", settings.DATABASE_URL)
 
 # Session factory
 SessionLocal = sessionmaker(
@@ -3,7 +3,6 @@
 Create DB tables from SQLAlchemy models. Safe for development.
 Run as module: python -m neuraestate.db.create_tables
 """
-from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -19,11 +18,10 @@ try:
     print("Using engine imported from neuraestate.db.session")
 except Exception:
     try:
-        # fall back to config (pydantic settings)
-        from neuraestate.config import settings
-        db_url = str(settings.database_url)
-        engine = create_engine(db_url)
-        print("Created engine from settings.database_url:", db_url)
+        # fall back to the shared engine built from config (pydantic settings)
+        from neuraestate.db.engine import get_engine
+        engine = get_engine("app")
+        print("Using shared engine from neuraestate.db.engine")
     except Exception as e:
         print("Could not import existing engine or settings:", e)
         raise
@@ -0,0 +1,99 @@
+# src/neuraestate/db/engine.py
+"""
+Single place where SQLAlchemy engines are built.
+
+Every engine gets the pool settings from config.Settings (DB_POOL_SIZE,
+DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_TIMEOUT, DB_USE_NULLPOOL), an
+optional per-statement timeout, and application_name "<DB_APP_NAME>-<component>"
+so pg_stat_activity shows which part of the system holds a connection.
+With the psycopg 3 driver, repeated statements are also prepared server-side
+after DB_PREPARE_THRESHOLD executions on a connection.
+
+    from neuraestate.db.engine import get_engine
+    engine = get_engine("api")
+
+get_engine() returns one shared engine per (component, url, overrides) for
+the process, so modules that import it independently share one pool.
+get_async_engine() is the asyncio counterpart (psycopg 3 async driver) with
+the same settings; it has its own pool, so budget both when using both.
+"""
+from __future__ import annotations
+
+import functools
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import NullPool
+
+from ..config import settings
+
+if TYPE_CHECKING:  # sqlalchemy.ext.asyncio needs greenlet; only the API imports it
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+def engine_options(component: str, driver: Optional[str] = None, **overrides: Any) -> Dict[str, Any]:
+    """create_engine kwargs for `component`; `overrides` win over settings."""
+    connect_args: Dict[str, Any] = {"application_name": f"{settings.DB_APP_NAME}-{component}"[:63]}
+    timeout_ms = overrides.pop("statement_timeout_ms", settings.DB_STATEMENT_TIMEOUT_MS)
+    if timeout_ms:
+        connect_args["options"] = f"-c statement_timeout={int(timeout_ms)}"
+    nullpool = overrides.pop("nullpool", settings.DB_USE_NULLPOOL)
+    prepare_threshold = overrides.pop("prepare_threshold", settings.DB_PREPARE_THRESHOLD)
+    if driver == "psycopg":
+        # prepared statements live and die with the connection: useless without a pool
+        use_prepare = prepare_threshold is not None and prepare_threshold >= 0 and not nullpool
+        connect_args["prepare_threshold"] = int(prepare_threshold) if use_prepare else None
+    connect_args.update(overrides.pop("connect_args", {}))
+
+    opts: Dict[str, Any] = {"pool_pre_ping": True, "future": True, "connect_args": connect_args}
+    if nullpool:
+        opts["poolclass"] = NullPool
+        for k in ("pool_size", "max_overflow", "pool_recycle", "pool_timeout"):
+            overrides.pop(k, None)
+    else:
+        opts.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    opts.update(overrides)
+    return opts
+
+
+def make_engine(component: str, url: Optional[str] = None, **overrides: Any) -> Engine:
+    """A new engine; prefer get_engine() unless you need a private pool."""
+    url = url or settings.DATABASE_URL
+    return create_engine(url, **engine_options(component, make_url(url).get_driver_name(), **overrides))
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_engine(component: str, url: str, overrides: tuple) -> Engine:
+    return make_engine(component, url, **dict(overrides))
+
+
+def get_engine(component: str, url: Optional[str] = None, **overrides: Any) -> Engine:
+    """Process-wide engine for `component` (e.g. "api", "scraper", "etl", "train")."""
+    return _cached_engine(component, url or settings.DATABASE_URL, tuple(sorted(overrides.items())))
+
+
+def async_url(url: str) -> str:
+    """Same database, async-capable driver (postgresql / +psycopg2 -> +psycopg)."""
+    u = make_url(url)
+    if u.drivername in ("postgresql", "postgresql+psycopg2"):
+        u = u.set(drivername="postgresql+psycopg")
+    return u.render_as_string(hide_password=False)
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_async_engine(component: str, url: str, overrides: tuple) -> "AsyncEngine":
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = async_url(url)
+    return create_async_engine(url, **engine_options(component, make_url(url).get_driver_name(), **dict(overrides)))
+
+
+def get_async_engine(component: str, url: Optional[str] = None, **overrides: Any) -> "AsyncEngine":
+    """Process-wide AsyncEngine for `component`, configured like get_engine()."""
+    return _cached_async_engine(component, url or settings.DATABASE_URL, tuple(sorted(overrides.items())))
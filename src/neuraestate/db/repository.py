@@ -1,64 +1,214 @@
 from __future__ import annotations
-from typing import List
-from sqlalchemy import select
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import delete, event, insert, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from neuraestate.db.models import Listing, Image, Amenity
+from neuraestate.db.models import Listing, Image, Amenity, listing_amenities
 from neuraestate.schemas import ListingIn
 
+AMENITY_CACHE_SIZE = int(os.getenv("AMENITY_CACHE_SIZE", "10000"))
+
+
+def _insert(session: Session, model):
+    """INSERT supporting ON CONFLICT for the session's dialect (PostgreSQL, or SQLite in tests/tools)."""
+    return (sqlite_insert if session.get_bind().dialect.name == "sqlite" else pg_insert)(model)
+
+
+class AmenityCache:
+    """
+    Process-wide amenity name -> id map, shared by every repository/thread.
+
+    Warmed with one SELECT on first use and filled on miss with
+    INSERT .. ON CONFLICT DO NOTHING RETURNING, so two ingesters creating
+    the same name never hit a unique violation. Ids this process inserted
+    only become visible to other sessions once their transaction commits;
+    on rollback they are dropped. Bounded LRU; call clear() after the
+    amenities table is reseeded.
+    """
+
+    def __init__(self, maxsize: int = AMENITY_CACHE_SIZE):
+        self.maxsize = max(1, maxsize)
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._warmed = False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+            self._warmed = False
+
+    def _put_many(self, found: Dict[str, int]) -> None:
+        with self._lock:
+            for name, amenity_id in found.items():
+                self._ids[name] = amenity_id
+                self._ids.move_to_end(name)
+            while len(self._ids) > self.maxsize:
+                self._ids.popitem(last=False)
+
+    def _warm(self, session: Session) -> None:
+        rows = session.execute(select(Amenity.name, Amenity.id).order_by(Amenity.id).limit(self.maxsize))
+        self._put_many({name: amenity_id for name, amenity_id in rows})
+        self._warmed = True
+
+    def resolve(self, session: Session, names: Iterable[str]) -> Dict[str, int]:
+        """name -> id for every name, creating missing amenities in `session`'s transaction."""
+        wanted = set(names)
+        if not wanted:
+            return {}
+        if not self._warmed:
+            self._warm(session)
+
+        found: Dict[str, int] = {}
+        with self._lock:
+            for n in wanted:
+                amenity_id = self._ids.get(n)
+                if amenity_id is not None:
+                    self._ids.move_to_end(n)
+                    found[n] = amenity_id
+        # ids created earlier in this still-open transaction
+        pending: Dict[str, int] = session.info.get("amenity_cache_pending", {})
+        found.update({n: pending[n] for n in wanted - found.keys() if n in pending})
+
+        missing = sorted(wanted - found.keys())
+        if not missing:
+            return found
+        inserted = {
+            name: amenity_id
+            for amenity_id, name in session.execute(
+                _insert(session, Amenity).values([{"name": n} for n in missing])
+                .on_conflict_do_nothing(index_elements=[Amenity.name])
+                .returning(Amenity.id, Amenity.name)
+            )
+        }
+        existing = [n for n in missing if n not in inserted]
+        committed: Dict[str, int] = {}
+        if existing:
+            rows = session.execute(select(Amenity.name, Amenity.id).where(Amenity.name.in_(existing)))
+            committed = {name: amenity_id for name, amenity_id in rows}
+            self._put_many(committed)
+        if inserted:
+            self._hold_until_commit(session, inserted)
+        found.update(committed)
+        found.update(inserted)
+        return found
+
+    def _hold_until_commit(self, session: Session, inserted: Dict[str, int]) -> None:
+        pending = session.info.setdefault("amenity_cache_pending", {})
+        pending.update(inserted)
+        if session.info.get("amenity_cache_hooked"):
+            return
+        session.info["amenity_cache_hooked"] = True
+
+        def _promote(sess: Session) -> None:
+            self._put_many(sess.info.pop("amenity_cache_pending", {}))
+
+        def _discard(sess: Session) -> None:
+            sess.info.pop("amenity_cache_pending", None)
+
+        event.listen(session, "after_commit", _promote)
+        event.listen(session, "after_rollback", _discard)
+
+
+amenity_cache = AmenityCache()
+
 
 class ListingRepository:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, amenities: Optional[AmenityCache] = None):
         self.session = session
+        self.amenities = amenities or amenity_cache
 
     def upsert_listing(self, dto: ListingIn) -> Listing:
         """
         Upsert a listing by external_id and replace its images & amenity links.
         Note: commit is the caller's responsibility.
         """
-        # --- Get or create listing
-        stmt = select(Listing).where(Listing.external_id == dto.external_id)
-        obj: Listing | None = self.session.scalar(stmt)
-
-        if obj is None:
-            obj = Listing(
-                external_id=dto.external_id,
-                title=dto.title,
-                price=dto.price,
-                location=dto.location,
-                url=str(dto.url),
-            )
-            self.session.add(obj)
-        else:
-            obj.title = dto.title
-            obj.price = dto.price
-            obj.location = dto.location
-            obj.url = str(dto.url)
-
-        # --- Replace images
-        obj.images.clear()
-        for u in dto.image_urls:
-            obj.images.append(Image(url=str(u)))
-
-        # --- Sync amenities
-        names: List[str] = [n.strip() for n in dto.amenities if n and n.strip()]
-        if names:
-            existing = {
-                a.name: a
-                for a in self.session.scalars(
-                    select(Amenity).where(Amenity.name.in_(names))
-                ).all()
+        listing_id = self.upsert_many([dto])[dto.external_id]
+        return self.session.get(Listing, listing_id, populate_existing=True)
+
+    def upsert_many(self, dtos: Iterable[ListingIn]) -> Dict[str, int]:
+        """
+        Bulk version of upsert_listing: a fixed handful of statements per
+        batch instead of several round trips per listing. Returns
+        {external_id: listing id}. A later DTO wins over an earlier one with
+        the same external_id. Commit is the caller's responsibility.
+
+        Writes go through Core, so Listing objects already loaded in this
+        session keep their old state until refreshed.
+        """
+        by_ext: Dict[str, ListingIn] = {d.external_id: d for d in dtos}
+        if not by_ext:
+            return {}
+        # sorted so concurrent batches lock rows in the same order
+        ext_ids = sorted(by_ext)
+
+        # --- Listings: one INSERT .. ON CONFLICT DO UPDATE .. RETURNING
+        stmt = _insert(self.session, Listing).values([
+            {
+                "external_id": e,
+                "title": by_ext[e].title,
+                "price": by_ext[e].price,
+                "location": by_ext[e].location,
+                "url": str(by_ext[e].url),
             }
-            to_create = [Amenity(name=n) for n in names if n not in existing]
-            if to_create:
-                self.session.add_all(to_create)
-                self.session.flush()  # ensure IDs are assigned
-            amenities = [existing.get(n) or next(a for a in to_create if a.name == n) for n in names]
-            obj.amenities = amenities
-        else:
-            obj.amenities.clear()
-
-        # Ensure obj.id is populated
-        self.session.flush()
-        return obj
+            for e in ext_ids
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Listing.external_id],
+            set_={c: stmt.excluded[c] for c in ("title", "price", "location", "url")},
+        ).returning(Listing.id, Listing.external_id)
+        ids = {ext: lid for lid, ext in self.session.execute(stmt)}
+        listing_ids = list(ids.values())
+
+        # --- Amenities: resolve every name in the batch at once
+        wanted_names = {
+            e: {n.strip() for n in by_ext[e].amenities if n and n.strip()} for e in ext_ids
+        }
+        amenity_ids = self.amenities.resolve(self.session, set().union(*wanted_names.values()))
+        wanted_links = {(ids[e], amenity_ids[n]) for e in ext_ids for n in wanted_names[e]}
+        have_links = {
+            (lid, aid) for lid, aid in self.session.execute(
+                select(listing_amenities.c.listing_id, listing_amenities.c.amenity_id)
+                .where(listing_amenities.c.listing_id.in_(listing_ids))
+            )
+        }
+        self._sync_links(wanted_links, have_links)
 
+        # --- Images: keep matching rows, add missing ones, drop the rest.
+        # Counted, not a set: a URL listed twice keeps two rows, as before.
+        missing_images = Counter((ids[e], str(u)) for e in ext_ids for u in by_ext[e].image_urls)
+        stale: List[int] = []
+        for img_id, lid, url in self.session.execute(
+            select(Image.id, Image.listing_id, Image.url)
+            .where(Image.listing_id.in_(listing_ids))
+            .order_by(Image.id)
+        ):
+            if missing_images[(lid, url)] > 0:
+                missing_images[(lid, url)] -= 1
+            else:
+                stale.append(img_id)
+        if stale:
+            self.session.execute(delete(Image).where(Image.id.in_(stale)))
+        new_images = sorted(missing_images.elements())
+        if new_images:
+            self.session.execute(insert(Image), [{"listing_id": l, "url": u} for l, u in new_images])
+
+        return ids
+
+    def _sync_links(self, wanted: Set[Tuple[int, int]], have: Set[Tuple[int, int]]) -> None:
+        gone = sorted(have - wanted)
+        if gone:
+            self.session.execute(
+                delete(listing_amenities).where(
+                    tuple_(listing_amenities.c.listing_id, listing_amenities.c.amenity_id).in_(gone)
+                )
+            )
+        new = sorted(wanted - have)
+        if new:
+            self.session.execute(
+                insert(listing_amenities), [{"listing_id": l, "amenity_id": a} for l, a in new]
+            )
@@ -2,11 +2,12 @@
 import os
 from typing import Generator, Optional
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from dotenv import load_dotenv
 
+from .engine import get_engine
+
 # Load .env (project root) so DATABASE_URL is available
 load_dotenv()
 
@@ -14,8 +15,8 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL not set in environment (.env)")
 
-# Create engine. echo=False by default; set echo=True for SQL debug
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Shared engine; pool size/timeouts come from settings (see db/engine.py)
+engine = get_engine("app", DATABASE_URL)
 
 # Session factory - expire_on_commit=False is often convenient in web apps
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
@@ -7,6 +7,8 @@ ETL_SCRIPT_PATH="${ETL_SCRIPT_PATH:-src/neuraestate/pipelines/preprocess.py}"
 SLEEP_SECONDS="${SLEEP_SECONDS:-3600}"
 LOG_DIR="${LOG_DIR:-/app/logs}"
 LOG_FILE="${LOG_DIR}/etl_runs.log"
+# the ETL imports the neuraestate package (shared DB engine settings)
+export PYTHONPATH="${PYTHONPATH:+$PYTHONPATH:}src"
 
 mkdir -p "$LOG_DIR"
 
@@ -0,0 +1,156 @@
+# src/neuraestate/ml/compact_model.py
+"""
+Compact, dependency-light form of the price model trained by train_model.py.
+
+The sklearn Pipeline (imputer + scaler + dense one-hot + RandomForest) is
+flattened into a handful of NumPy arrays and saved as one .npz:
+
+  - every tree's nodes concatenated (feature, threshold, left, right, value),
+    with per-tree root offsets;
+  - numeric preprocessing as medians / means / scales;
+  - the one-hot step as a city -> index lookup: a split on one-hot column
+    j is just "city_index == j", so no dense one-hot matrix is built.
+
+predict() walks all trees for all rows at once, one tree level per NumPy
+step: leaves point to themselves, so max_depth fixed steps finish every
+path. That makes a single-row /predict a few dozen array operations
+instead of a Pipeline call fanning out over 200 estimators; for large
+batches sklearn's compiled predictor remains faster. Loading is a single
+np.load; sklearn is only needed to export.
+
+    model = CompactForest.load("price_model.npz")
+    model.predict({"area_sqft": [900.0], "bhk": [2], "bathrooms": [None], "city": ["Pune"]})
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+MISSING_CITY = "__missing__"  # fill value of the categorical imputer in train_model
+
+
+class CompactForest:
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        self.feature = arrays["feature"]        # int32; >= n_num means "city == feature - n_num"
+        self.threshold = arrays["threshold"]    # float64, +inf on leaves
+        self.left = arrays["left"]              # int32, global node index; leaves point to themselves
+        self.right = arrays["right"]
+        self.value = arrays["value"]            # float64, read on leaves
+        self.roots = arrays["roots"]            # int32, root node of each tree
+        self.medians = arrays["medians"]
+        self.means = arrays["means"]
+        self.scales = arrays["scales"]
+        self.meta = meta
+        self.num_features: List[str] = meta["num_features"]
+        self.cat_feature: str = meta["cat_feature"]
+        self.max_depth: int = meta["max_depth"]
+        self._n_num = len(self.num_features)
+        self._city_index = {c: i for i, c in enumerate(meta["categories"])}
+
+    # -----------------------
+    # Export from sklearn
+    # -----------------------
+    @classmethod
+    def from_pipeline(cls, pipeline, meta: Optional[Dict[str, Any]] = None) -> "CompactForest":
+        """Flatten a fitted train_model.build_pipeline() Pipeline."""
+        pre = pipeline.named_steps["pre"]
+        rf = pipeline.named_steps["rf"]
+        num_pipe, num_cols = pre.named_transformers_["num"], list(pre.transformers_[0][2])
+        cat_pipe, cat_cols = pre.named_transformers_["cat"], list(pre.transformers_[1][2])
+        if len(cat_cols) != 1:
+            raise ValueError("compact export supports exactly one categorical feature")
+
+        imputer, scaler = num_pipe.named_steps["imputer"], num_pipe.named_steps["scaler"]
+        # SimpleImputer drops columns that had no observed values while fitting
+        kept = ~np.isnan(imputer.statistics_)
+        num_features = [c for c, k in zip(num_cols, kept) if k]
+        categories = [str(c) for c in cat_pipe.named_steps["onehot"].categories_[0]]
+
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = 0
+        for est in rf.estimators_:
+            t = est.tree_
+            leaf = t.children_left == -1
+            here = np.arange(offset, offset + t.node_count)
+            feature.append(np.where(leaf, 0, t.feature).astype(np.int32))
+            threshold.append(np.where(leaf, np.inf, t.threshold).astype(np.float64))
+            left.append(np.where(leaf, here, t.children_left + offset).astype(np.int32))
+            right.append(np.where(leaf, here, t.children_right + offset).astype(np.int32))
+            value.append(t.value[:, 0, 0].astype(np.float64))
+            roots.append(offset)
+            offset += t.node_count
+
+        arrays = {
+            "feature": np.concatenate(feature),
+            "threshold": np.concatenate(threshold),
+            "left": np.concatenate(left),
+            "right": np.concatenate(right),
+            "value": np.concatenate(value),
+            "roots": np.asarray(roots, dtype=np.int32),
+            "medians": imputer.statistics_[kept].astype(np.float64),
+            "means": np.asarray(scaler.mean_, dtype=np.float64),
+            "scales": np.asarray(scaler.scale_, dtype=np.float64),
+        }
+        meta = {
+            **(meta or {}),
+            "num_features": num_features,
+            "cat_feature": cat_cols[0],
+            "categories": categories,
+            "n_trees": len(roots),
+            "max_depth": int(max(e.tree_.max_depth for e in rf.estimators_)),
+        }
+        return cls(arrays, meta)
+
+    # -----------------------
+    # Persistence
+    # -----------------------
+    def save(self, path: Union[str, Path]) -> None:
+        arrays = {k: getattr(self, k) for k in ("feature", "threshold", "left", "right", "value", "roots",
+                                                 "medians", "means", "scales")}
+        with open(path, "wb") as f:
+            np.savez(f, meta=np.frombuffer(json.dumps(self.meta).encode("utf-8"), dtype=np.uint8), **arrays)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "CompactForest":
+        with np.load(path, allow_pickle=False) as z:
+            arrays = {k: z[k] for k in z.files if k != "meta"}
+            meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+        return cls(arrays, meta)
+
+    # -----------------------
+    # Inference
+    # -----------------------
+    def transform(self, rows: Mapping[str, Sequence[Any]]):
+        """(scaled numeric matrix as float32, city index per row: -1 if unseen)."""
+        X = np.column_stack([np.asarray(rows[c], dtype=np.float64) for c in self.num_features])
+        X = np.where(np.isnan(X), self.medians, X)
+        # trees compare float32 features against float64 thresholds, like sklearn
+        X = ((X - self.means) / self.scales).astype(np.float32)
+        cities = rows[self.cat_feature]
+        idx = np.fromiter(
+            (self._city_index.get(MISSING_CITY if c is None or c != c else str(c), -1) for c in cities),
+            dtype=np.int32, count=len(cities),
+        )
+        return X, idx
+
+    def predict(self, rows: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """Mean prediction over trees for each row; `rows` maps feature name -> column."""
+        X, city = self.transform(rows)
+        n_rows, n_num, n_trees = X.shape[0], self._n_num, len(self.roots)
+        flat = X.ravel()
+        # one entry per (tree, row) pair
+        row = np.tile(np.arange(n_rows, dtype=np.int64), n_trees)
+        row_offset = row * n_num
+        node = np.repeat(self.roots, n_rows)
+        for _ in range(self.max_depth):
+            f = self.feature[node]
+            x_num = flat[row_offset + np.minimum(f, n_num - 1)]
+            x = np.where(f < n_num, x_num, city[row] == f - n_num)
+            node = np.where(x <= self.threshold[node], self.left[node], self.right[node])
+        return self.value[node].reshape(n_trees, n_rows).mean(axis=0)
+
+    def predict_one(self, **features: Any) -> float:
+        return float(self.predict({k: [v] for k, v in features.items()})[0])
@@ -0,0 +1,195 @@
+# src/neuraestate/ml/registry.py
+"""
+Local model registry: one immutable directory per trained model, plus a
+CURRENT file naming the version to serve.
+
+    <MODEL_REGISTRY_DIR>/20250131T120000.123456Z/price_model.joblib
+                                                 price_model.npz
+                                                 model_metadata.json
+                                                 train_frame.parquet
+    <MODEL_REGISTRY_DIR>/CURRENT                 -> "20250131T120000.123456Z"
+
+A version is written under a hidden staging directory and renamed into
+place when complete, then CURRENT is replaced with os.replace. Both renames
+are atomic, so a reader sees either the old version or the new one, never a
+half-written file. Files inside a published version are never modified.
+
+The fixed paths in ml/ (LEGACY_PATHS) are hard links to the current
+version's files, refreshed whenever CURRENT changes, so a rollback also
+rolls back what older tools and `train_model.py --incremental` read.
+
+    PYTHONPATH=src python src/neuraestate/ml/registry.py             # list versions
+    PYTHONPATH=src python src/neuraestate/ml/registry.py --use <v>   # roll back / forward
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+# -------------------------
+# CONFIG
+# -------------------------
+REGISTRY_DIR = Path(os.getenv("MODEL_REGISTRY_DIR", Path(__file__).resolve().parents[3] / "models" / "registry"))
+REGISTRY_KEEP = int(os.getenv("MODEL_REGISTRY_KEEP", "5"))  # published versions kept on disk
+CURRENT = "CURRENT"
+METADATA = "model_metadata.json"
+MODEL_FILE = "price_model.joblib"   # sklearn Pipeline
+COMPACT_FILE = "price_model.npz"    # compact_model.CompactForest, what the API serves
+FRAME_FILE = "train_frame.parquet"  # rows the model was trained on (incremental runs)
+STAGING_PREFIX = ".staging-"
+
+# registry file -> fixed path that mirrors the current version
+ML_DIR = Path(__file__).resolve().parent
+LEGACY_PATHS: Dict[str, Path] = {name: ML_DIR / name for name in (MODEL_FILE, COMPACT_FILE, METADATA)}
+
+PathLike = Union[str, Path]
+
+
+def new_version() -> str:
+    """UTC timestamp down to microseconds: versions sort in publish order."""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%fZ")
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # e.g. Windows: directories cannot be opened
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path.parent)
+
+
+# -------------------------
+# WRITE
+# -------------------------
+def stage(version: str, base_dir: PathLike = REGISTRY_DIR) -> Path:
+    """Empty directory to write a version's artifacts into before publish()."""
+    staging = Path(base_dir) / f"{STAGING_PREFIX}{version}"
+    staging.mkdir(parents=True, exist_ok=False)
+    return staging
+
+
+def publish(version: str, meta: Dict[str, Any], base_dir: PathLike = REGISTRY_DIR,
+            keep: int = REGISTRY_KEEP, legacy: Optional[Dict[str, Path]] = None) -> Path:
+    """Write metadata into the staged version, move it into place and make it current."""
+    base_dir = Path(base_dir)
+    staging = base_dir / f"{STAGING_PREFIX}{version}"
+    meta = {**meta, "model_version": version}
+    with open(staging / METADATA, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    for p in staging.iterdir():
+        with open(p, "rb+") as f:
+            os.fsync(f.fileno())
+
+    final = base_dir / version
+    os.replace(staging, final)
+    _fsync_dir(base_dir)
+    set_current(version, base_dir, legacy)
+    prune(base_dir, keep)
+    return final
+
+
+def set_current(version: str, base_dir: PathLike = REGISTRY_DIR, legacy: Optional[Dict[str, Path]] = None) -> None:
+    """
+    Point CURRENT at `version` and refresh the fixed paths in `legacy`
+    (default LEGACY_PATHS; pass {} to leave them alone).
+    """
+    base_dir = Path(base_dir)
+    src = base_dir / version
+    if not (src / METADATA).exists():
+        raise FileNotFoundError(f"No published model version {version} under {base_dir}")
+    _write_atomic(base_dir / CURRENT, version.encode("utf-8"))
+    for name, dst in (LEGACY_PATHS if legacy is None else legacy).items():
+        if (src / name).exists():
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            link_into(src / name, dst)
+
+
+def prune(base_dir: PathLike = REGISTRY_DIR, keep: int = REGISTRY_KEEP) -> List[str]:
+    """Delete all but the newest `keep` versions (never the current one) and stale staging dirs."""
+    base_dir = Path(base_dir)
+    current = current_version(base_dir)
+    removed = []
+    for v in list_versions(base_dir)[:-keep] if keep > 0 else []:
+        if v != current:
+            shutil.rmtree(base_dir / v, ignore_errors=True)
+            removed.append(v)
+    for p in base_dir.glob(f"{STAGING_PREFIX}*"):
+        # older than a day: left behind by a crashed run, not a trainer still writing
+        if datetime.now().timestamp() - p.stat().st_mtime > 24 * 3600:
+            shutil.rmtree(p, ignore_errors=True)
+    return removed
+
+
+def link_into(src: Path, dst: Path) -> None:
+    """Atomically make `dst` a copy of `src` (hard link when possible), for legacy fixed paths."""
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError:  # other filesystem / no hard links
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+# -------------------------
+# READ
+# -------------------------
+def list_versions(base_dir: PathLike = REGISTRY_DIR) -> List[str]:
+    """Published versions, oldest first."""
+    base_dir = Path(base_dir)
+    if not base_dir.is_dir():
+        return []
+    return sorted(p.name for p in base_dir.iterdir()
+                  if p.is_dir() and not p.name.startswith(".") and (p / METADATA).exists())
+
+
+def current_version(base_dir: PathLike = REGISTRY_DIR) -> Optional[str]:
+    try:
+        return (Path(base_dir) / CURRENT).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_dir(version: Optional[str] = None, base_dir: PathLike = REGISTRY_DIR) -> Optional[Path]:
+    """Directory of `version` (default: current), or None if the registry is empty."""
+    version = version or current_version(base_dir)
+    return Path(base_dir) / version if version else None
+
+
+def read_metadata(version: Optional[str] = None, base_dir: PathLike = REGISTRY_DIR) -> Optional[Dict[str, Any]]:
+    d = version_dir(version, base_dir)
+    if d is None:
+        return None
+    with open(d / METADATA, encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the local model registry")
+    parser.add_argument("--use", metavar="VERSION", help="make VERSION the current model")
+    args = parser.parse_args()
+    if args.use:
+        set_current(args.use)
+    current = current_version()
+    for v in list_versions():
+        meta = read_metadata(v)
+        print(f"{'*' if v == current else ' '} {v}  {meta.get('mode', '')}  r2={meta.get('r2')}  rows={meta.get('rows_total')}")
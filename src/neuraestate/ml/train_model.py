@@ -3,25 +3,55 @@
 Train a baseline price prediction model on ods_listings and save as joblib.
 
 Usage:
-    python src/neuraestate/ml/train_model.py
+    PYTHONPATH=src python src/neuraestate/ml/train_model.py
+    PYTHONPATH=src python src/neuraestate/ml/train_model.py --from-snapshot   # latest Parquet snapshot, no DB load
+    PYTHONPATH=src python src/neuraestate/ml/train_model.py --incremental     # only rows processed since last run
+    PYTHONPATH=src python src/neuraestate/ml/train_model.py --tune            # CV benchmark of model families (tune.py)
+
+Incremental mode keeps the last training frame in the model's registry
+version (train_frame.parquet) and the newest processed_at it contained
+("data_watermark" in model_metadata.json). It fetches only rows processed
+after the watermark, merges them into the frame (updated listings replace
+their old version) and grows the existing forest by TRAIN_ADD_TREES trees
+fitted on the new rows plus a replay sample of older ones (TRAIN_REPLAY_RATIO
+old rows per new row), with warm_start.
+The fitted preprocessing (scaler, city one-hot) is kept, so old and new
+trees see the same feature space. A full retrain happens instead when
+there is no previous run, the forest would exceed TRAIN_MAX_TREES, or the
+delta is more than TRAIN_FULL_RETRAIN_DELTA of the frame.
+
+Every save also exports price_model.npz (see compact_model.py): the same
+forest as flat NumPy arrays, which the API loads for /predict without
+unpickling the sklearn Pipeline.
+
+Each run is published as a new version in the model registry (registry.py,
+MODEL_REGISTRY_DIR) and made current atomically; the API picks it up
+without a restart. The fixed paths below are refreshed from the published
+version with atomic renames, for tools that still read them.
 
 Requirements (in requirements.txt):
     scikit-learn, joblib, pandas, sqlalchemy, python-dotenv
 
 Outputs:
+    - models/registry/<version>/ (joblib, npz, metadata, training frame) and models/registry/CURRENT
     - src/neuraestate/ml/price_model.joblib
+    - src/neuraestate/ml/price_model.npz
     - src/neuraestate/ml/model_metadata.json
+    - src/neuraestate/ml/tuning_leaderboard.json (--tune only; no model is saved)
 """
 
 import os
 import json
+import argparse
 from pathlib import Path
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from neuraestate.db.engine import get_engine
+from neuraestate.ml import registry
+from neuraestate.ml.compact_model import CompactForest
 
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
@@ -43,7 +73,10 @@ if not DATABASE_URL:
 # Where to save
 OUT_DIR = Path(__file__).resolve().parents[0]
 MODEL_PATH = OUT_DIR / "price_model.joblib"
+COMPACT_PATH = OUT_DIR / "price_model.npz"
 META_PATH = OUT_DIR / "model_metadata.json"
+REGISTRY_DIR = registry.REGISTRY_DIR
+TUNE_PATH = OUT_DIR / "tuning_leaderboard.json"
 
 RANDOM_STATE = 42
 TEST_SIZE = 0.2
@@ -52,17 +85,36 @@ TEST_SIZE = 0.2
 NUM_FEATURES = ["area_sqft", "bhk", "bathrooms"]
 CAT_FEATURES = ["city"]
 TARGET = "price_inr"
+# carried in the frame for incremental runs, not model inputs
+KEY_COLUMNS = ["id", "processed_at"]
 
 # Minimal sanity thresholds (you can tweak)
 MIN_ROWS = 100
 
+# Incremental training
+N_ESTIMATORS = 200
+ADD_TREES = int(os.getenv("TRAIN_ADD_TREES", "50"))          # trees added per incremental run
+MAX_TREES = int(os.getenv("TRAIN_MAX_TREES", "600"))         # beyond this, retrain from scratch
+REPLAY_RATIO = float(os.getenv("TRAIN_REPLAY_RATIO", "1.0"))  # old rows replayed per new row...
+REPLAY_ROWS = int(os.getenv("TRAIN_REPLAY_ROWS", "20000"))     # ...up to this many
+FULL_RETRAIN_DELTA = float(os.getenv("TRAIN_FULL_RETRAIN_DELTA", "0.5"))
+EVAL_ROWS = int(os.getenv("TRAIN_EVAL_ROWS", "50000"))       # cap on test rows scored per run
+
 # -----------------------
 # Load data
 # -----------------------
-def load_data():
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+def load_data(since=None):
+    """
+    Training rows from ods_listings; with `since`, only rows processed at or
+    after it. Inclusive because preprocess.py stamps a whole batch with one
+    processed_at but commits it in chunks: a run between two chunks must
+    see the rest of that batch next time.
+    """
+    engine = get_engine("train", DATABASE_URL, pool_size=1, max_overflow=0)
     sql = """
     SELECT
+      id,
+      processed_at,
       price_inr,
       area_sqft,
       bhk,
@@ -73,9 +125,21 @@ def load_data():
       AND area_sqft IS NOT NULL
       AND bhk IS NOT NULL
     """
-    df = pd.read_sql(sql, engine)
+    params = None
+    if since is not None:
+        sql += "  AND processed_at >= %(since)s\n"
+        params = {"since": since}
+    df = pd.read_sql(sql, engine, params=params)
     return df
 
+
+def load_data_from_snapshot(run_date=None):
+    """Same frame as load_data(), read from the ods_listings Parquet snapshot."""
+    from neuraestate.pipelines.snapshot import load_snapshot
+
+    df = load_snapshot(KEY_COLUMNS + [TARGET] + NUM_FEATURES + CAT_FEATURES, run_date=run_date)
+    return df.dropna(subset=[TARGET, "area_sqft", "bhk"]).reset_index(drop=True)
+
 # -----------------------
 # Build pipeline
 # -----------------------
@@ -100,7 +164,7 @@ def build_pipeline():
 
     model = Pipeline([
         ("pre", preprocessor),
-        ("rf", RandomForestRegressor(n_estimators=200, n_jobs=-1, random_state=RANDOM_STATE))
+        ("rf", RandomForestRegressor(n_estimators=N_ESTIMATORS, n_jobs=-1, random_state=RANDOM_STATE))
     ])
 
     return model
@@ -108,76 +172,269 @@ def build_pipeline():
 # -----------------------
 # Train / evaluate
 # -----------------------
+def split_mask(df):
+    """
+    True for test rows. Keyed on the listing id when present, so a listing
+    stays on the same side of the split across incremental runs.
+    """
+    if "id" in df.columns:
+        return (df["id"].astype("int64").to_numpy() * 2654435761 % 2**32) % 100 < TEST_SIZE * 100
+    _, test_idx = train_test_split(np.arange(len(df)), test_size=TEST_SIZE, random_state=RANDOM_STATE)
+    mask = np.zeros(len(df), dtype=bool)
+    mask[test_idx] = True
+    return mask
+
+
+def evaluate(pipeline, df_test):
+    if len(df_test) > EVAL_ROWS:
+        df_test = df_test.sample(EVAL_ROWS, random_state=RANDOM_STATE)
+    y_test = df_test[TARGET].astype(float)
+    y_pred = pipeline.predict(df_test[NUM_FEATURES + CAT_FEATURES])
+    mae = mean_absolute_error(y_test, y_pred)
+    # compute RMSE without using squared= kwarg (compatibility)
+    rmse = float(np.sqrt(mean_squared_error(y_test, y_pred)))
+    r2 = r2_score(y_test, y_pred)
+    print(f"MAE: {mae:.2f}")
+    print(f"RMSE: {rmse:.2f}")
+    print(f"R2: {r2:.4f}")
+    return {"mae": float(mae), "rmse": float(rmse), "r2": float(r2)}
+
+
+def data_watermark(df):
+    if "processed_at" not in df.columns or df["processed_at"].isna().all():
+        return None
+    return pd.Timestamp(df["processed_at"].max()).isoformat()
+
+
+def legacy_paths():
+    """Fixed paths kept in sync with the registry's current version."""
+    return {registry.MODEL_FILE: MODEL_PATH, registry.COMPACT_FILE: COMPACT_PATH, registry.METADATA: META_PATH}
+
+
+def save(pipeline, meta, df):
+    version = registry.new_version()
+    meta["model_version"] = version
+    meta["n_estimators"] = int(pipeline.named_steps["rf"].n_estimators)
+    meta["data_watermark"] = data_watermark(df)
+    try:
+        import sklearn
+        meta["sklearn_version"] = sklearn.__version__
+    except Exception:
+        pass
+
+    staging = registry.stage(version, REGISTRY_DIR)
+    joblib.dump(pipeline, staging / registry.MODEL_FILE)
+    CompactForest.from_pipeline(pipeline, meta).save(staging / registry.COMPACT_FILE)
+    if "id" in df.columns:
+        # versioned with the model it trained; published atomically with it
+        df.to_parquet(staging / registry.FRAME_FILE, index=False)
+    published = registry.publish(version, meta, REGISTRY_DIR, legacy=legacy_paths())
+    print("Published model version", version, "to", published)
+    print("Updated", MODEL_PATH.name, COMPACT_PATH.name, META_PATH.name, "in", MODEL_PATH.parent)
+
+
 def train_and_save(df):
     if len(df) < MIN_ROWS:
         raise RuntimeError(f"Not enough rows to train (found {len(df)}). Need >= {MIN_ROWS}")
 
-    X = df[NUM_FEATURES + CAT_FEATURES].copy()
-    y = df[TARGET].astype(float).copy()
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE
-    )
+    test = split_mask(df)
+    df_train, df_test = df[~test], df[test]
 
     pipeline = build_pipeline()
-    print("Training model on", len(X_train), "rows...")
-    pipeline.fit(X_train, y_train)
+    print("Training model on", len(df_train), "rows...")
+    pipeline.fit(df_train[NUM_FEATURES + CAT_FEATURES], df_train[TARGET].astype(float))
 
     print("Predicting on test set...")
-    y_pred = pipeline.predict(X_test)
+    scores = evaluate(pipeline, df_test)
 
-    mae = mean_absolute_error(y_test, y_pred)
-    # compute RMSE without using squared= kwarg (compatibility)
-    rmse = float(np.sqrt(mean_squared_error(y_test, y_pred)))
-    r2 = r2_score(y_test, y_pred)
+    meta = {
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "mode": "full",
+        "rows_total": len(df),
+        "rows_train": int(len(df_train)),
+        "rows_test": int(len(df_test)),
+        **scores,
+        "target": TARGET,
+        "features": NUM_FEATURES + CAT_FEATURES,
+        "sklearn_version": None,
+    }
+    save(pipeline, meta, df)
+    return pipeline, meta
 
-    print(f"MAE: {mae:.2f}")
-    print(f"RMSE: {rmse:.2f}")
-    print(f"R2: {r2:.4f}")
 
-    # Save model
-    MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(pipeline, MODEL_PATH)
-    print("Saved model to", MODEL_PATH)
+def unseen_rows(delta, frame):
+    """Rows of `delta` not already in `frame` with the same processed_at (re-read boundary rows)."""
+    seen = pd.MultiIndex.from_frame(frame[KEY_COLUMNS])
+    return delta[~pd.MultiIndex.from_frame(delta[KEY_COLUMNS]).isin(seen)]
+
+
+def _merge_frames(old, delta):
+    """Previous frame with updated listings replaced by their new version."""
+    kept = old[~old["id"].isin(delta["id"])]
+    return pd.concat([kept, delta], ignore_index=True)
+
+
+def train_incremental(delta, old_frame, pipeline, prev_meta):
+    """Grow the saved forest with trees fitted on `delta` plus a replay sample."""
+    frame = _merge_frames(old_frame, delta)
+    rf = pipeline.named_steps["rf"]
+
+    reason = None
+    if rf.n_estimators + ADD_TREES > MAX_TREES:
+        reason = f"forest would exceed {MAX_TREES} trees"
+    elif len(delta) > FULL_RETRAIN_DELTA * len(old_frame):
+        reason = f"delta is more than {FULL_RETRAIN_DELTA:.0%} of the frame"
+    if reason:
+        print(f"Full retrain: {reason}")
+        return train_and_save(frame)
+
+    test = split_mask(frame)
+    delta_train = delta[~split_mask(delta)]
+    old_train = frame[~test & ~frame["id"].isin(delta["id"])]
+    n_replay = min(len(old_train), REPLAY_ROWS, int(REPLAY_RATIO * len(delta_train)))
+    replay = old_train.sample(n_replay, random_state=RANDOM_STATE)
+    fit_rows = pd.concat([delta_train, replay], ignore_index=True)
+
+    # keep the fitted preprocessing: new trees must split on the same columns
+    Xt = pipeline.named_steps["pre"].transform(fit_rows[NUM_FEATURES + CAT_FEATURES])
+    rf.set_params(warm_start=True, n_estimators=rf.n_estimators + ADD_TREES)
+    print(f"Adding {ADD_TREES} trees on {len(delta_train)} new + {len(replay)} replayed rows...")
+    rf.fit(Xt, fit_rows[TARGET].astype(float))
+    rf.set_params(warm_start=False)
+
+    print("Predicting on test set...")
+    scores = evaluate(pipeline, frame[test])
 
-    # Save metadata
     meta = {
         "created_at": datetime.utcnow().isoformat() + "Z",
-        "rows_total": len(df),
-        "rows_train": int(len(X_train)),
-        "rows_test": int(len(X_test)),
-        "mae": float(mae),
-        "rmse": float(rmse),
-        "r2": float(r2),
+        "mode": "incremental",
+        "rows_total": len(frame),
+        "rows_train": int((~test).sum()),
+        "rows_test": int(test.sum()),
+        "rows_delta": int(len(delta)),
+        "rows_fit": int(len(fit_rows)),
+        "previous_watermark": prev_meta.get("data_watermark"),
+        **scores,
         "target": TARGET,
         "features": NUM_FEATURES + CAT_FEATURES,
         "sklearn_version": None,
     }
-    try:
-        import sklearn
-        meta["sklearn_version"] = sklearn.__version__
-    except Exception:
-        pass
+    save(pipeline, meta, frame)
+    return pipeline, meta
 
-    with open(META_PATH, "w", encoding="utf-8") as f:
-        json.dump(meta, f, indent=2)
-    print("Saved metadata to", META_PATH)
 
-    return pipeline, meta
+def tune_models(df, families=None, folds=None, n_jobs=None):
+    """Cross-validated benchmark of the tune.SEARCH_SPACE candidates; writes TUNE_PATH."""
+    from neuraestate.ml import tune
+
+    if len(df) < MIN_ROWS:
+        raise RuntimeError(f"Not enough rows to tune (found {len(df)}). Need >= {MIN_ROWS}")
+    # same features as the served model, transformed once for all candidates and folds
+    X = build_pipeline().named_steps["pre"].fit_transform(df[NUM_FEATURES + CAT_FEATURES])
+    y = df[TARGET].astype(float).to_numpy()
+    n_cands = len(tune.candidates(families))
+    folds = folds or tune.TUNE_FOLDS
+    print(f"Tuning {n_cands} candidates x {folds} folds on {min(len(df), tune.TUNE_MAX_ROWS)} rows...")
+    board = tune.run_search(X, y, families=families, folds=folds,
+                            n_jobs=tune.TUNE_N_JOBS if n_jobs is None else n_jobs, verbose=5)
+    choice = tune.pick(board)
+
+    print(tune.format_leaderboard(board))
+    print(f"Fastest within {tune.TUNE_TOLERANCE:.0%} of the best RMSE: #{choice['rank']} "
+          f"{choice['family']} {choice['params']}")
+    result = {
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "rows": int(min(len(df), tune.TUNE_MAX_ROWS)),
+        "folds": folds,
+        "tolerance": tune.TUNE_TOLERANCE,
+        "recommended": choice,
+        "leaderboard": board,
+    }
+    with open(TUNE_PATH, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print("Saved leaderboard to", TUNE_PATH)
+    return result
+
+
+def load_previous():
+    """
+    (pipeline, frame, metadata) of the registry's current version, or None if
+    anything is missing. Reading CURRENT (not the fixed paths) means a
+    rollback with `registry.py --use` is what the next incremental run grows.
+    """
+    model_dir = registry.version_dir(base_dir=REGISTRY_DIR)
+    if model_dir is None or not (model_dir / registry.FRAME_FILE).exists():
+        return None
+    try:
+        meta = registry.read_metadata(base_dir=REGISTRY_DIR)
+        if not meta.get("data_watermark"):
+            return None
+        frame = pd.read_parquet(model_dir / registry.FRAME_FILE)
+        pipeline = joblib.load(model_dir / registry.MODEL_FILE)
+    except Exception as e:  # damaged artifacts: start over rather than fail the run
+        print(f"Previous run in {model_dir} is unreadable ({e}).")
+        return None
+    return pipeline, frame, meta
+
 
 # -----------------------
 # Main
 # -----------------------
-def main():
-    print("Loading data from DB...")
-    df = load_data()
-    print("Loaded rows:", len(df))
-
-    # quick data checks
-    print("Sample:")
-    print(df.head(3))
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the price model")
+    parser.add_argument("--from-snapshot", action="store_true",
+                        help="read the latest ods_listings Parquet snapshot instead of querying Postgres")
+    parser.add_argument("--snapshot-date", default=None, help="run_date of the snapshot to use (default: latest)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="fit only rows processed since the last run's data watermark")
+    parser.add_argument("--tune", action="store_true",
+                        help="cross-validate model families/hyperparameters and print a leaderboard; saves no model")
+    parser.add_argument("--tune-families", default=None, help="comma-separated subset of: rf, hgb, ridge_log")
+    parser.add_argument("--tune-folds", type=int, default=None, help="K for K-fold CV (default TUNE_FOLDS)")
+    parser.add_argument("--tune-jobs", type=int, default=None, help="parallel worker processes (default TUNE_N_JOBS)")
+    args = parser.parse_args(argv)
+
+    if args.tune:
+        df = load_data_from_snapshot(args.snapshot_date) if args.from_snapshot else load_data()
+        print("Loaded rows:", len(df))
+        families = args.tune_families.split(",") if args.tune_families else None
+        tune_models(df, families=families, folds=args.tune_folds, n_jobs=args.tune_jobs)
+        return
+
+    previous = load_previous() if args.incremental else None
+    if args.incremental and previous is None:
+        print("No previous model/frame/watermark found: doing a full train.")
+
+    if previous is not None:
+        pipeline, old_frame, prev_meta = previous
+        since = pd.Timestamp(prev_meta["data_watermark"])
+        print(f"Loading rows processed since {since.isoformat()}...")
+        if args.from_snapshot:
+            delta = load_data_from_snapshot(args.snapshot_date)
+            delta = delta[delta["processed_at"] >= since]
+        else:
+            delta = load_data(since=since.to_pydatetime())
+        delta = unseen_rows(delta, old_frame)
+        print("Loaded rows:", len(delta))
+        if delta.empty:
+            print("No new rows since the last run; model unchanged.")
+            return
+        pipeline, meta = train_incremental(delta, old_frame, pipeline, prev_meta)
+    else:
+        if args.from_snapshot:
+            print("Loading data from Parquet snapshot...")
+            df = load_data_from_snapshot(args.snapshot_date)
+        else:
+            print("Loading data from DB...")
+            df = load_data()
+        print("Loaded rows:", len(df))
+
+        # quick data checks
+        print("Sample:")
+        print(df.head(3))
+
+        pipeline, meta = train_and_save(df)
 
-    pipeline, meta = train_and_save(df)
     print("Training finished. Summary:")
     print(json.dumps(meta, indent=2))
 
@@ -0,0 +1,195 @@
+# src/neuraestate/ml/tune.py
+"""
+Hyperparameter search and cross-validation benchmark for the price model.
+
+    PYTHONPATH=src python src/neuraestate/ml/train_model.py --tune
+    PYTHONPATH=src python src/neuraestate/ml/train_model.py --tune --tune-families rf,hgb --tune-folds 3
+
+Every candidate in SEARCH_SPACE (random forest, histogram gradient
+boosting, ridge on log-price) is fitted on K folds. The feature matrix is
+preprocessed once by train_model's ColumnTransformer, dumped to disk and
+memory-mapped, so the loky worker processes all read the same pages
+instead of each receiving a pickled copy. One (candidate, fold) pair is
+one joblib task; models inside a task run single-threaded so TUNE_N_JOBS
+workers do not oversubscribe the CPUs.
+
+The leaderboard reports accuracy (RMSE/MAE/R2 on the price scale) next to
+fit time, batch and single-row predict latency and pickled size; pick()
+returns the fastest single-row candidate whose RMSE is within
+TUNE_TOLERANCE of the best.
+
+Preprocessing is fitted on all rows before the split, so the medians and
+scaler see the test folds; with three numeric features and a city
+one-hot this barely matters, and it is the same for every candidate.
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold, ParameterGrid
+
+# -----------------------
+# Config
+# -----------------------
+TUNE_FOLDS = int(os.getenv("TUNE_FOLDS", "5"))
+TUNE_N_JOBS = int(os.getenv("TUNE_N_JOBS", "-1"))
+TUNE_MAX_ROWS = int(os.getenv("TUNE_MAX_ROWS", "100000"))    # rows sampled for the search
+TUNE_TOLERANCE = float(os.getenv("TUNE_TOLERANCE", "0.02"))  # "good enough": RMSE within 2% of the best
+LATENCY_REPEATS = 20
+RANDOM_STATE = 42
+
+
+def _rf(**params):
+    return RandomForestRegressor(n_jobs=1, random_state=RANDOM_STATE, **params)
+
+
+def _hgb(**params):
+    # no early stopping: max_iter in the grid should mean what it says
+    return HistGradientBoostingRegressor(early_stopping=False, random_state=RANDOM_STATE, **params)
+
+
+def _ridge_log(**params):
+    # prices are right-skewed: fit on log1p(price), predict back on the price scale
+    return TransformedTargetRegressor(regressor=Ridge(**params), func=np.log1p, inverse_func=np.expm1)
+
+
+# family -> (factory, grid); kept small on purpose: 19 candidates
+SEARCH_SPACE: Dict[str, Tuple[Callable[..., Any], Dict[str, list]]] = {
+    "rf": (_rf, {"n_estimators": [100, 200], "min_samples_leaf": [1, 5], "max_features": [1.0, 0.5]}),
+    "hgb": (_hgb, {"learning_rate": [0.05, 0.1], "max_iter": [200, 500], "max_leaf_nodes": [31, 63]}),
+    "ridge_log": (_ridge_log, {"alpha": [0.1, 1.0, 10.0]}),
+}
+
+
+def candidates(families: Optional[Iterable[str]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    families = list(families) if families else list(SEARCH_SPACE)
+    unknown = set(families) - set(SEARCH_SPACE)
+    if unknown:
+        raise ValueError(f"Unknown model families: {sorted(unknown)}; choose from {sorted(SEARCH_SPACE)}")
+    return [(f, params) for f in families for params in ParameterGrid(SEARCH_SPACE[f][1])]
+
+
+def make_model(family: str, params: Dict[str, Any]):
+    return SEARCH_SPACE[family][0](**params)
+
+
+# -----------------------
+# One (candidate, fold) task
+# -----------------------
+def _fit_fold(family: str, params: Dict[str, Any], X: np.ndarray, y: np.ndarray,
+              train_idx: np.ndarray, test_idx: np.ndarray) -> Dict[str, Any]:
+    model = make_model(family, params)
+    t0 = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_s = time.perf_counter() - t0
+
+    X_test = np.asarray(X[test_idx])
+    t0 = time.perf_counter()
+    pred = model.predict(X_test)
+    batch_s = time.perf_counter() - t0
+
+    # what one /predict call costs
+    one = X_test[:1]
+    single = []
+    for _ in range(LATENCY_REPEATS):
+        t0 = time.perf_counter()
+        model.predict(one)
+        single.append(time.perf_counter() - t0)
+
+    y_test = y[test_idx]
+    return {
+        "family": family,
+        "params": params,
+        "rmse": float(np.sqrt(mean_squared_error(y_test, pred))),
+        "mae": float(mean_absolute_error(y_test, pred)),
+        "r2": float(r2_score(y_test, pred)),
+        "fit_s": fit_s,
+        "batch_us_per_row": batch_s / len(test_idx) * 1e6,
+        "single_row_ms": float(np.median(single)) * 1e3,
+        "size_mb": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) / 1e6,
+    }
+
+
+def _aggregate(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    by_candidate: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+    for r in results:
+        by_candidate[(r["family"], repr(sorted(r["params"].items())))].append(r)
+
+    board = []
+    for folds in by_candidate.values():
+        row = {"family": folds[0]["family"], "params": folds[0]["params"], "folds": len(folds)}
+        for k in ("rmse", "mae", "r2", "fit_s", "batch_us_per_row", "single_row_ms", "size_mb"):
+            row[k] = float(np.mean([f[k] for f in folds]))
+        row["rmse_std"] = float(np.std([f["rmse"] for f in folds]))
+        board.append(row)
+    board.sort(key=lambda r: r["rmse"])
+    for rank, row in enumerate(board, 1):
+        row["rank"] = rank
+    return board
+
+
+# -----------------------
+# Search
+# -----------------------
+def run_search(X: np.ndarray, y: np.ndarray, families: Optional[Iterable[str]] = None,
+               folds: int = TUNE_FOLDS, n_jobs: int = TUNE_N_JOBS, max_rows: int = TUNE_MAX_ROWS,
+               verbose: int = 0) -> List[Dict[str, Any]]:
+    """K-fold CV of every candidate in parallel; leaderboard rows sorted by mean RMSE."""
+    cands = candidates(families)
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if max_rows and len(y) > max_rows:
+        keep = np.sort(np.random.default_rng(RANDOM_STATE).choice(len(y), max_rows, replace=False))
+        X, y = X[keep], y[keep]
+    splits = list(KFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE).split(X))
+
+    tmp = tempfile.mkdtemp(prefix="neuraestate-tune-")
+    try:
+        # workers get the memmap by reference (file name + offset), not a copy of the data
+        joblib.dump(X, os.path.join(tmp, "X.joblib"))
+        joblib.dump(y, os.path.join(tmp, "y.joblib"))
+        X_mm = joblib.load(os.path.join(tmp, "X.joblib"), mmap_mode="r")
+        y_mm = joblib.load(os.path.join(tmp, "y.joblib"), mmap_mode="r")
+
+        results = Parallel(n_jobs=n_jobs, backend="loky", verbose=verbose)(
+            delayed(_fit_fold)(family, params, X_mm, y_mm, train_idx, test_idx)
+            for family, params in cands
+            for train_idx, test_idx in splits
+        )
+        del X_mm, y_mm
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return _aggregate(results)
+
+
+def pick(board: List[Dict[str, Any]], tolerance: float = TUNE_TOLERANCE) -> Dict[str, Any]:
+    """Fastest single-row candidate whose RMSE is within `tolerance` of the best."""
+    best = min(r["rmse"] for r in board)
+    good = [r for r in board if r["rmse"] <= best * (1 + tolerance)]
+    return min(good, key=lambda r: (r["single_row_ms"], r["rmse"]))
+
+
+def format_leaderboard(board: List[Dict[str, Any]]) -> str:
+    header = (f"{'#':>3}  {'model':<58} {'rmse':>12} {'r2':>7} {'fit s':>7} "
+              f"{'us/row':>8} {'1-row ms':>9} {'MB':>8}")
+    lines = [header, "-" * len(header)]
+    for r in board:
+        params = ",".join(f"{k}={v}" for k, v in sorted(r["params"].items()))
+        lines.append(
+            f"{r['rank']:>3}  {(r['family'] + ' ' + params)[:58]:<58} {r['rmse']:>12,.0f} {r['r2']:>7.4f} "
+            f"{r['fit_s']:>7.2f} {r['batch_us_per_row']:>8.2f} {r['single_row_ms']:>9.2f} {r['size_mb']:>8.2f}"
+        )
+    return "\n".join(lines)
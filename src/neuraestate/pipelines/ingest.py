@@ -12,15 +12,16 @@ logger = logging.getLogger("neuraestate")
 
 async def main() -> None:
     scraper = DemoSiteScraper()
-    items = await scraper.run()
+    count = 0
 
     with get_session() as session:
         repo = ListingRepository(session)
-        for dto in items:
+        async for dto in scraper.run():
             repo.upsert_listing(dto)
+            count += 1
         session.commit()
 
-    logger.info(f"✅ Upserted {len(items)} listings.")
+    logger.info(f"✅ Upserted {count} listings.")
 
 
 if __name__ == "__main__":
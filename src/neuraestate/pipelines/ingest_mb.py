@@ -1,6 +1,9 @@
 from __future__ import annotations
 import logging
-from contextlib import contextmanager
+import os
+import time
+from dataclasses import dataclass, field
+from typing import List
 
 from neuraestate.scrapers.mb_scraper import iter_mb_listings, MB_SOURCE
 from neuraestate.schemas import ListingIn
@@ -13,59 +16,77 @@ from neuraestate.db.base import SessionLocal
 
 logger = logging.getLogger(__name__)
 
-@contextmanager
-def session_scope():
-    """Provide a transactional scope around a series of operations."""
-    session = SessionLocal()
+# listings per upsert_many call / commit
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))
+# crawling is slow (robots + rate limits), so also commit a partial batch this often
+INGEST_COMMIT_SECONDS = float(os.getenv("INGEST_COMMIT_SECONDS", "30"))
+
+
+@dataclass
+class IngestStats:
+    parsed: int = 0    # DTOs produced from cards
+    saved: int = 0     # rows upserted and committed
+    skipped: int = 0   # cards without a usable title/URL, or duplicates within a batch
+    failed: int = 0    # rows in batches that were rolled back
+    batches: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> dict:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "source": MB_SOURCE,
+            "parsed": self.parsed,
+            "saved": self.saved,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "elapsed_s": round(elapsed, 1),
+            "parsed_per_s": round(self.parsed / elapsed, 2),
+            "saved_per_s": round(self.saved / elapsed, 2),
+        }
+
+
+def _flush(session, repo: ListingRepository, batch: List[ListingIn], stats: IngestStats) -> None:
     try:
-        yield session
+        ids = repo.upsert_many(batch)
         session.commit()
-    except Exception:
+    except Exception as e:
         session.rollback()
-        raise
-    finally:
-        session.close()
-
-def _save_with_best_effort(repo: ListingRepository, listing: ListingIn) -> bool:
-    # Duplicate safety (if repo exposes it)
-    if hasattr(repo, "exists_by_url"):
-        try:
-            if repo.exists_by_url(listing.url):
-                logger.info("Skip duplicate: %s", listing.url)
-                return False
-        except Exception:
-            pass
+        stats.failed += len(batch)
+        logger.exception("Batch of %d listings failed: %s", len(batch), e)
+        return
+    stats.batches += 1
+    stats.saved += len(ids)
+    stats.skipped += len(batch) - len(ids)
+    logger.info("Committed batch of %d. %s", len(ids), stats.as_dict())
 
-    if hasattr(repo, "upsert_by_url"):
-        try:
-            repo.upsert_by_url(listing)
-            return True
-        except Exception as e:
-            logger.debug("upsert_by_url failed: %s", e)
 
-    if hasattr(repo, "create"):
-        try:
-            repo.create(listing)
-            return True
-        except Exception as e:
-            logger.info("create failed: %s", e)
-
-    logger.error("No usable save method on ListingRepository")
-    return False
-
-def ingest_magicbricks(url_limit: int = 50):
+def ingest_magicbricks(url_limit: int = 50, batch_size: int = INGEST_BATCH_SIZE,
+                       commit_seconds: float = INGEST_COMMIT_SECONDS) -> dict:
     fetcher = SafeFetcher(default_rps=0.5)
-    parsed = saved = 0
+    stats = IngestStats()
 
-    with session_scope() as session:
-        repo = ListingRepository(session=session)
+    def _skip(card: dict) -> None:
+        stats.skipped += 1
 
-        for li in iter_mb_listings(fetcher, url_limit_from_sitemaps=url_limit):
-            parsed += 1
-            if _save_with_best_effort(repo, li):
-                saved += 1
+    session = SessionLocal()
+    try:
+        repo = ListingRepository(session=session)
+        batch: List[ListingIn] = []
+        last_commit = time.monotonic()
+        for li in iter_mb_listings(fetcher, url_limit_from_sitemaps=url_limit, on_skip=_skip):
+            stats.parsed += 1
+            batch.append(li)
+            if len(batch) >= batch_size or time.monotonic() - last_commit >= commit_seconds:
+                _flush(session, repo, batch, stats)
+                batch = []
+                last_commit = time.monotonic()
+        if batch:
+            _flush(session, repo, batch, stats)
+    finally:
+        session.close()
 
-    summary = {"source": MB_SOURCE, "parsed": parsed, "saved": saved}
+    summary = stats.as_dict()
     logger.info("Ingest summary: %s", summary)
     return summary
 
@@ -73,7 +94,3 @@ if __name__ == "__main__":
     setup_logging()
     logging.getLogger(__name__).info("Starting MagicBricks ingest…")
     ingest_magicbricks(20)
-
-
-
-
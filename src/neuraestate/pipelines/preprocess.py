@@ -3,7 +3,10 @@
 NeuraEstate - preprocessing pipeline with ETL run logging and staging marking.
 
 Usage:
-    python src/neuraestate/pipelines/preprocess.py
+    PYTHONPATH=src python src/neuraestate/pipelines/preprocess.py
+
+With ODS_SNAPSHOT=1 a Parquet snapshot of ods_listings is written after the
+run (see pipelines/snapshot.py).
 
 Dependencies:
     pip install pandas sqlalchemy psycopg2-binary python-dotenv tqdm
@@ -19,11 +22,11 @@ import numpy as np
 from dotenv import load_dotenv
 from tqdm import tqdm
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine.url import make_url
+from sqlalchemy import column, table, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Engine
 
-import psycopg2
-from psycopg2.extras import execute_values
+from neuraestate.db.engine import get_engine
 
 # -------------------------
 # CONFIG
@@ -31,6 +34,8 @@ from psycopg2.extras import execute_values
 load_dotenv()  # loads .env from repo root
 DATABASE_URL = os.getenv("DATABASE_URL")
 BATCH_SIZE = int(os.getenv("PREPROCESS_BATCH_SIZE", "1000"))
+# write a Parquet snapshot of ods_listings for analytics/training after each run
+SNAPSHOT_AFTER_ETL = os.getenv("ODS_SNAPSHOT", "0") == "1"
 
 # sanity thresholds (tweak if needed)
 MIN_AREA_SQFT = float(os.getenv("MIN_AREA_SQFT", "50"))
@@ -102,7 +107,7 @@ def compute_price_per_bhk(price_inr, bhk) -> Optional[float]:
 def create_ods_table_if_not_exists(engine):
     """
     Create ods_listings using engine.begin() so it is committed and visible
-    to other DB connections (psycopg2) immediately.
+    to other DB connections immediately.
     """
     ddl = """
     CREATE TABLE IF NOT EXISTS ods_listings (
@@ -128,8 +133,11 @@ def create_ods_table_if_not_exists(engine):
         raw_json JSONB
     );
     """
+    # /admin/stats range-counts and the /listings recency sort use processed_at
+    index_ddl = "CREATE INDEX IF NOT EXISTS ix_ods_listings_processed_at ON ods_listings (processed_at);"
     with engine.begin() as conn:
         conn.execute(text(ddl))
+        conn.execute(text(index_ddl))
 
 
 def create_etl_runs_table_if_not_exists(engine):
@@ -147,9 +155,9 @@ def create_etl_runs_table_if_not_exists(engine):
         conn.execute(text(ddl))
 
 
-def upsert_df_to_postgres(df: pd.DataFrame, database_url: str, table_name: str = "ods_listings", batch_size: int = 500):
+def upsert_df_to_postgres(df: pd.DataFrame, engine: Engine, table_name: str = "ods_listings", batch_size: int = 500):
     """
-    Upsert DataFrame into Postgres using a real psycopg2 connection and execute_values.
+    Upsert DataFrame into Postgres with one multi-row INSERT .. ON CONFLICT per batch.
     Converts numpy/pandas types to native Python types before insert.
     """
     if df.empty:
@@ -159,32 +167,17 @@ def upsert_df_to_postgres(df: pd.DataFrame, database_url: str, table_name: str =
     # Replace NaNs with None
     df = df.where(pd.notnull(df), None)
 
-    # Parse DB URL
-    url = make_url(database_url)
-    conn_kwargs = {
-        "dbname": url.database,
-        "user": url.username,
-        "password": url.password,
-        "host": url.host or "localhost",
-        "port": url.port or 5432,
-    }
-
     cols = list(df.columns)
-    col_names = ", ".join(cols)
+    target = table(table_name, *[column(c) for c in cols])
     update_cols = [c for c in cols if c != "source_id"]
-    update_sql = ", ".join([f"{c} = EXCLUDED.{c}" for c in update_cols])
-
-    insert_sql = f"""
-    INSERT INTO {table_name} ({col_names})
-    VALUES %s
-    ON CONFLICT (source_id) DO UPDATE
-    SET {update_sql};
-    """
 
-    # Convert each value to a native Python type acceptable to psycopg2
+    # Convert each value to a native Python type acceptable to the DB driver
     def _convert_value(v):
         if v is None:
             return None
+        # float columns keep NaN through df.where(..., None)
+        if isinstance(v, (float, np.floating)) and np.isnan(v):
+            return None
         # numpy scalar
         if isinstance(v, np.generic):
             if np.issubdtype(type(v), np.integer):
@@ -208,108 +201,67 @@ def upsert_df_to_postgres(df: pd.DataFrame, database_url: str, table_name: str =
             return v
         return v
 
-    # Build values list of tuples
+    # Build list of row dicts
     records = df.to_records(index=False)
-    values = []
-    for rec in records:
-        row = tuple(_convert_value(v) for v in rec)
-        values.append(row)
+    values = [{c: _convert_value(v) for c, v in zip(cols, rec)} for rec in records]
 
-    # Upsert via psycopg2
-    pg_conn = None
     try:
-        pg_conn = psycopg2.connect(**conn_kwargs)
-        with pg_conn.cursor() as cur:
+        with engine.begin() as conn:
             for i in range(0, len(values), batch_size):
-                batch = values[i : i + batch_size]
-                execute_values(cur, insert_sql, batch, page_size=batch_size)
-        pg_conn.commit()
+                stmt = pg_insert(target).values(values[i : i + batch_size])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["source_id"],
+                    set_={c: stmt.excluded[c] for c in update_cols},
+                )
+                conn.execute(stmt)
     except Exception as e:
-        if pg_conn:
-            pg_conn.rollback()
         print("ERROR during upsert:", e)
         raise
-    finally:
-        if pg_conn:
-            pg_conn.close()
 
 
 # -------------------------
 # Mark staging rows & ETL logging
 # -------------------------
-def mark_staging_processed_for_source_ids(database_url: str, source_ids: List[str]):
+def mark_staging_processed_for_source_ids(engine: Engine, source_ids: List[str]):
     """
     Mark rows in stg_mb_listings as processed by setting processed_at to the value in ods_listings.
-    Uses psycopg2 to run a parameterized query with array of source_ids.
+    Runs one parameterized query with the array of source_ids.
     """
     if not source_ids:
         return
 
-    url = make_url(database_url)
-    conn_kwargs = {
-        "dbname": url.database,
-        "user": url.username,
-        "password": url.password,
-        "host": url.host or "localhost",
-        "port": url.port or 5432,
-    }
-
-    sql = """
+    sql = text("""
     UPDATE stg_mb_listings s
     SET processed_at = o.processed_at
     FROM ods_listings o
     WHERE s.pk::text = o.source_id
-      AND s.pk::text = ANY(%s)
-    """
+      AND s.pk::text = ANY(:source_ids)
+    """)
 
-    pg_conn = None
     try:
-        pg_conn = psycopg2.connect(**conn_kwargs)
-        with pg_conn.cursor() as cur:
-            cur.execute(sql, (source_ids,))
-        pg_conn.commit()
+        with engine.begin() as conn:
+            conn.execute(sql, {"source_ids": source_ids})
     except Exception as e:
-        if pg_conn:
-            pg_conn.rollback()
         print("ERROR marking staging processed:", e)
         raise
-    finally:
-        if pg_conn:
-            pg_conn.close()
 
 
-def insert_etl_run(database_url: str, start_ts: datetime, end_ts: datetime, rows_in: int, rows_out: int, notes: Optional[str] = None):
+def insert_etl_run(engine: Engine, start_ts: datetime, end_ts: datetime, rows_in: int, rows_out: int, notes: Optional[str] = None):
     """
-    Insert a row into etl_runs table (uses psycopg2).
+    Insert a row into etl_runs table.
     """
-    url = make_url(database_url)
-    conn_kwargs = {
-        "dbname": url.database,
-        "user": url.username,
-        "password": url.password,
-        "host": url.host or "localhost",
-        "port": url.port or 5432,
-    }
-
-    sql = """
+    sql = text("""
     INSERT INTO etl_runs (start_ts, end_ts, rows_in, rows_out, notes)
-    VALUES (%s, %s, %s, %s, %s)
-    """
+    VALUES (:start_ts, :end_ts, :rows_in, :rows_out, :notes)
+    """)
 
-    pg_conn = None
     try:
-        pg_conn = psycopg2.connect(**conn_kwargs)
-        with pg_conn.cursor() as cur:
-            cur.execute(sql, (start_ts, end_ts, rows_in, rows_out, notes))
-        pg_conn.commit()
+        with engine.begin() as conn:
+            conn.execute(sql, {"start_ts": start_ts, "end_ts": end_ts, "rows_in": rows_in,
+                               "rows_out": rows_out, "notes": notes})
     except Exception as e:
-        if pg_conn:
-            pg_conn.rollback()
         print("ERROR inserting etl_runs:", e)
         raise
-    finally:
-        if pg_conn:
-            pg_conn.close()
 
 
 # -------------------------
@@ -432,9 +384,10 @@ def main():
     start_ts = datetime.now(timezone.utc)
     print("Starting NeuraEstate preprocess pipeline...", start_ts.isoformat())
 
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    # batch job: one connection is all it needs
+    engine = get_engine("etl", DATABASE_URL, pool_size=1, max_overflow=1)
 
-    # Create ods_listings and etl_runs tables (committed so psycopg2 sees them)
+    # Create ods_listings and etl_runs tables (committed so later connections see them)
     create_ods_table_if_not_exists(engine)
     create_etl_runs_table_if_not_exists(engine)
     print("Ensured ods_listings and etl_runs tables exist.")
@@ -449,7 +402,7 @@ def main():
     if total == 0:
         print("No rows in staging; exiting.")
         end_ts = datetime.now(timezone.utc)
-        insert_etl_run(DATABASE_URL, start_ts, end_ts, 0, 0, "no rows")
+        insert_etl_run(engine, start_ts, end_ts, 0, 0, "no rows")
         return
 
     # We'll track source_ids from the staging snapshot (so we mark only these rows processed)
@@ -463,7 +416,7 @@ def main():
         batch = df_raw.iloc[start:end]
         cleaned = df_clean_steps(batch)
         if not cleaned.empty:
-            upsert_df_to_postgres(cleaned, DATABASE_URL, table_name="ods_listings", batch_size=500)
+            upsert_df_to_postgres(cleaned, engine, table_name="ods_listings", batch_size=500)
         pbar.update(len(batch))
         start = end
     pbar.close()
@@ -472,46 +425,40 @@ def main():
     end_ts = datetime.now(timezone.utc)
 
     # compute rows_out: how many of the staging source_ids have a matching ods record
-    url = make_url(DATABASE_URL)
-    conn_kwargs = {
-        "dbname": url.database,
-        "user": url.username,
-        "password": url.password,
-        "host": url.host or "localhost",
-        "port": url.port or 5432,
-    }
-    rows_out = 0
-    try:
-        pg_conn = psycopg2.connect(**conn_kwargs)
-        with pg_conn.cursor() as cur:
-            # count how many staging pk values now exist in ods_listings
-            cur.execute(
-                """
-                SELECT COUNT(*) FROM stg_mb_listings s
-                JOIN ods_listings o ON s.pk::text = o.source_id
-                WHERE s.pk::text = ANY(%s)
-                """,
-                (source_ids_all,),
-            )
-            rows_out = cur.fetchone()[0]
-    finally:
-        if pg_conn:
-            pg_conn.close()
+    with engine.connect() as conn:
+        # count how many staging pk values now exist in ods_listings
+        rows_out = conn.execute(
+            text("""
+            SELECT COUNT(*) FROM stg_mb_listings s
+            JOIN ods_listings o ON s.pk::text = o.source_id
+            WHERE s.pk::text = ANY(:source_ids)
+            """),
+            {"source_ids": source_ids_all},
+        ).scalar_one()
 
     # mark corresponding staging rows processed
     try:
-        mark_staging_processed_for_source_ids(DATABASE_URL, source_ids_all)
+        mark_staging_processed_for_source_ids(engine, source_ids_all)
     except Exception as e:
         print("Warning: failed to mark staging rows processed:", e)
 
     # insert ETL run record
     notes = f"Processed snapshot of {len(source_ids_all)} staging rows"
     try:
-        insert_etl_run(DATABASE_URL, start_ts, end_ts, len(source_ids_all), rows_out, notes)
+        insert_etl_run(engine, start_ts, end_ts, len(source_ids_all), rows_out, notes)
         print(f"Inserted etl_runs entry: rows_in={len(source_ids_all)} rows_out={rows_out}")
     except Exception as e:
         print("Warning: failed to insert etl_runs record:", e)
 
+    if SNAPSHOT_AFTER_ETL:
+        try:
+            from neuraestate.pipelines.snapshot import write_ods_snapshot
+
+            manifest = write_ods_snapshot(engine, run_date=start_ts.date())
+            print(f"Wrote ods_listings snapshot: {manifest}")
+        except Exception as e:
+            print("Warning: failed to write ods_listings snapshot:", e)
+
     print("Preprocess finished. Cleaned data upserted to ods_listings.")
 
 
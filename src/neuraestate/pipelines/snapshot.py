@@ -0,0 +1,168 @@
+# src/neuraestate/pipelines/snapshot.py
+"""
+Columnar Parquet snapshot of ods_listings for analytics and training.
+
+Layout (hive partitioning, one directory per ETL run date and city):
+
+    <ODS_SNAPSHOT_DIR>/run_date=2025-01-31/city=Pune/part-0.parquet
+    <ODS_SNAPSHOT_DIR>/run_date=2025-01-31/_manifest.json
+
+Files are zstd-compressed with dictionary encoding and column statistics,
+so readers can prune by partition and by row-group min/max. A run date
+only counts as complete once its _manifest.json exists; a failed write
+never becomes "latest".
+
+Write (preprocess.py does this after each run when ODS_SNAPSHOT=1):
+    PYTHONPATH=src python src/neuraestate/pipelines/snapshot.py
+
+Read:
+    from neuraestate.pipelines.snapshot import load_snapshot
+    df = load_snapshot(["price_inr", "area_sqft", "city"], filters=[("city", "in", ["Pune", "Mumbai"])])
+"""
+
+import json
+import os
+import shutil
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# -------------------------
+# CONFIG
+# -------------------------
+SNAPSHOT_DIR = os.getenv("ODS_SNAPSHOT_DIR", "data/snapshots/ods_listings")
+SNAPSHOT_CHUNK_ROWS = int(os.getenv("ODS_SNAPSHOT_CHUNK_ROWS", "50000"))
+MANIFEST = "_manifest.json"
+
+# raw_json and card_text stay in Postgres: large and not used downstream
+SNAPSHOT_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("source_id", pa.string()),
+    ("source", pa.string()),
+    ("source_page_url", pa.string()),
+    ("title", pa.string()),
+    ("price_inr", pa.int64()),
+    ("bhk", pa.int32()),
+    ("bathrooms", pa.float32()),
+    ("area_sqft", pa.float32()),
+    ("city", pa.string()),
+    ("image_url", pa.string()),
+    ("first_seen_at", pa.timestamp("us")),
+    ("last_seen_at", pa.timestamp("us")),
+    ("price_per_sqft", pa.float32()),
+    ("price_per_bhk", pa.float32()),
+    ("processed_at", pa.timestamp("us")),
+])
+PARTITION_SCHEMA = pa.schema([("run_date", pa.string()), ("city", pa.string())])
+
+Filters = List[Tuple[str, str, object]]
+
+
+# -------------------------
+# WRITE
+# -------------------------
+def _batches(engine: Engine, run_date: str, chunk_rows: int):
+    cols = ", ".join(f.name for f in SNAPSHOT_SCHEMA)
+    out_schema = SNAPSHOT_SCHEMA.append(pa.field("run_date", pa.string()))
+    with engine.connect() as conn:
+        # server-side cursor: never more than chunk_rows rows in memory
+        result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(
+            text(f"SELECT {cols} FROM ods_listings ORDER BY city, id")
+        )
+        for rows in result.partitions():
+            columns = list(zip(*rows))
+            arrays = [pa.array(c, f.type) for c, f in zip(columns, SNAPSHOT_SCHEMA)]
+            arrays.append(pa.array([run_date] * len(rows), pa.string()))
+            yield pa.RecordBatch.from_arrays(arrays, schema=out_schema)
+
+
+def write_ods_snapshot(engine: Engine, base_dir: Union[str, Path] = SNAPSHOT_DIR,
+                       run_date: Optional[date] = None, chunk_rows: int = SNAPSHOT_CHUNK_ROWS) -> dict:
+    """Write ods_listings under run_date=<run_date>/city=<city>/ (replacing that run date)."""
+    run_date = (run_date or datetime.now(timezone.utc).date()).isoformat()
+    base_dir = Path(base_dir)
+    run_dir = base_dir / f"run_date={run_date}"
+    if run_dir.exists():
+        shutil.rmtree(run_dir)  # re-run on the same day replaces the snapshot
+
+    written: List[str] = []
+    ds.write_dataset(
+        _batches(engine, run_date, chunk_rows),
+        base_dir,
+        schema=SNAPSHOT_SCHEMA.append(pa.field("run_date", pa.string())),
+        format="parquet",
+        partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_options=ds.ParquetFileFormat().make_write_options(
+            compression="zstd", use_dictionary=True, write_statistics=True
+        ),
+        max_rows_per_group=chunk_rows,
+        file_visitor=lambda f: written.append(f.path),
+    )
+
+    rows = sum(pq.ParquetFile(p).metadata.num_rows for p in written)
+    manifest = {
+        "run_date": run_date,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "rows": rows,
+        "files": len(written),
+        "bytes": sum(os.path.getsize(p) for p in written),
+    }
+    run_dir.mkdir(parents=True, exist_ok=True)
+    with open(run_dir / MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# -------------------------
+# READ
+# -------------------------
+def list_run_dates(base_dir: Union[str, Path] = SNAPSHOT_DIR) -> List[str]:
+    """Complete snapshots (with a manifest), oldest first."""
+    base_dir = Path(base_dir)
+    if not base_dir.is_dir():
+        return []
+    return sorted(p.name.split("=", 1)[1] for p in base_dir.glob("run_date=*") if (p / MANIFEST).exists())
+
+
+def load_snapshot(columns: Optional[List[str]] = None, filters: Optional[Filters] = None,
+                  run_date: Optional[str] = None, base_dir: Union[str, Path] = SNAPSHOT_DIR) -> pd.DataFrame:
+    """
+    Read one snapshot (latest complete one by default) into pandas.
+    Only `columns` are read; `filters` on city prune whole directories and
+    filters on other columns skip row groups via their statistics.
+    """
+    dates = list_run_dates(base_dir)
+    if run_date is None:
+        if not dates:
+            raise FileNotFoundError(f"No complete ods_listings snapshot under {base_dir}")
+        run_date = dates[-1]
+    elif run_date not in dates:
+        raise FileNotFoundError(f"No complete snapshot for run_date={run_date} under {base_dir}")
+
+    table = pq.read_table(
+        Path(base_dir) / f"run_date={run_date}",
+        columns=columns,
+        filters=filters,
+        partitioning=ds.partitioning(pa.schema([("city", pa.string())]), flavor="hive"),
+        memory_map=True,
+    )
+    return table.to_pandas()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    from neuraestate.db.engine import get_engine
+
+    load_dotenv()
+    engine = get_engine("etl", os.getenv("DATABASE_URL"), pool_size=1, max_overflow=0)
+    print(json.dumps(write_ods_snapshot(engine), indent=2))
@@ -1,15 +1,30 @@
 from abc import ABC, abstractmethod
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator
 import httpx
 from tenacity import retry, wait_fixed, stop_after_attempt
 from neuraestate.schemas import ListingIn
 from neuraestate.logging_setup import setup_logging
+from neuraestate.scrapers.pipeline import PARSE_WORKERS
 import logging
 
 setup_logging()
 logger = logging.getLogger("neuraestate")
 
 
+_DONE = object()
+
+
 class Scraper(ABC):
+    # max seed URLs in flight at once (fetch + parse)
+    concurrency: int = int(os.getenv("SCRAPER_CONCURRENCY", "4"))
+    # parse_listing runs in this many worker processes so BeautifulSoup
+    # doesn't block the event loop; 0 falls back to the loop's thread pool.
+    # Subclasses must stay picklable for the process pool.
+    parse_workers: int = PARSE_WORKERS
+
     @abstractmethod
     def seed_urls(self) -> list[str]:
         ...
@@ -24,15 +39,63 @@ class Scraper(ABC):
         r.raise_for_status()
         return r.text
 
-    async def run(self) -> list[ListingIn]:
-        results: list[ListingIn] = []
-        async with httpx.AsyncClient() as client:
-            for url in self.seed_urls():
+    async def _scrape_one(self, client: httpx.AsyncClient, url: str,
+                          pool: Executor | None) -> ListingIn | None:
+        try:
+            html = await self.fetch(client, url)
+            return await asyncio.get_running_loop().run_in_executor(pool, self.parse_listing, html, url)
+        except Exception as e:
+            logger.warning(f"Failed {url}: {e}")
+            return None
+
+    async def run(self, executor: Executor | None = None) -> AsyncIterator[ListingIn]:
+        """
+        Fetch and parse seed URLs with at most `concurrency` in flight and
+        yield listings as they complete (completion order, not seed order).
+        A slot is only freed once its listing has been taken by the consumer,
+        so a slow consumer throttles fetching instead of piling up results.
+
+        Parsing runs on `executor` if given (left running, so callers can
+        reuse one pool across runs); otherwise on a process pool of at most
+        min(parse_workers, len(seed URLs)) started for this run.
+        """
+        urls = list(self.seed_urls())
+        limit = max(1, self.concurrency)
+        sem = asyncio.Semaphore(limit)
+        out: asyncio.Queue = asyncio.Queue()
+        workers = min(self.parse_workers, len(urls))
+        own_pool = executor is None and workers > 0
+        pool = ProcessPoolExecutor(max_workers=workers) if own_pool else executor
+
+        async def worker(client: httpx.AsyncClient, url: str) -> None:
+            dto = await self._scrape_one(client, url, pool)
+            if dto:
+                out.put_nowait(dto)  # slot is released by the consumer
+            else:
+                sem.release()
+
+        async def produce(client: httpx.AsyncClient) -> None:
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    for url in urls:
+                        await sem.acquire()
+                        tg.create_task(worker(client, url))
+            finally:
+                out.put_nowait(_DONE)
+
+        limits = httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
+        try:
+            async with httpx.AsyncClient(limits=limits) as client:
+                producer = asyncio.create_task(produce(client))
                 try:
-                    html = await self.fetch(client, url)
-                    dto = self.parse_listing(html, url)
-                    if dto:
-                        results.append(dto)
-                except Exception as e:
-                    logger.warning(f"Failed {url}: {e}")
-        return results
+                    while (item := await out.get()) is not _DONE:
+                        sem.release()
+                        yield item
+                    await producer
+                finally:
+                    if not producer.done():
+                        producer.cancel()
+                        await asyncio.gather(producer, return_exceptions=True)
+        finally:
+            if own_pool:
+                pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,238 @@
+# src/neuraestate/scrapers/crawl_queue.py
+"""
+Postgres-backed crawl work queue, so several mb_scraper workers can share
+one crawl:
+
+    python -m neuraestate.scrapers.mb_scraper --enqueue   # sitemap stage fills crawl_jobs
+    python -m neuraestate.scrapers.mb_scraper --worker    # run in as many containers as needed
+
+Workers claim index URLs with SELECT ... FOR UPDATE SKIP LOCKED under a
+lease. A worker that dies simply lets its lease expire and the job goes
+back to the pool, resuming from the last page it flushed; after
+CRAWL_MAX_ATTEMPTS expired leases it is marked 'failed' and logged instead
+of being retried forever. Per-host
+politeness is global: every request reserves the next slot in
+crawl_host_slots, so N workers together keep the single-crawler pace.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from neuraestate.scrapers.pipeline import CrawlProgress
+
+logger = logging.getLogger("neuraestate")
+
+CRAWL_LEASE_SECONDS = float(os.getenv("CRAWL_LEASE_SECONDS", "600"))
+CRAWL_MAX_ATTEMPTS = int(os.getenv("CRAWL_MAX_ATTEMPTS", "5"))
+
+DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS crawl_jobs (
+        id BIGSERIAL PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        status TEXT NOT NULL DEFAULT 'pending',   -- pending | leased | done | failed
+        next_page INTEGER NOT NULL DEFAULT 1,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        lease_owner TEXT,
+        lease_expires_at TIMESTAMPTZ,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_crawl_jobs_claim ON crawl_jobs (status, lease_expires_at)",
+    """
+    CREATE TABLE IF NOT EXISTS crawl_host_slots (
+        host TEXT PRIMARY KEY,
+        next_slot_at TIMESTAMPTZ NOT NULL
+    )
+    """,
+]
+
+CLAIM_SQL = text("""
+    UPDATE crawl_jobs j
+    SET status = 'leased',
+        lease_owner = :worker,
+        lease_expires_at = now() + make_interval(secs => :lease),
+        attempts = j.attempts + 1,
+        updated_at = now()
+    WHERE j.id = (
+        SELECT id FROM crawl_jobs
+        WHERE (status = 'pending' OR (status = 'leased' AND lease_expires_at < now()))
+          AND attempts < :max_attempts
+        ORDER BY id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING j.url, j.next_page
+""")
+
+# Jobs whose last allowed lease expired: terminal, so the crawl does not look complete without them.
+FAIL_EXHAUSTED_SQL = text("""
+    UPDATE crawl_jobs
+    SET status = 'failed', lease_owner = NULL, lease_expires_at = NULL, updated_at = now()
+    WHERE (status = 'pending' OR (status = 'leased' AND lease_expires_at < now()))
+      AND attempts >= :max_attempts
+    RETURNING url, attempts
+""")
+
+# Reserve the next request slot for a host; returns seconds to wait for it.
+RESERVE_SLOT_SQL = text("""
+    INSERT INTO crawl_host_slots AS s (host, next_slot_at)
+    VALUES (:host, clock_timestamp() + make_interval(secs => :interval))
+    ON CONFLICT (host) DO UPDATE
+    SET next_slot_at = GREATEST(s.next_slot_at, clock_timestamp()) + make_interval(secs => :interval)
+    RETURNING EXTRACT(EPOCH FROM (s.next_slot_at - make_interval(secs => :interval) - clock_timestamp()))
+""")
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def ensure_schema(engine: Engine) -> None:
+    with engine.begin() as conn:
+        for ddl in DDL:
+            conn.execute(text(ddl))
+
+
+class HostSlots:
+    """Cross-process per-host pacing backed by crawl_host_slots."""
+
+    def __init__(self, engine: Engine, interval: float):
+        self.engine = engine
+        self.interval = interval
+
+    def wait(self, host: str) -> None:
+        with self.engine.begin() as conn:
+            delay = float(conn.execute(RESERVE_SLOT_SQL, {"host": host, "interval": self.interval}).scalar_one())
+        if delay > 0:
+            time.sleep(delay)
+
+
+class CrawlJobQueue(CrawlProgress):
+    """
+    Claims crawl_jobs for one worker and records progress on them. Page
+    progress and completion are only written after the batch holding those
+    pages has been flushed, so a crash never skips unwritten cards.
+    """
+
+    def __init__(self, engine: Engine, worker_id: Optional[str] = None,
+                 lease_seconds: float = CRAWL_LEASE_SECONDS, max_attempts: int = CRAWL_MAX_ATTEMPTS):
+        self.engine = engine
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._start: Dict[str, int] = {}
+        self._buffered: Dict[str, int] = {}  # seed -> next page, not yet flushed
+        self._done: Set[str] = set()         # finished seeds waiting for a flush
+        self._batch_len = 0
+        self._renewed_at = time.monotonic()
+        self.failed: List[str] = []          # jobs this worker moved to 'failed'
+
+    # --- producer side
+    def enqueue(self, urls: Iterable[str]) -> int:
+        rows = [{"url": u} for u in urls]
+        if not rows:
+            return 0
+        with self.engine.begin() as conn:
+            res = conn.execute(text("INSERT INTO crawl_jobs (url) VALUES (:url) ON CONFLICT (url) DO NOTHING"), rows)
+        return max(res.rowcount, 0)
+
+    # --- worker side
+    def claim(self) -> Optional[str]:
+        with self.engine.begin() as conn:
+            exhausted = conn.execute(FAIL_EXHAUSTED_SQL, {"max_attempts": self.max_attempts}).all()
+            row = conn.execute(CLAIM_SQL, {
+                "worker": self.worker_id,
+                "lease": self.lease_seconds,
+                "max_attempts": self.max_attempts,
+            }).first()
+        for url, attempts in exhausted:
+            logger.error("Giving up on %s after %d attempts (status 'failed')", url, attempts)
+            self.failed.append(url)
+        if row is None:
+            return None
+        with self._lock:
+            self._start[row.url] = row.next_page
+        logger.info("Claimed %s (from page %d)", row.url, row.next_page)
+        return row.url
+
+    def iter_claims(self) -> Iterator[str]:
+        while (url := self.claim()) is not None:
+            yield url
+
+    def counts(self) -> Dict[str, int]:
+        """Jobs per status, e.g. {"done": 120, "failed": 2}."""
+        with self.engine.connect() as conn:
+            return dict(conn.execute(text("SELECT status, count(*) FROM crawl_jobs GROUP BY status")).all())
+
+    def renew(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                UPDATE crawl_jobs SET lease_expires_at = now() + make_interval(secs => :lease), updated_at = now()
+                WHERE lease_owner = :worker AND status = 'leased'
+            """), {"worker": self.worker_id, "lease": self.lease_seconds})
+        self._renewed_at = time.monotonic()
+
+    def release(self) -> None:
+        """Hand unfinished jobs back (e.g. after a pause) instead of waiting for lease expiry."""
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                UPDATE crawl_jobs
+                SET status = 'pending', lease_owner = NULL, lease_expires_at = NULL,
+                    attempts = GREATEST(attempts - 1, 0), updated_at = now()
+                WHERE lease_owner = :worker AND status = 'leased'
+            """), {"worker": self.worker_id})
+
+    def _commit_progress(self) -> None:
+        with self._lock:
+            pages, self._buffered = self._buffered, {}
+            done, self._done = self._done, set()
+        pages = {u: p for u, p in pages.items() if u not in done}
+        if not pages and not done:
+            return
+        with self.engine.begin() as conn:
+            if pages:
+                conn.execute(text("""
+                    UPDATE crawl_jobs SET next_page = :next_page,
+                        lease_expires_at = now() + make_interval(secs => :lease), updated_at = now()
+                    WHERE url = :url AND lease_owner = :worker
+                """), [{"url": u, "next_page": p, "worker": self.worker_id, "lease": self.lease_seconds}
+                       for u, p in pages.items()])
+            if done:
+                conn.execute(text("""
+                    UPDATE crawl_jobs SET status = 'done', lease_owner = NULL, lease_expires_at = NULL, updated_at = now()
+                    WHERE url = :url AND lease_owner = :worker
+                """), [{"url": u, "worker": self.worker_id} for u in done])
+
+    # --- CrawlProgress hooks (writer thread)
+    def start_page(self, seed: str) -> int:
+        with self._lock:
+            return self._start.get(seed, 1)
+
+    def page_buffered(self, seed: str, page_no: int, batch: List[dict]) -> None:
+        with self._lock:
+            self._buffered[seed] = page_no + 1
+            self._batch_len = len(batch)
+        if time.monotonic() - self._renewed_at > self.lease_seconds / 3:
+            self.renew()
+
+    def batch_flushed(self) -> None:
+        self._batch_len = 0
+        self._commit_progress()
+
+    def seed_done(self, seed: str) -> None:
+        with self._lock:
+            self._done.add(seed)
+            pending_cards = self._batch_len > 0
+        if not pending_cards:
+            self._commit_progress()
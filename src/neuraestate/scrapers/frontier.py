@@ -0,0 +1,91 @@
+# src/neuraestate/scrapers/frontier.py
+"""
+Crawl frontier checkpoint for resumable crawls.
+
+The JSON checkpoint (CRAWL_CHECKPOINT, default .cache/crawl_frontier.json)
+holds the index URLs not finished yet, the next page to fetch per seed and
+the cards buffered but not yet written. next_page only advances once a
+page's cards are in the saved batch, so a crash loses at most the pages
+fetched since the last save; they are re-fetched on resume.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from typing import Dict, List, Optional
+
+from neuraestate.scrapers.pipeline import CrawlProgress
+
+logger = logging.getLogger("neuraestate")
+
+CRAWL_CHECKPOINT = pathlib.Path(os.getenv("CRAWL_CHECKPOINT", ".cache/crawl_frontier.json"))
+# page-level progress is saved at most this often; flushes and finished seeds always save
+CHECKPOINT_INTERVAL = float(os.getenv("CHECKPOINT_INTERVAL", "5"))
+
+
+class CrawlFrontier(CrawlProgress):
+    def __init__(self, path: pathlib.Path, pending: List[str],
+                 next_page: Optional[Dict[str, int]] = None, batch: Optional[List[dict]] = None):
+        self.path = pathlib.Path(path)
+        self.pending = list(pending)
+        self.next_page = dict(next_page or {})
+        self.batch = list(batch or [])
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+
+    @classmethod
+    def load(cls, path: pathlib.Path = CRAWL_CHECKPOINT) -> Optional["CrawlFrontier"]:
+        try:
+            data = json.loads(pathlib.Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return cls(path, data.get("pending", []), data.get("next_page"), data.get("batch"))
+
+    def save(self) -> None:
+        with self._lock:
+            data = {
+                "saved_at": time.time(),
+                "pending": self.pending,
+                "next_page": self.next_page,
+                "batch": self.batch,
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._saved_at = time.monotonic()
+
+    def clear(self) -> None:
+        """Drop the checkpoint once the crawl has completed."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    @property
+    def finished(self) -> bool:
+        return not self.pending and not self.batch
+
+    # --- CrawlProgress hooks (called from the writer thread)
+    def start_page(self, seed: str) -> int:
+        return self.next_page.get(seed, 1)
+
+    def page_buffered(self, seed: str, page_no: int, batch: List[dict]) -> None:
+        self.next_page[seed] = page_no + 1
+        self.batch = list(batch)
+        if time.monotonic() - self._saved_at >= CHECKPOINT_INTERVAL:
+            self.save()
+
+    def batch_flushed(self) -> None:
+        self.batch = []
+        self.save()
+
+    def seed_done(self, seed: str) -> None:
+        if seed in self.pending:
+            self.pending.remove(seed)
+        self.next_page.pop(seed, None)
+        self.save()
@@ -0,0 +1,131 @@
+# src/neuraestate/scrapers/http_cache.py
+"""
+Content-addressed HTTP response cache for scraper development and replay.
+
+Layout under HTTP_CACHE_DIR:
+    index/<sha256(url)>.json        status, headers, encoding, body hash
+    blobs/<xx>/<sha256(body)>.gz    gzip-compressed body (shared by identical pages)
+
+Modes (HTTP_CACHE_MODE):
+    off     plain network fetches (default)
+    record  fetch live and store every response, including 404s
+    replay  never touch the network; serve from the cache only
+
+Usage:
+    HTTP_CACHE_MODE=record python -m neuraestate.scrapers.mb_scraper
+    HTTP_CACHE_MODE=replay python -m neuraestate.scrapers.mb_scraper   # offline rerun
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import time
+from typing import Callable, Iterator, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger("neuraestate")
+
+HTTP_CACHE_MODE = os.getenv("HTTP_CACHE_MODE", "off").lower()
+HTTP_CACHE_DIR = pathlib.Path(os.getenv("HTTP_CACHE_DIR", ".cache/http"))
+
+# bodies are stored decoded, so these would lie on replay
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class CacheMiss(requests.RequestException):
+    """Replay mode was asked for a URL that was never recorded."""
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _atomic_write(path: pathlib.Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class ResponseCache:
+    MODES = ("off", "record", "replay")
+
+    def __init__(self, root: pathlib.Path = HTTP_CACHE_DIR, mode: str = HTTP_CACHE_MODE):
+        if mode not in self.MODES:
+            raise ValueError(f"HTTP cache mode must be one of {self.MODES}, got {mode!r}")
+        self.root = pathlib.Path(root)
+        self.mode = mode
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def _index_path(self, url: str) -> pathlib.Path:
+        return self.root / "index" / f"{_sha256(url.encode('utf-8'))}.json"
+
+    def _blob_path(self, digest: str) -> pathlib.Path:
+        return self.root / "blobs" / digest[:2] / f"{digest}.gz"
+
+    def store(self, url: str, resp: requests.Response):
+        body = resp.content or b""
+        digest = _sha256(body)
+        blob = self._blob_path(digest)
+        if not blob.exists():
+            _atomic_write(blob, gzip.compress(body, compresslevel=6))
+        entry = {
+            "url": url,
+            "final_url": resp.url,
+            "status_code": resp.status_code,
+            "headers": {k: v for k, v in resp.headers.items() if k.lower() not in _DROP_HEADERS},
+            "encoding": resp.encoding,
+            "body_sha256": digest,
+            "fetched_at": time.time(),
+        }
+        _atomic_write(self._index_path(url), json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+
+    def _build(self, entry: dict) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = entry["status_code"]
+        resp.url = entry.get("final_url") or entry["url"]
+        resp.headers = CaseInsensitiveDict(entry.get("headers") or {})
+        resp.encoding = entry.get("encoding")
+        resp._content = gzip.decompress(self._blob_path(entry["body_sha256"]).read_bytes())
+        return resp
+
+    def load(self, url: str) -> Optional[requests.Response]:
+        try:
+            entry = json.loads(self._index_path(url).read_text(encoding="utf-8"))
+            return self._build(entry)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def get(self, url: str, fetch: Callable[[], Optional[requests.Response]]) -> Optional[requests.Response]:
+        """Serve `url` according to the cache mode; `fetch` does the live request."""
+        if self.replaying:
+            resp = self.load(url)
+            if resp is None:
+                raise CacheMiss(f"Not in HTTP cache (replay mode): {url}")
+            return resp
+        resp = fetch()
+        if self.recording and resp is not None:
+            self.store(url, resp)
+        return resp
+
+    def iter_responses(self) -> Iterator[Tuple[str, requests.Response]]:
+        """Every recorded (url, response), e.g. as a parser benchmark corpus."""
+        for path in sorted((self.root / "index").glob("*.json")):
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+                yield entry["url"], self._build(entry)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Skipping unreadable cache entry %s: %s", path, e)
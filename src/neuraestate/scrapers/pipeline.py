@@ -0,0 +1,324 @@
+# src/neuraestate/scrapers/pipeline.py
+"""
+Producer/consumer crawl pipeline:
+
+    fetchers (threads) -> raw_q -> parsers (ProcessPoolExecutor) -> cards_q -> writer (single thread)
+
+Each hand-off is bounded, so a slow stage pushes back on the one before it
+instead of buffering whole crawls in memory. Every stage keeps its own
+throughput counters (see StageStats).
+
+pause() stops the fetchers after their current page and lets the parsers and
+the writer drain, so everything already fetched is flushed. The writer
+reports progress to a CrawlProgress (see scrapers/frontier.py) so a paused
+or interrupted crawl can resume where it stopped.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("neuraestate")
+
+# -----------------------
+# Config (env-overridable)
+# -----------------------
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "1"))
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "200"))
+
+# (seed, page_no, page_url, html); html is None for the "seed finished" marker
+RawPage = Tuple[str, int, Optional[str], Optional[str]]
+FetchPages = Callable[[str, int], Iterable[Tuple[int, str, str]]]
+ParseFn = Callable[[str, str], List[dict]]
+WriteFn = Callable[[List[dict]], int]
+
+_DONE = object()
+
+
+# -----------------------
+# Per-stage counters
+# -----------------------
+@dataclass
+class StageStats:
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    blocked_seconds: float = 0.0  # time spent waiting on a full downstream queue
+    started_at: float = field(default_factory=time.monotonic)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, items_in: int = 0, items_out: int = 0, busy: float = 0.0,
+               blocked: float = 0.0, errors: int = 0) -> None:
+        with self._lock:
+            self.items_in += items_in
+            self.items_out += items_out
+            self.busy_seconds += busy
+            self.blocked_seconds += blocked
+            self.errors += errors
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started_at, 1e-9)
+            return {
+                "stage": self.name,
+                "items_in": self.items_in,
+                "items_out": self.items_out,
+                "errors": self.errors,
+                "busy_s": round(self.busy_seconds, 3),
+                "blocked_s": round(self.blocked_seconds, 3),
+                "rate_per_s": round(self.items_out / elapsed, 2),
+            }
+
+
+class CrawlProgress:
+    """
+    Writer-side progress hooks, called in per-seed page order. The default
+    keeps nothing; CrawlFrontier persists it for resumable crawls.
+    """
+
+    def start_page(self, seed: str) -> int:
+        return 1
+
+    def page_buffered(self, seed: str, page_no: int, batch: List[dict]) -> None:
+        """Cards of `page_no` are in the unwritten `batch`."""
+
+    def batch_flushed(self) -> None:
+        """The buffered batch was written."""
+
+    def seed_done(self, seed: str) -> None:
+        """Every page of `seed` has been buffered."""
+
+
+def _timed_parse(parse: ParseFn, html: str, url: str) -> Tuple[List[dict], float]:
+    # runs inside the worker process; module-level so it pickles
+    t0 = time.perf_counter()
+    cards = parse(html, url)
+    return cards, time.perf_counter() - t0
+
+
+# -----------------------
+# Pipeline
+# -----------------------
+class CrawlPipeline:
+    """
+    fetch_pages(seed, start_page) yields (page_no, page_url, html) for one seed.
+    parse(html, page_url) turns a page into card dicts; it runs in worker
+    processes, so it must be a picklable module-level function.
+    write(rows) persists one batch and returns the number of new rows.
+    """
+
+    def __init__(
+        self,
+        fetch_pages: FetchPages,
+        parse: ParseFn,
+        write: WriteFn,
+        fetch_workers: int = FETCH_WORKERS,
+        parse_workers: int = PARSE_WORKERS,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        batch_size: int = UPSERT_BATCH_SIZE,
+        progress: Optional[CrawlProgress] = None,
+        should_pause: Callable[[], bool] = lambda: False,
+    ):
+        self.fetch_pages = fetch_pages
+        self.parse = parse
+        self.write = write
+        self.fetch_workers = max(1, fetch_workers)
+        self.parse_workers = max(1, parse_workers)
+        self.batch_size = max(1, batch_size)
+        self.progress = progress or CrawlProgress()
+        self.should_pause = should_pause
+        # bounded hand-offs: these are the backpressure points
+        self.raw_q: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self.cards_q: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self.max_inflight = self.parse_workers * 2
+
+        self.fetch_stats = StageStats("fetch")
+        self.parse_stats = StageStats("parse")
+        self.write_stats = StageStats("write")
+
+        self._abort = threading.Event()
+        self._pause = threading.Event()
+        self._seeds: Optional[Iterator[str]] = None
+        self._seeds_lock = threading.Lock()
+        self._fetchers_left = 0
+        self._fetchers_lock = threading.Lock()
+
+    @property
+    def paused(self) -> bool:
+        return self._pause.is_set()
+
+    def pause(self) -> None:
+        """Stop fetching after the current page; parsed pages still get written."""
+        if not self._pause.is_set():
+            logger.info("Pausing crawl: finishing in-flight pages and flushing the batch")
+        self._pause.set()
+
+    def _stopping(self) -> bool:
+        if not self._pause.is_set() and self.should_pause():
+            self.pause()
+        return self._pause.is_set() or self._abort.is_set()
+
+    @property
+    def stats(self) -> Dict[str, dict]:
+        return {s.name: s.as_dict() for s in (self.fetch_stats, self.parse_stats, self.write_stats)}
+
+    # --- helpers
+    def _put(self, q: "queue.Queue", item, stats: StageStats) -> bool:
+        """Blocking put that gives up if the pipeline is aborting."""
+        t0 = time.perf_counter()
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                stats.record(blocked=time.perf_counter() - t0)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _next_seed(self) -> Optional[str]:
+        with self._seeds_lock:
+            return next(self._seeds, None)
+
+    # --- stage 1: fetch
+    def _fetch_loop(self) -> None:
+        try:
+            while not self._stopping():
+                seed = self._next_seed()
+                if seed is None:
+                    break
+                pages = 0
+                finished = False
+                try:
+                    t0 = time.perf_counter()
+                    for page_no, page_url, html in self.fetch_pages(seed, self.progress.start_page(seed)):
+                        self.fetch_stats.record(items_in=1, items_out=1, busy=time.perf_counter() - t0)
+                        pages += 1
+                        if not self._put(self.raw_q, (seed, page_no, page_url, html), self.fetch_stats):
+                            return
+                        if self._stopping():
+                            break
+                        t0 = time.perf_counter()
+                    else:
+                        finished = True
+                except Exception as e:
+                    self.fetch_stats.record(errors=1)
+                    logger.warning("Fetch failed for seed %s: %s", seed, e)
+                if pages == 0 and finished:
+                    logger.warning("No pages crawled for %s", seed)
+                if finished and not self._put(self.raw_q, (seed, 0, None, None), self.fetch_stats):
+                    return
+        finally:
+            with self._fetchers_lock:
+                self._fetchers_left -= 1
+                last = self._fetchers_left == 0
+            if last:
+                self._put(self.raw_q, _DONE, self.fetch_stats)
+
+    # --- stage 2: parse
+    def _parse_loop(self, pool: ProcessPoolExecutor) -> None:
+        pending: Deque[Tuple[RawPage, Future]] = deque()
+
+        def drain_one() -> bool:
+            (seed, page_no, page_url, _), fut = pending.popleft()
+            if fut is None:  # seed-finished marker, forwarded in order
+                return self._put(self.cards_q, (seed, page_no, None, None), self.parse_stats)
+            try:
+                cards, busy = fut.result()
+                self.parse_stats.record(items_out=len(cards), busy=busy)
+            except Exception as e:
+                self.parse_stats.record(errors=1)
+                logger.warning("Parse failed for %s: %s", page_url, e)
+                cards = []
+            return self._put(self.cards_q, (seed, page_no, page_url, cards), self.parse_stats)
+
+        try:
+            while not self._abort.is_set():
+                try:
+                    item = self.raw_q.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    break
+                seed, page_no, page_url, html = item
+                if html is None:
+                    pending.append((item, None))
+                    continue
+                self.parse_stats.record(items_in=1)
+                pending.append((item, pool.submit(_timed_parse, self.parse, html, page_url)))
+                # FIFO drain keeps per-seed page order intact downstream
+                while len(pending) >= self.max_inflight:
+                    if not drain_one():
+                        return
+            while pending and not self._abort.is_set():
+                if not drain_one():
+                    return
+        finally:
+            self._put(self.cards_q, _DONE, self.parse_stats)
+
+    # --- stage 3: write (runs on the caller's thread)
+    def _flush(self, batch: List[dict]) -> int:
+        t0 = time.perf_counter()
+        n = self.write(batch)
+        self.write_stats.record(items_out=len(batch), busy=time.perf_counter() - t0)
+        self.progress.batch_flushed()
+        logger.info("Inserted %d new rows (batch of %d). stats=%s", n, len(batch), self.stats)
+        return n
+
+    def _write_loop(self) -> int:
+        inserted = 0
+        batch: List[dict] = []
+        while True:
+            item = self.cards_q.get()
+            if item is _DONE:
+                break
+            seed, page_no, _, cards = item
+            if cards is None:
+                self.progress.seed_done(seed)
+                continue
+            self.write_stats.record(items_in=len(cards))
+            batch.extend(cards)
+            self.progress.page_buffered(seed, page_no, batch)
+            if len(batch) >= self.batch_size:
+                inserted += self._flush(batch)
+                batch = []
+        if batch:
+            inserted += self._flush(batch)
+        return inserted
+
+    def run(self, seeds: Iterable[str]) -> int:
+        """Crawl every seed and return the number of new rows written."""
+        self._seeds = iter(seeds)
+        self._fetchers_left = self.fetch_workers
+        fetchers = [
+            threading.Thread(target=self._fetch_loop, name=f"crawl-fetch-{i}", daemon=True)
+            for i in range(self.fetch_workers)
+        ]
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+            parser = threading.Thread(target=self._parse_loop, args=(pool,), name="crawl-parse", daemon=True)
+            for t in fetchers:
+                t.start()
+            parser.start()
+            try:
+                inserted = self._write_loop()
+            except BaseException:
+                self._abort.set()
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            finally:
+                for t in fetchers:
+                    t.join(timeout=5)
+                parser.join(timeout=5)
+
+        logger.info("Pipeline finished. stats=%s", self.stats)
+        return inserted
@@ -1,4 +1,5 @@
 import os, re, json, time, pathlib, urllib.parse, requests, gzip
+import asyncio, hashlib, threading
 from typing import Optional, List
 from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
@@ -6,6 +7,7 @@ from xml.etree import ElementTree as ET
 from io import BytesIO
 from urllib import robotparser
 from neuraestate.logging_setup import setup_logging
+from neuraestate.scrapers.http_cache import CacheMiss, ResponseCache
 import logging
 
 setup_logging()
@@ -17,8 +19,22 @@ USER_AGENT = (
     "NeuraEstateBot/1.0 (+you@example.com)"
 )
 
+# how many requests a host without Crawl-delay may burst before pacing kicks in
+CRAWLER_BURST = int(os.getenv("CRAWLER_BURST", "1"))
+
+# `touch` this file to pause a running crawl gracefully (see scrapers/pipeline.py)
+CRAWLER_PAUSE_FILE = pathlib.Path(os.getenv("CRAWLER_PAUSE_FILE", ".cache/crawler.pause"))
+
+def pause_reason() -> Optional[str]:
+    """Which pause trigger is set, or None."""
+    if os.getenv("CRAWLER_PAUSE", "0") == "1":
+        return "CRAWLER_PAUSE=1"
+    if CRAWLER_PAUSE_FILE.exists():
+        return f"pause file {CRAWLER_PAUSE_FILE}"
+    return None
+
 def should_pause() -> bool:
-    return os.getenv("CRAWLER_PAUSE", "0") == "1"
+    return pause_reason() is not None
 
 CONSENT_DIR = pathlib.Path("consent_artifacts")
 CONSENT_DIR.mkdir(exist_ok=True)
@@ -30,35 +46,122 @@ def log_robots(host: str, robots_url: str, robots_text: str, crawl_cfg: dict):
         json.dumps(crawl_cfg, indent=2, ensure_ascii=False), encoding="utf-8"
     )
 
+def _text_sha256(text: str) -> str:
+    return hashlib.sha256((text or "").replace("\r\n", "\n").encode("utf-8")).hexdigest()
+
+def _latest_artifact_sha256(host: str) -> Optional[str]:
+    snapshots = sorted(CONSENT_DIR.glob(f"{host}_robots_*.txt"))
+    if not snapshots:
+        return None
+    return _text_sha256(snapshots[-1].read_text(encoding="utf-8"))
+
+ROBOTS_CACHE_DIR = pathlib.Path(os.getenv("ROBOTS_CACHE_DIR", ".cache/robots"))
+ROBOTS_CACHE_TTL = float(os.getenv("ROBOTS_CACHE_TTL", str(24 * 3600)))
+
+class RobotsCache:
+    """
+    One JSON entry per host: robots text, ETag/Last-Modified validators,
+    fetch time and the hash of the last consent artifact written for it.
+    Shared by every crawler process that uses the same directory.
+    """
+    def __init__(self, root: pathlib.Path = ROBOTS_CACHE_DIR, ttl: float = ROBOTS_CACHE_TTL):
+        self.root = pathlib.Path(root)
+        self.ttl = ttl
+
+    def _path(self, host: str) -> pathlib.Path:
+        return self.root / (re.sub(r"[^A-Za-z0-9.\-]", "_", host) + ".json")
+
+    def load(self, host: str) -> Optional[dict]:
+        try:
+            return json.loads(self._path(host).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def save(self, host: str, entry: dict):
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(host)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)  # atomic: readers never see a half-written entry
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - float(entry.get("fetched_at", 0)) < self.ttl
+
 class RobotsPolicy:
-    def __init__(self, base_url: str, session: Optional[requests.Session] = None):
+    def __init__(self, base_url: str, session: Optional[requests.Session] = None,
+                 cache: Optional[RobotsCache] = None):
         self.session = session or requests.Session()
         self.session.headers.update({"User-Agent": USER_AGENT})
         parsed = urllib.parse.urlparse(base_url)
         self.scheme, self.host = parsed.scheme, parsed.netloc
         self.robots_url = f"{self.scheme}://{self.host}/robots.txt"
         self.rp = robotparser.RobotFileParser()
-        self.text = ""
+        self.cache = cache if cache is not None else RobotsCache()
+
+        entry = self.cache.load(self.host)
+        if entry is None or not self.cache.is_fresh(entry):
+            entry = self._revalidate(entry)
+        self.text = entry.get("text") or ""
+        self.rp.parse(self.text.splitlines())
 
+        self.crawl_delay = self._extract_crawl_delay(self.text, USER_AGENT)
+
+        # consent artifacts only when the robots text actually changed
+        sha = _text_sha256(self.text)
+        last_sha = entry.get("artifact_sha256") or _latest_artifact_sha256(self.host)
+        if sha != last_sha:
+            crawl_cfg = {
+                "user_agent": USER_AGENT,
+                "robots_url": self.robots_url,
+                "detected_crawl_delay_hint_seconds": self.crawl_delay,
+                "default_min_interval_seconds": 2.0,
+            }
+            log_robots(self.host, self.robots_url, self.text, crawl_cfg)
+        if entry.get("artifact_sha256") != sha and entry.get("fetched_at"):
+            entry["artifact_sha256"] = sha
+            self.cache.save(self.host, entry)
+
+    def _revalidate(self, entry: Optional[dict]) -> dict:
+        """
+        Conditional GET for robots.txt. Returns the entry to use; it is only
+        persisted when the server gave a definite answer (200/304/4xx).
+        """
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
         try:
-            r = self.session.get(self.robots_url, timeout=15)
-            if r.status_code == 200:
-                self.text = r.text
-                self.rp.parse(self.text.splitlines())
-            else:
-                self.rp.parse([])
+            r = self.session.get(self.robots_url, timeout=15, headers=headers)
         except requests.RequestException:
-            self.rp.parse([])
+            r = None
 
-        self.crawl_delay = self._extract_crawl_delay(self.text, USER_AGENT)
+        if r is not None and r.status_code == 304 and entry:
+            fresh = dict(entry, fetched_at=time.time())
+        elif r is not None and r.status_code == 200:
+            fresh = {
+                "robots_url": self.robots_url,
+                "text": r.text,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+                "artifact_sha256": (entry or {}).get("artifact_sha256"),
+            }
+        elif r is not None and 400 <= r.status_code < 500 and r.status_code != 429:
+            # no robots.txt -> everything allowed (same as before), cacheable
+            fresh = {
+                "robots_url": self.robots_url,
+                "text": "",
+                "fetched_at": time.time(),
+                "artifact_sha256": (entry or {}).get("artifact_sha256"),
+            }
+        else:
+            # network error / 5xx: keep using a stale entry, don't persist
+            return dict(entry) if entry else {"text": ""}
 
-        crawl_cfg = {
-            "user_agent": USER_AGENT,
-            "robots_url": self.robots_url,
-            "detected_crawl_delay_hint_seconds": self.crawl_delay,
-            "default_min_interval_seconds": 2.0,
-        }
-        log_robots(self.host, self.robots_url, self.text or "", crawl_cfg)
+        self.cache.save(self.host, fresh)
+        return fresh
 
     def can_fetch(self, url: str) -> bool:
         return self.rp.can_fetch(USER_AGENT, url)
@@ -91,19 +194,82 @@ class RobotsPolicy:
                     delays.append(float(m.group(1)))
         return min(delays) if delays else None
 
+class TokenBucket:
+    """
+    Token bucket that hands out reservations rather than polling: each
+    acquire takes a token (possibly going into debt) and is told how long
+    to wait for it. Reservations are made under a lock in arrival order,
+    so waiters are served FIFO whether they sleep in a thread or on an
+    event loop.
+    """
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = max(rate, 0.0001)
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def configure(self, rate: float, capacity: float):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(rate, 0.0001)
+            self.capacity = max(capacity, 1.0)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def reserve(self) -> float:
+        """Take one token; return the seconds to wait before using it."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
 class HostRateLimiter:
-    def __init__(self, default_rps: float = 0.5):
+    """
+    Per-host token buckets. Refill rate is the slower of default_rps and the
+    robots.txt Crawl-delay; a host that sets Crawl-delay gets capacity 1
+    (strict spacing), others may burst up to `burst` requests.
+    Safe to share across threads and event loops.
+    """
+    def __init__(self, default_rps: float = 0.5, burst: int = 1):
         self.default_interval = 1.0 / max(default_rps, 0.0001)
-        self.last_time = {}
+        self.burst = max(1, int(burst))
+        self.buckets = {}
+        self._lock = threading.Lock()
 
-    def wait(self, host: str, crawl_delay_hint: Optional[float] = None):
+    def _bucket(self, host: str, crawl_delay_hint: Optional[float]) -> TokenBucket:
         min_interval = max(self.default_interval, float(crawl_delay_hint or 0.0))
-        now = time.monotonic()
-        last = self.last_time.get(host, 0.0)
-        wait_for = max(0.0, (last + min_interval) - now)
-        if wait_for > 0:
-            time.sleep(wait_for)
-        self.last_time[host] = time.monotonic()
+        rate = 1.0 / min_interval
+        capacity = 1 if crawl_delay_hint else self.burst
+        with self._lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(rate, capacity)
+            elif bucket.rate != rate or bucket.capacity != capacity:
+                bucket.configure(rate, capacity)
+        return bucket
+
+    def acquire(self, host: str, crawl_delay_hint: Optional[float] = None):
+        self._bucket(host, crawl_delay_hint).acquire()
+
+    async def acquire_async(self, host: str, crawl_delay_hint: Optional[float] = None):
+        await self._bucket(host, crawl_delay_hint).acquire_async()
+
+    # backwards-compatible name
+    wait = acquire
 
 def _parse_retry_after(h: str) -> Optional[float]:
     try:
@@ -152,7 +318,8 @@ def get_with_backoff(session: requests.Session, url: str,
     return last_resp
 
 class SafeFetcher:
-    def __init__(self, default_rps: float = 0.5):
+    def __init__(self, default_rps: float = 0.5, burst: int = CRAWLER_BURST,
+                 cache: Optional[ResponseCache] = None):
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": USER_AGENT})
         self.session.headers.update({
@@ -161,25 +328,37 @@ class SafeFetcher:
             "Accept-Encoding": "gzip, deflate, br",
         })
         self.robots_cache = {}
-        self.limiter = HostRateLimiter(default_rps=default_rps)
+        self._robots_lock = threading.Lock()
+        self.limiter = HostRateLimiter(default_rps=default_rps, burst=burst)
+        self.cache = cache if cache is not None else ResponseCache()
 
     def _policy_for(self, url: str) -> RobotsPolicy:
         parsed = urllib.parse.urlparse(url)
         base = f"{parsed.scheme}://{parsed.netloc}"
-        if parsed.netloc not in self.robots_cache:
-            self.robots_cache[parsed.netloc] = RobotsPolicy(base, session=self.session)
-        return self.robots_cache[parsed.netloc]
+        # one robots.txt fetch per host even with many worker threads
+        with self._robots_lock:
+            if parsed.netloc not in self.robots_cache:
+                self.robots_cache[parsed.netloc] = RobotsPolicy(base, session=self.session)
+            return self.robots_cache[parsed.netloc]
 
     def fetch(self, url: str):
-        if should_pause():
-            raise RuntimeError("Crawler paused via CRAWLER_PAUSE=1")
+        reason = pause_reason()
+        if reason:
+            raise RuntimeError(f"Crawler paused via {reason}")
+        if self.cache.replaying:
+            # offline replay: no robots/rate limiting, responses come from disk
+            try:
+                return self.cache.get(url, lambda: None)
+            except CacheMiss as e:
+                logger.warning(str(e))
+                return None
         policy = self._policy_for(url)
         if not url.lower().endswith("/robots.txt"):
             if not policy.can_fetch(url):
                 logger.info(f"Disallowed by robots.txt: {url}")
                 return None
-        self.limiter.wait(policy.host, crawl_delay_hint=policy.crawl_delay)
-        resp = get_with_backoff(self.session, url)
+        self.limiter.acquire(policy.host, crawl_delay_hint=policy.crawl_delay)
+        resp = self.cache.get(url, lambda: get_with_backoff(self.session, url))
         if resp is None:
             logger.warning(f"No response: {url}")
             return None
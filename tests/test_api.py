@@ -0,0 +1,136 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.neuraestate.api import main
+from src.neuraestate.config import settings
+from src.neuraestate.db.engine import async_url
+from src.neuraestate.pipelines.preprocess import create_ods_table_if_not_exists
+
+# Read endpoints against TEST_DATABASE_URL (default: the app database) in a
+# throwaway schema; skipped when Postgres is not reachable.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.DATABASE_URL)
+
+ODS_ROWS = [
+    # source_id, title, price_inr, bhk, area_sqft, city, processed today?
+    ("s1", "2 BHK Flat in Baner", 5_000_000, 2, 1000.0, "Pune", True),
+    ("s2", "3 BHK Flat in Wakad", 9_000_000, 3, 1500.0, "Pune", False),
+    ("s3", "1 BHK Flat in Andheri", 12_000_000, 1, 500.0, "Mumbai", True),
+    ("s4", "Plot", None, None, None, "Mumbai", False),
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    admin = create_engine(TEST_DATABASE_URL, connect_args={"connect_timeout": 3})
+    schema = f"test_api_{uuid.uuid4().hex[:8]}"
+    try:
+        with admin.begin() as conn:
+            conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+    except OperationalError as e:
+        pytest.skip(f"Postgres not reachable: {e.orig}")
+    options = {"options": f"-csearch_path={schema}"}
+    sync = create_engine(TEST_DATABASE_URL, connect_args=options)
+    create_ods_table_if_not_exists(sync)
+    with sync.begin() as conn:
+        for ddl in main.USER_LISTINGS_DDL:
+            conn.execute(text(ddl))
+        conn.execute(text("""
+            INSERT INTO ods_listings (source_id, title, price_inr, bhk, area_sqft, city, processed_at)
+            VALUES (:sid, :title, :price, :bhk, :area, :city,
+                    CASE WHEN :today THEN now() ELSE now() - interval '10 days' END)
+        """), [dict(zip(("sid", "title", "price", "bhk", "area", "city", "today"), r)) for r in ODS_ROWS])
+        conn.execute(text("""
+            INSERT INTO user_listings (title, price, area_sqft, bhk, city)
+            VALUES ('Seller flat', 4000000, 800, 2, 'Pune')
+        """))
+
+    # NullPool: each TestClient request may run on its own event loop
+    engine = create_async_engine(async_url(TEST_DATABASE_URL), poolclass=NullPool, connect_args=options)
+    monkeypatch.setattr(main, "async_engine", engine)
+    monkeypatch.setattr(main, "_caps", None)
+    try:
+        yield TestClient(main.app)
+    finally:
+        asyncio.run(engine.dispose())
+        sync.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        admin.dispose()
+
+
+def test_listings_filters_and_pagination(client):
+    body = client.get("/listings", params={"per_page": 2}).json()
+    assert body["total"] == 5 and body["page"] == 1 and len(body["items"]) == 2
+
+    body = client.get("/listings", params={"city": "pune", "min_bhk": 2}).json()
+    assert body["total"] == 3
+    assert sorted(i["title"] for i in body["items"]) == ["2 BHK Flat in Baner", "3 BHK Flat in Wakad", "Seller flat"]
+    seller = next(i for i in body["items"] if i["title"] == "Seller flat")
+    assert seller["id"] > 1_000_000_000 and seller["url"].startswith("/seller/")
+
+    body = client.get("/listings", params={"max_price": 6_000_000, "min_area": 900, "max_area": 1200}).json()
+    assert [i["title"] for i in body["items"]] == ["2 BHK Flat in Baner"]
+    item = body["items"][0]
+    assert (item["price"], item["bhk"], item["area_sqft"], item["city"]) == (5_000_000.0, 2, 1000.0, "Pune")
+    assert item["url"] == "https://example.com/listing/s1"  # ETL schema has no url column
+
+    body = client.get("/listings", params={"page": 3, "per_page": 2}).json()
+    assert body["total"] == 5 and len(body["items"]) == 1
+
+
+def test_admin_stats_breakdown(client):
+    assert client.get("/admin/stats").json() == {
+        "total_properties": 5, "new_listings_today": 3,
+        "new_listings_7d": None, "new_listings_30d": None, "by_city": None,
+    }
+    body = client.get("/admin/stats", params={"breakdown": "true"}).json()
+    assert (body["total_properties"], body["new_listings_today"]) == (5, 3)
+    assert (body["new_listings_7d"], body["new_listings_30d"]) == (3, 5)
+    assert body["by_city"] == [
+        {"city": "Pune", "total": 3, "new_today": 2},
+        {"city": "Mumbai", "total": 2, "new_today": 1},
+    ]
+    assert len(client.get("/admin/stats", params={"breakdown": "true", "city_limit": 1}).json()["by_city"]) == 1
+
+
+def test_admin_analytics(client):
+    body = client.get("/admin/analytics").json()
+    assert sorted(body["prices"]) == [4e6, 5e6, 9e6, 12e6]
+    assert sorted(zip(body["areas"], body["areas_for_prices"])) == [
+        (500.0, 12e6), (800.0, 4e6), (1000.0, 5e6), (1500.0, 9e6)
+    ]
+    assert sorted(body["bhks"]) == [1, 2, 2, 3]
+
+
+def test_summary(client):
+    body = client.get("/summary").json()
+    assert body["min_price"] == 5e6 and body["max_price"] == 12e6
+    assert body["median_price"] == 9e6
+    assert body["avg_price_per_sqft"] == pytest.approx((5000 + 6000 + 24000) / 3)
+
+
+def test_gather_caps_connections_per_request(monkeypatch):
+    monkeypatch.setattr(main, "API_QUERY_FANOUT", 2)
+    running, peak = 0, 0
+
+    async def fetch(i):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if i == 3:
+            raise ValueError("boom")
+        return i
+
+    results = asyncio.run(main._gather(*(fetch(i) for i in range(5)), return_exceptions=True))
+    assert results[:3] == [0, 1, 2] and isinstance(results[3], ValueError) and results[4] == 4
+    assert peak == 2
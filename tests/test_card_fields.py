@@ -0,0 +1,39 @@
+import pytest
+
+from src.neuraestate.scrapers import mb_scraper as mb
+
+CARD_TEXTS = [
+    "3 BHK Flat for Sale in Baner, Pune ₹1.35 Cr ₹9,800 per sqft Carpet Area 1378 sqft 2 Baths Ready to Move",
+    "2 bhk apartment ₹ 85 Lac Super Area 1,050 sq. ft. 2 bath East facing",
+    "Plot in Whitefield ₹45,000 1.5 acres Freehold",
+    "Villa ₹ 3.75 Crore 4 BHK 5 Baths 320.5 Sq. M Gated",
+    "Studio 1.2.3 sqft odd text with no price 1 Bath",
+    "Independent house, 240 sqyd, price on request",
+    "Nothing useful here at all, just a long description of amenities",
+]
+
+
+@pytest.mark.parametrize("text", CARD_TEXTS)
+def test_extract_card_fields_matches_single_field_helpers(text):
+    bhk = mb.BHK_RE.search(text)
+    bath = mb.BATH_RE.search(text)
+    assert mb.extract_card_fields(text) == {
+        "price_inr": mb.parse_price_to_inr(text),
+        "bhk": int(bhk.group(1)) if bhk else None,
+        "bathrooms": int(bath.group(1)) if bath else None,
+        "area_sqft": mb.parse_area_to_sqft(text),
+    }
+
+
+def test_city_guess_computed_once_per_page():
+    cards = "".join(
+        f'<div class="mb-srp__card"><h2>Flat {i}</h2>{i} BHK ₹{i}0 Lac {i}00 sqft in a quiet lane near the park</div>'
+        for i in range(1, 4)
+    )
+    html = f"<html><head><title>Flats for Sale in Pune | MagicBricks</title></head><body>{cards}</body></html>"
+    mb.guess_city_from_title.cache_clear()
+    rows = mb.extract_listing_cards(html, "https://example.test/p")
+    assert [r["city"] for r in rows] == ["Pune"] * 3
+    assert [r["bhk"] for r in rows] == [1, 2, 3]
+    info = mb.guess_city_from_title.cache_info()
+    assert info.misses == 1 and info.hits == 0
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg://u@localhost/db")
+from src.neuraestate.ml import train_model as tm  # noqa: E402
+from src.neuraestate.ml.compact_model import CompactForest  # noqa: E402
+
+
+def _frame(n, seed):
+    rng = np.random.default_rng(seed)
+    area = rng.uniform(300, 3000, n)
+    baths = rng.integers(1, 4, n).astype(float)
+    baths[rng.random(n) < 0.2] = np.nan
+    city = rng.choice(["Pune", "Mumbai", "Delhi"], n).astype(object)
+    city[rng.random(n) < 0.1] = None
+    return pd.DataFrame({
+        "area_sqft": area,
+        "bhk": rng.integers(1, 5, n),
+        "bathrooms": baths,
+        "city": city,
+        "price_inr": area * rng.uniform(4000, 12000, n),
+    })
+
+
+def _fit(monkeypatch, df):
+    monkeypatch.setattr(tm, "N_ESTIMATORS", 15)
+    pipeline = tm.build_pipeline()
+    pipeline.fit(df[tm.NUM_FEATURES + tm.CAT_FEATURES], df[tm.TARGET])
+    return pipeline
+
+
+def test_compact_forest_matches_sklearn(monkeypatch, tmp_path):
+    pipeline = _fit(monkeypatch, _frame(600, 1))
+    test = _frame(300, 2)
+    test.loc[:4, "city"] = "Chennai"  # unseen city: all one-hot columns zero
+
+    CompactForest.from_pipeline(pipeline, {"created_at": "x"}).save(tmp_path / "m.npz")
+    model = CompactForest.load(tmp_path / "m.npz")
+
+    expected = pipeline.predict(test[tm.NUM_FEATURES + tm.CAT_FEATURES])
+    got = model.predict({c: test[c].tolist() for c in tm.NUM_FEATURES + tm.CAT_FEATURES})
+    np.testing.assert_allclose(got, expected, rtol=1e-12)
+    assert model.meta["created_at"] == "x" and model.meta["n_trees"] == 15
+
+
+def test_predict_one_with_missing_values(monkeypatch):
+    df = _frame(400, 3)
+    pipeline = _fit(monkeypatch, df)
+    model = CompactForest.from_pipeline(pipeline)
+
+    row = {"area_sqft": 950.0, "bhk": 2, "bathrooms": None, "city": None}
+    # read_sql gives NaN for NULL; a bare None would be a category of its own to sklearn
+    frame = pd.DataFrame({"area_sqft": [950.0], "bhk": [2], "bathrooms": [np.nan],
+                          "city": np.array([np.nan], dtype=object)})
+    expected = pipeline.predict(frame)[0]
+    assert abs(model.predict_one(**row) - expected) <= 1e-9 * abs(expected)
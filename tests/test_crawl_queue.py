@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.neuraestate.config import settings
+from src.neuraestate.scrapers import crawl_queue as cq
+
+# Runs against TEST_DATABASE_URL (default: the app database) in a throwaway
+# schema; skipped when Postgres is not reachable.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.DATABASE_URL)
+
+
+@pytest.fixture
+def engine():
+    admin = create_engine(TEST_DATABASE_URL, connect_args={"connect_timeout": 3})
+    schema = f"test_crawl_{uuid.uuid4().hex[:8]}"
+    try:
+        with admin.begin() as conn:
+            conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+    except OperationalError as e:
+        pytest.skip(f"Postgres not reachable: {e.orig}")
+    # the queue runs raw SQL, so point the search_path at the schema
+    eng = create_engine(TEST_DATABASE_URL, pool_size=8,
+                        connect_args={"connect_timeout": 3, "options": f"-csearch_path={schema}"})
+    cq.ensure_schema(eng)
+    try:
+        yield eng
+    finally:
+        eng.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        admin.dispose()
+
+
+def _job(engine, url):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT * FROM crawl_jobs WHERE url = :url"), {"url": url}).one()
+
+
+def _urls(n):
+    return [f"https://example.com/index/{i}" for i in range(n)]
+
+
+def test_concurrent_workers_never_claim_the_same_job(engine):
+    cq.CrawlJobQueue(engine).enqueue(_urls(40))
+    claimed = {}
+    start = threading.Barrier(4)
+
+    def work(worker):
+        queue = cq.CrawlJobQueue(engine, worker_id=worker)
+        start.wait()
+        claimed[worker] = list(queue.iter_claims())
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    everything = [u for urls in claimed.values() for u in urls]
+    assert sorted(everything) == sorted(_urls(40))  # each job exactly once
+    with engine.connect() as conn:
+        owners = dict(conn.execute(text("SELECT url, lease_owner FROM crawl_jobs")).all())
+    for worker, urls in claimed.items():
+        assert all(owners[u] == worker for u in urls)
+
+
+def test_expired_lease_is_reclaimed_from_the_flushed_page(engine):
+    url = _urls(1)[0]
+    a = cq.CrawlJobQueue(engine, worker_id="a", lease_seconds=0.2)
+    b = cq.CrawlJobQueue(engine, worker_id="b", lease_seconds=60)
+    a.enqueue([url])
+
+    assert a.claim() == url
+    a.page_buffered(url, 1, [{"id": 1}])
+    a.batch_flushed()
+    a.page_buffered(url, 2, [{"id": 2}])  # never flushed: a "dies" here
+    assert b.claim() is None  # a's lease still holds
+
+    time.sleep(0.3)
+    assert b.claim() == url
+    assert b.start_page(url) == 2
+    job = _job(engine, url)
+    assert (job.lease_owner, job.attempts) == ("b", 2)
+
+
+def test_release_hands_jobs_back_without_using_an_attempt(engine):
+    url = _urls(1)[0]
+    a = cq.CrawlJobQueue(engine, worker_id="a")
+    a.enqueue([url])
+    assert a.claim() == url
+
+    a.release()
+    job = _job(engine, url)
+    assert (job.status, job.lease_owner, job.attempts) == ("pending", None, 0)
+    assert cq.CrawlJobQueue(engine, worker_id="b").claim() == url
+
+
+def test_job_fails_after_max_attempts(engine):
+    url = _urls(1)[0]
+    cq.CrawlJobQueue(engine).enqueue([url])
+    for worker in ("a", "b"):
+        assert cq.CrawlJobQueue(engine, worker_id=worker, lease_seconds=0.1, max_attempts=2).claim() == url
+        time.sleep(0.2)
+
+    c = cq.CrawlJobQueue(engine, worker_id="c", max_attempts=2)
+    assert list(c.iter_claims()) == []
+    assert c.failed == [url]
+    assert _job(engine, url).status == "failed"
+    assert c.counts() == {"failed": 1}
+    assert c.claim() is None and c.failed == [url]  # reported once
+
+
+def test_progress_is_written_only_after_a_flush(engine):
+    url = _urls(1)[0]
+    q = cq.CrawlJobQueue(engine, worker_id="a")
+    q.enqueue([url])
+    q.claim()
+
+    q.page_buffered(url, 1, [{"id": 1}])
+    q.page_buffered(url, 2, [{"id": 1}, {"id": 2}])
+    assert _job(engine, url).next_page == 1
+    q.batch_flushed()
+    assert _job(engine, url).next_page == 3
+
+    q.page_buffered(url, 3, [{"id": 3}])
+    q.seed_done(url)  # cards of page 3 are still buffered
+    assert _job(engine, url).status == "leased"
+    q.batch_flushed()
+    job = _job(engine, url)
+    assert (job.status, job.lease_owner) == ("done", None)
+
+
+def test_seed_done_with_empty_batch_completes_at_once(engine):
+    url = _urls(1)[0]
+    q = cq.CrawlJobQueue(engine, worker_id="a")
+    q.enqueue([url])
+    q.claim()
+
+    q.seed_done(url)
+    assert _job(engine, url).status == "done"
+
+
+def test_host_slots_space_requests_across_processes(engine, monkeypatch):
+    slept = []
+    monkeypatch.setattr(cq.time, "sleep", slept.append)
+    # two "processes": separate HostSlots sharing only the table
+    first, second = cq.HostSlots(engine, 0.5), cq.HostSlots(engine, 0.5)
+
+    first.wait("example.com")
+    second.wait("example.com")
+    first.wait("example.com")
+    second.wait("other.example.com")
+
+    assert len(slept) == 2  # the first request per host does not wait
+    assert slept[0] == pytest.approx(0.5, abs=0.1)
+    assert slept[1] == pytest.approx(1.0, abs=0.1)
@@ -0,0 +1,40 @@
+from sqlalchemy.pool import NullPool, QueuePool
+
+from src.neuraestate.config import settings
+from src.neuraestate.db.engine import async_url, engine_options, get_engine, make_engine
+
+
+def test_engine_options_apply_pool_settings_and_application_name():
+    opts = engine_options("api", statement_timeout_ms=5000)
+    assert opts["pool_size"] == settings.DB_POOL_SIZE
+    assert opts["max_overflow"] == settings.DB_MAX_OVERFLOW
+    assert opts["pool_recycle"] == settings.DB_POOL_RECYCLE
+    assert opts["connect_args"]["application_name"] == f"{settings.DB_APP_NAME}-api"
+    assert opts["connect_args"]["options"] == "-c statement_timeout=5000"
+
+
+def test_nullpool_drops_pool_sizing():
+    opts = engine_options("etl", nullpool=True, pool_size=3)
+    assert opts["poolclass"] is NullPool
+    assert "pool_size" not in opts
+    assert isinstance(make_engine("etl", "postgresql+psycopg://u@localhost/db", nullpool=True).pool, NullPool)
+
+
+def test_get_engine_is_shared_per_component():
+    url = "postgresql+psycopg://u@localhost/db"
+    assert get_engine("api", url) is get_engine("api", url)
+    assert get_engine("api", url) is not get_engine("scraper", url)
+    assert isinstance(get_engine("train", url, pool_size=1).pool, QueuePool)
+
+
+def test_async_url_switches_to_psycopg3_driver():
+    assert async_url("postgresql://u:p@h:5432/db") == "postgresql+psycopg://u:p@h:5432/db"
+    assert async_url("postgresql+psycopg2://u:p@h/db") == "postgresql+psycopg://u:p@h/db"
+    assert async_url("postgresql+psycopg://u@h/db") == "postgresql+psycopg://u@h/db"
+
+
+def test_prepare_threshold_only_for_pooled_psycopg3():
+    assert engine_options("api", "psycopg", prepare_threshold=0)["connect_args"]["prepare_threshold"] == 0
+    assert engine_options("api", "psycopg", nullpool=True)["connect_args"]["prepare_threshold"] is None
+    assert engine_options("api", "psycopg", prepare_threshold=-1)["connect_args"]["prepare_threshold"] is None
+    assert "prepare_threshold" not in engine_options("api", "psycopg2")["connect_args"]
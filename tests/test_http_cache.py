@@ -0,0 +1,42 @@
+import pytest
+import requests
+
+from src.neuraestate.scrapers.http_cache import CacheMiss, ResponseCache
+
+
+def _response(url, body, status=200):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.url = url
+    resp.encoding = "utf-8"
+    resp.headers["Content-Type"] = "text/html; charset=utf-8"
+    resp.headers["Content-Encoding"] = "gzip"
+    resp._content = body.encode("utf-8")
+    return resp
+
+
+def test_record_then_replay_round_trip(tmp_path):
+    url = "https://www.magicbricks.com/property-for-sale-in-pune-pppfs"
+    recorder = ResponseCache(tmp_path, mode="record")
+    live = recorder.get(url, lambda: _response(url, "<html>₹ 1.2 Cr</html>"))
+    assert live.status_code == 200
+
+    replay = ResponseCache(tmp_path, mode="replay")
+    resp = replay.get(url, lambda: pytest.fail("replay must not hit the network"))
+    assert resp.status_code == 200
+    assert resp.text == "<html>₹ 1.2 Cr</html>"
+    assert resp.headers["content-type"].startswith("text/html")
+    assert "Content-Encoding" not in resp.headers
+    assert [u for u, _ in replay.iter_responses()] == [url]
+
+
+def test_identical_bodies_share_one_blob(tmp_path):
+    cache = ResponseCache(tmp_path, mode="record")
+    for url in ("https://a/1", "https://a/2"):
+        cache.get(url, lambda: _response(url, "same"))
+    assert len(list((tmp_path / "blobs").rglob("*.gz"))) == 1
+
+
+def test_replay_miss_raises(tmp_path):
+    with pytest.raises(CacheMiss):
+        ResponseCache(tmp_path, mode="replay").get("https://nowhere", lambda: None)
@@ -0,0 +1,36 @@
+from src.neuraestate.api.listing_queries import (
+    SchemaCaps,
+    filter_params,
+    filter_shape,
+    listing_statements,
+    warm_listing_statements,
+)
+
+ETL_SCHEMA = SchemaCaps(ods_columns=frozenset({"id", "source_id", "title", "price_inr", "image_url"}), user_listings=True)
+
+
+def test_filter_params_only_include_set_filters():
+    params = filter_params(city="Pune", min_bhk=0, max_price=5e6)
+    assert params == {"city": "%pune%", "max_price": 5e6}
+    assert filter_shape(params) == (True, False, True, False, False)
+
+
+def test_statements_follow_schema_and_are_cached():
+    shape = filter_shape(filter_params(max_price=1.0))
+    count_stmt, page_stmt = listing_statements(ETL_SCHEMA, shape)
+    assert listing_statements(ETL_SCHEMA, shape)[1] is page_stmt
+    # no ods_listings.url in the ETL schema: placeholder URL, no reference to the column
+    assert "NULLIF(url" not in page_stmt.text
+    assert "coalesce(price_inr,0) <= :max_price" in count_stmt.text
+    assert "coalesce(price,0) <= :max_price" in page_stmt.text
+
+    with_url = SchemaCaps(ods_columns=ETL_SCHEMA.ods_columns | {"url"}, user_listings=False)
+    count_stmt, page_stmt = listing_statements(with_url, shape)
+    assert "NULLIF(url" in page_stmt.text
+    assert "user_listings" not in count_stmt.text and "user_listings" not in page_stmt.text
+
+
+def test_warm_builds_every_filter_shape():
+    caps = SchemaCaps(ods_columns=frozenset({"id"}), user_listings=False)
+    assert warm_listing_statements(caps) == 32
+    assert listing_statements.cache_info().currsize >= 32
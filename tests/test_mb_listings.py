@@ -0,0 +1,51 @@
+import requests
+
+from src.neuraestate.scrapers import mb_scraper as mb
+
+SEED = "https://www.magicbricks.com/property-for-sale-in-pune-pppfs"
+PAGE = f"""<html><head><title>Property for Sale in Pune | MagicBricks</title></head><body>
+<div class="mb-srp__card"><a href="/propertyDetails/3-BHK-Flat-Baner-pdpid-1">x</a>
+  <h2>3 BHK Flat in Baner</h2><img src="https://img.example/1.jpg">
+  ₹1.35 Cr Carpet Area 1378 sqft 2 Baths Ready to Move</div>
+<div class="mb-srp__card">No heading on this card, ₹85 Lac 2 BHK 1050 sqft ready to move</div>
+</body></html>"""
+SITEMAP = f"""<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<url><loc>{SEED}</loc></url><url><loc>https://www.magicbricks.com/propertyDetails/x</loc></url></urlset>"""
+
+
+class FakeFetcher:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def fetch(self, url):
+        self.calls.append(url)
+        resp = requests.Response()
+        resp.url = url
+        resp.encoding = "utf-8"
+        body = self.pages.get(url)
+        resp.status_code = 200 if body is not None else 404
+        resp._content = (body or "").encode("utf-8")
+        return resp
+
+
+def test_iter_mb_listings_streams_dtos_and_reports_skips():
+    fetcher = FakeFetcher({
+        mb.ROBOTS_URL: "User-agent: *\nSitemap: https://www.magicbricks.com/sitemap.xml\n",
+        "https://www.magicbricks.com/sitemap.xml": SITEMAP,
+        SEED: PAGE,
+    })
+    skipped = []
+    dtos = list(mb.iter_mb_listings(fetcher, url_limit_from_sitemaps=10, on_skip=skipped.append))
+
+    assert len(dtos) == 1 and len(skipped) == 1
+    dto = dtos[0]
+    assert dto.title == "3 BHK Flat in Baner"
+    assert dto.price == 13500000
+    assert dto.location == "Pune"
+    assert str(dto.url) == "https://www.magicbricks.com/propertyDetails/3-BHK-Flat-Baner-pdpid-1"
+    assert dto.external_id.startswith(f"{mb.MB_SOURCE}:")
+    assert [str(u) for u in dto.image_urls] == ["https://img.example/1.jpg"]
+    # pagination stopped at the first 404, detail pages were never requested
+    assert f"{SEED}/page-2" in fetcher.calls
+    assert not any("propertyDetails" in u for u in fetcher.calls)
@@ -0,0 +1,61 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from src.neuraestate.api import metrics
+
+
+def test_fingerprint_strips_literals_params_and_in_lists():
+    fp = metrics.fingerprint(
+        "SELECT *  FROM ods_listings\n WHERE city = 'Pune' AND bhk >= %(min_bhk)s "
+        "AND id IN (1, 2, 3) LIMIT 50 OFFSET :offset;"
+    )
+    assert fp == "SELECT * FROM ods_listings WHERE city = ? AND bhk >= ? AND id IN (?) LIMIT ? OFFSET ?"
+    # identifiers containing digits are left alone
+    assert metrics.fingerprint("SELECT price_2024 FROM t1") == "SELECT price_2024 FROM t1"
+    assert metrics.fingerprint("SELECT source_id::text FROM t WHERE a = :a") == "SELECT source_id::text FROM t WHERE a = ?"
+
+
+def test_histogram_renders_cumulative_buckets_with_escaped_labels():
+    h = metrics.Histogram("demo_seconds", "Demo.", (0.1, 1.0))
+    h.observe(0.05, route='/a"b')
+    h.observe(0.5, route='/a"b')
+    h.observe(5.0, route='/a"b')
+    out = metrics.render([h])
+    assert "# TYPE demo_seconds histogram" in out
+    assert 'demo_seconds_bucket{route="/a\\"b",le="0.1"} 1' in out
+    assert 'demo_seconds_bucket{route="/a\\"b",le="1.0"} 2' in out
+    assert 'demo_seconds_bucket{route="/a\\"b",le="+Inf"} 3' in out
+    assert 'demo_seconds_count{route="/a\\"b"} 3' in out
+
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    before = metrics.http_requests._values.get(
+        (("method", "GET"), ("route", "/items/{item_id}"), ("status", "200")), 0
+    )
+    client.get("/items/1")
+    client.get("/items/2?x=1")
+    client.get("/nope")
+
+    values = metrics.http_requests._values
+    assert values[(("method", "GET"), ("route", "/items/{item_id}"), ("status", "200"))] == before + 2
+    assert values[(("method", "GET"), ("route", "<unmatched>"), ("status", "404"))] >= 1
+    assert metrics.http_in_flight._values[()] == 0
+
+
+def test_instrument_engine_times_statements_by_fingerprint():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1 + :x"), {"x": 1})
+        conn.execute(text("SELECT 1 + :x"), {"x": 2})
+    series = metrics.sql_latency._series[(("statement", "SELECT ? + ?"),)]
+    assert series[2] >= 2
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg://u@localhost/db")
+from src.neuraestate.api.model_reload import ModelReloader  # noqa: E402
+from src.neuraestate.ml import registry  # noqa: E402
+
+
+def _publish(base, payload, keep=5, version=None, legacy=None):
+    version = version or registry.new_version()
+    staging = registry.stage(version, base)
+    (staging / registry.COMPACT_FILE).write_text(payload)
+    return registry.publish(version, {"mode": "full"}, base, keep=keep, legacy=legacy or {}).name
+
+
+def test_publish_makes_version_current_and_prunes(tmp_path):
+    versions = [_publish(tmp_path, f"m{i}", keep=2, version=f"2025010{i}T000000Z-0000") for i in range(4)]
+
+    assert registry.current_version(tmp_path) == versions[-1]
+    assert registry.list_versions(tmp_path) == versions[-2:]
+    assert registry.read_metadata(base_dir=tmp_path)["model_version"] == versions[-1]
+    assert not list(tmp_path.glob(".*"))  # no staging dirs or temp files left
+
+    registry.set_current(versions[-2], tmp_path, legacy={})
+    assert registry.current_version(tmp_path) == versions[-2]
+    with pytest.raises(FileNotFoundError):
+        registry.set_current(versions[0], tmp_path, legacy={})  # pruned
+
+
+def test_rollback_refreshes_legacy_paths(tmp_path):
+    legacy = {registry.COMPACT_FILE: tmp_path / "ml" / "price_model.npz",
+              registry.METADATA: tmp_path / "ml" / "model_metadata.json"}
+    v1 = _publish(tmp_path / "reg", "model-1", legacy=legacy)
+    _publish(tmp_path / "reg", "model-2", legacy=legacy)
+    assert legacy[registry.COMPACT_FILE].read_text() == "model-2"
+
+    registry.set_current(v1, tmp_path / "reg", legacy=legacy)
+
+    assert legacy[registry.COMPACT_FILE].read_text() == "model-1"
+    assert v1 in legacy[registry.METADATA].read_text()
+
+
+def test_reloader_swaps_to_new_version_and_keeps_old_on_failure(tmp_path):
+    def loader(path):
+        text = path.read_text()
+        if text == "broken":
+            raise ValueError("corrupt")
+        return text
+
+    reloader = ModelReloader(tmp_path, fallback_path=tmp_path / "missing.npz", interval_s=0, loader=loader)
+    assert not reloader.check() and reloader.current() == (None, None)
+
+    v1 = _publish(tmp_path, "model-1")
+    assert reloader.check() and reloader.current() == (v1, "model-1")
+    assert not reloader.check()  # unchanged: no reload
+
+    v2 = _publish(tmp_path, "broken")
+    assert not reloader.check()
+    assert reloader.current() == (v1, "model-1")
+    assert reloader.status()["failed_version"] == v2
+
+    v3 = _publish(tmp_path, "model-3")
+    assert reloader.check() and reloader.current() == (v3, "model-3")
+
+
+def test_reloader_falls_back_to_fixed_path(tmp_path):
+    path = tmp_path / "price_model.npz"
+    path.write_text("legacy")
+    reloader = ModelReloader(tmp_path / "registry", fallback_path=path, interval_s=0, loader=lambda p: p.read_text())
+    assert reloader.check() and reloader.model == "legacy"
@@ -0,0 +1,64 @@
+from src.neuraestate.scrapers.pipeline import CrawlPipeline
+
+
+def _parse(html, url):
+    return [{"source_page_url": url, "card_index": i} for i in range(int(html))]
+
+
+def _pages(seed, start_page=1):
+    for page_no in range(start_page, 4):
+        yield page_no, f"{seed}/page-{page_no}", "2"
+
+
+def test_pipeline_writes_every_card_in_batches():
+    batches = []
+
+    def write(rows):
+        batches.append(list(rows))
+        return len(rows)
+
+    pipeline = CrawlPipeline(_pages, _parse, write, fetch_workers=2, parse_workers=2,
+                             queue_size=2, batch_size=5)
+    inserted = pipeline.run(["a", "b", "c"])
+
+    assert inserted == 18
+    assert sum(len(b) for b in batches) == 18
+    assert all(len(b) <= 6 for b in batches)
+    stats = pipeline.stats
+    assert stats["fetch"]["items_out"] == 9
+    assert stats["parse"]["items_in"] == 9
+    assert stats["write"]["items_out"] == 18
+
+
+def test_paused_crawl_resumes_from_checkpoint(tmp_path):
+    from src.neuraestate.scrapers.frontier import CrawlFrontier
+
+    path = tmp_path / "frontier.json"
+    written = []
+
+    def write(rows):
+        written.extend((r["source_page_url"], r["card_index"]) for r in rows)
+        return len(rows)
+
+    fetched = []
+
+    def pages(seed, start_page=1):
+        for page_no, url, html in _pages(seed, start_page):
+            fetched.append(url)
+            yield page_no, url, html
+
+    frontier = CrawlFrontier(path, ["a", "b"])
+    first = CrawlPipeline(pages, _parse, write, parse_workers=1, batch_size=100,
+                          progress=frontier, should_pause=lambda: len(fetched) >= 2)
+    first.run(list(frontier.pending))
+    assert first.paused
+    assert not frontier.finished
+
+    resumed = CrawlFrontier.load(path)
+    assert resumed.pending == ["a", "b"]
+    assert resumed.batch == []  # the pause flushed the partial batch
+    assert resumed.start_page("a") == 3
+
+    CrawlPipeline(pages, _parse, write, parse_workers=1, progress=resumed).run(list(resumed.pending))
+    assert resumed.finished
+    assert sorted(written) == sorted({(f"{s}/page-{p}", i) for s in "ab" for p in (1, 2, 3) for i in (0, 1)})
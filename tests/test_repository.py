@@ -0,0 +1,210 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from src.neuraestate.config import settings
+from src.neuraestate.db import repository as repo
+from src.neuraestate.schemas import ListingIn
+
+# Postgres tests run against TEST_DATABASE_URL (default: the app database) in a
+# throwaway schema and are skipped when it is not reachable.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.DATABASE_URL)
+metadata = repo.Listing.metadata
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def session(request, tmp_path):
+    schema = None
+    if request.param == "sqlite":
+        engine = create_engine(f"sqlite:///{tmp_path / 'repo.db'}")
+    else:
+        engine = create_engine(TEST_DATABASE_URL, connect_args={"connect_timeout": 3})
+        schema = f"test_repo_{uuid.uuid4().hex[:8]}"
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+        except OperationalError as e:
+            pytest.skip(f"Postgres not reachable: {e.orig}")
+    bound = engine.execution_options(schema_translate_map={None: schema}) if schema else engine
+    metadata.create_all(bound)
+    try:
+        with Session(bound, expire_on_commit=False) as s:
+            yield s
+    finally:
+        if schema:
+            with engine.begin() as conn:
+                conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        engine.dispose()
+
+
+def _dto(ext="ext-1", title="Flat", price=100.0, amenities=(), images=()):
+    return ListingIn(external_id=ext, title=title, price=price, url=f"https://example.com/{ext}",
+                     amenities=list(amenities), image_urls=[f"https://img.example.com/{i}.jpg" for i in images])
+
+
+def _record_writes(session):
+    """(op, table, values) for every DELETE and executemany INSERT on images/listing_amenities."""
+    writes = []
+
+    @event.listens_for(session, "do_orm_execute")
+    def _record(state):
+        stmt = state.statement
+        if stmt.is_delete and stmt.table.name in ("images", "listing_amenities"):
+            values = next(iter(stmt.compile().params.values()))
+            writes.append(("delete", stmt.table.name, sorted(values)))
+        elif stmt.is_insert and stmt.table.name in ("images", "listing_amenities"):
+            writes.append(("insert", stmt.table.name, [tuple(p.values()) for p in state.parameters]))
+
+    return writes
+
+
+def _images(session, listing_id):
+    return session.execute(
+        select(repo.Image.id, repo.Image.url).where(repo.Image.listing_id == listing_id).order_by(repo.Image.id)
+    ).all()
+
+
+def test_reupsert_writes_only_the_differences(session):
+    r = repo.ListingRepository(session, repo.AmenityCache())
+    lid = r.upsert_many([_dto(amenities=["gym", "pool"], images=["a", "b"])])["ext-1"]
+    session.commit()
+    (img_a, _), (img_b, _) = _images(session, lid)
+    ids = r.amenities.resolve(session, ["gym", "pool"])
+
+    writes = _record_writes(session)
+    assert r.upsert_many([_dto(title="Flat v2", price=120.0, amenities=["pool", "lift"], images=["b", "c"])]) == {
+        "ext-1": lid
+    }
+    session.commit()
+    lift = r.amenities.resolve(session, ["lift"])["lift"]
+
+    assert sorted(writes) == sorted([
+        ("delete", "listing_amenities", [(lid, ids["gym"])]),
+        ("insert", "listing_amenities", [(lid, lift)]),
+        ("delete", "images", [img_a]),
+        ("insert", "images", [(lid, "https://img.example.com/c.jpg")]),
+    ])
+    images = _images(session, lid)
+    assert images[0] == (img_b, "https://img.example.com/b.jpg")  # untouched row keeps its id
+    assert [u for _, u in images] == ["https://img.example.com/b.jpg", "https://img.example.com/c.jpg"]
+    listing = session.get(repo.Listing, lid, populate_existing=True)
+    assert (listing.title, listing.price) == ("Flat v2", 120.0)
+    assert sorted(a.name for a in listing.amenities) == ["lift", "pool"]
+
+    writes.clear()
+    r.upsert_many([_dto(title="Flat v2", price=120.0, amenities=["pool", "lift"], images=["b", "c"])])
+    assert writes == []  # nothing changed, nothing written
+
+
+def test_duplicate_external_id_in_batch_last_wins(session):
+    r = repo.ListingRepository(session, repo.AmenityCache())
+    ids = r.upsert_many([
+        _dto(title="first", amenities=["gym"], images=["a"]),
+        _dto("ext-2", title="other"),
+        _dto(title="second", amenities=["pool"], images=["b"]),
+    ])
+    session.commit()
+
+    assert set(ids) == {"ext-1", "ext-2"}
+    listing = session.get(repo.Listing, ids["ext-1"], populate_existing=True)
+    assert listing.title == "second"
+    assert [a.name for a in listing.amenities] == ["pool"]
+    assert [i.url for i in listing.images] == ["https://img.example.com/b.jpg"]
+
+
+def test_duplicate_image_urls_are_kept(session):
+    r = repo.ListingRepository(session, repo.AmenityCache())
+    lid = r.upsert_many([_dto(images=["a", "a", "b"])])["ext-1"]
+    assert [u for _, u in _images(session, lid)].count("https://img.example.com/a.jpg") == 2
+
+    r.upsert_many([_dto(images=["a", "b"])])
+    assert sorted(u for _, u in _images(session, lid)) == [
+        "https://img.example.com/a.jpg", "https://img.example.com/b.jpg"
+    ]
+
+
+def test_upsert_listing_returns_fresh_listing(session):
+    r = repo.ListingRepository(session, repo.AmenityCache())
+    first = r.upsert_listing(_dto(title="Old", amenities=["gym"], images=["a"]))
+    session.commit()
+    assert first.title == "Old" and [i.url for i in first.images] == ["https://img.example.com/a.jpg"]
+
+    again = r.upsert_listing(_dto(title="New", price=5.0, amenities=["pool"], images=["b"]))
+
+    assert again.id == first.id
+    assert (again.title, again.price) == ("New", 5.0)
+    assert [a.name for a in again.amenities] == ["pool"]
+    assert [i.url for i in again.images] == ["https://img.example.com/b.jpg"]
+
+
+# ---------------------------------------------------------------------------
+# AmenityCache
+# ---------------------------------------------------------------------------
+def _amenity_inserts(session):
+    inserts = []
+
+    @event.listens_for(session, "do_orm_execute")
+    def _record(state):
+        if state.statement.is_insert and state.statement.table.name == "amenities":
+            inserts.append(state.statement)
+
+    return inserts
+
+
+def test_amenity_ids_are_shared_only_after_commit(session):
+    cache = repo.AmenityCache()
+    inserts = _amenity_inserts(session)
+
+    gym = cache.resolve(session, ["gym"])["gym"]
+    assert "gym" not in cache._ids  # other sessions must not see an uncommitted id
+    assert cache.resolve(session, ["gym"]) == {"gym": gym}  # same transaction: from the pending map
+    assert len(inserts) == 1
+
+    session.commit()
+    assert cache._ids == {"gym": gym}
+    assert "amenity_cache_pending" not in session.info
+
+
+def test_amenity_ids_are_dropped_on_rollback(session):
+    cache = repo.AmenityCache()
+    inserts = _amenity_inserts(session)
+
+    cache.resolve(session, ["gym"])
+    session.rollback()
+
+    assert "gym" not in cache._ids
+    assert "amenity_cache_pending" not in session.info
+    gym = cache.resolve(session, ["gym"])["gym"]  # created again, in the new transaction
+    session.commit()
+    assert len(inserts) == 2
+    assert cache._ids == {"gym": gym}
+
+
+def test_amenity_cache_evicts_least_recently_used(session):
+    cache = repo.AmenityCache(maxsize=2)
+    cache.resolve(session, ["a", "b"])
+    session.commit()
+    cache.resolve(session, ["a"])  # b is now the least recently used
+    cache.resolve(session, ["c"])
+    session.commit()
+
+    assert list(cache._ids) == ["a", "c"]
+
+
+def test_amenity_cache_clear_rewarms_from_the_table(session):
+    cache = repo.AmenityCache()
+    cache.resolve(session, ["gym"])
+    session.commit()
+    session.execute(insert(repo.Amenity).values(name="spa"))  # created outside the cache
+    session.commit()
+
+    cache.clear()
+    inserts = _amenity_inserts(session)
+    found = cache.resolve(session, ["spa", "gym"])
+
+    assert inserts == []  # both came from the re-warm SELECT
+    assert set(found) == {"spa", "gym"} and set(cache._ids) == {"gym", "spa"}
@@ -0,0 +1,23 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from src.neuraestate.api import responses
+from src.neuraestate.api.responses import FastJSONResponse
+
+
+def test_orjson_and_json_fallback_agree(monkeypatch):
+    content = {
+        "items": [{"id": 1, "price": Decimal("1.5"), "city": "Pune – West", "created_at": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)}],
+        "total": 1,
+        "stats": {"mean": float("nan"), "max": float("inf"), "min": -float("inf"), "median": Decimal("NaN")},
+    }
+    fast = FastJSONResponse(content)
+    monkeypatch.setattr(responses, "orjson", None)
+    plain = FastJSONResponse(content)
+
+    assert json.loads(fast.body) == json.loads(plain.body)
+    assert b"NaN" not in plain.body and b"Infinity" not in plain.body  # strict JSON parsers reject them
+    assert json.loads(plain.body)["stats"] == {"mean": None, "max": None, "min": None, "median": None}
+    assert json.loads(plain.body)["items"][0]["created_at"] == "2025-01-02T03:04:05Z"
+    assert fast.headers["content-type"] == "application/json"
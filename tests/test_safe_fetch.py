@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from src.neuraestate.scrapers.safe_fetch import HostRateLimiter, TokenBucket
+
+
+def test_bucket_allows_burst_then_paces_fifo():
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    delays = [bucket.reserve() for _ in range(4)]
+    assert delays[0] == 0.0 and delays[1] == 0.0
+    assert 0.05 < delays[2] <= 0.1
+    assert 0.15 < delays[3] <= 0.2
+    assert delays[2] < delays[3]
+
+
+def test_crawl_delay_forces_strict_spacing():
+    limiter = HostRateLimiter(default_rps=100.0, burst=5)
+    bucket = limiter._bucket("example.com", crawl_delay_hint=2.0)
+    assert bucket.capacity == 1
+    assert bucket.rate == 0.5
+    assert limiter._bucket("other.com", None).capacity == 5
+
+
+def test_async_acquire_shares_the_bucket():
+    limiter = HostRateLimiter(default_rps=50.0, burst=1)
+
+    async def run():
+        await asyncio.gather(*(limiter.acquire_async("h") for _ in range(3)))
+
+    asyncio.run(run())
+    # three tokens taken from a 1-capacity bucket -> in debt
+    assert limiter.buckets["h"]._tokens < 0
+
+
+class _Resp:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class _Session:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.headers = {}
+        self.calls = []
+
+    def get(self, url, timeout=None, headers=None):
+        self.calls.append(headers or {})
+        return self.responses.pop(0)
+
+
+def test_robots_cache_skips_fetch_and_artifacts_when_fresh(tmp_path, monkeypatch):
+    from src.neuraestate.scrapers import safe_fetch
+
+    monkeypatch.setattr(safe_fetch, "CONSENT_DIR", tmp_path / "consent")
+    (tmp_path / "consent").mkdir()
+    cache = safe_fetch.RobotsCache(tmp_path / "robots", ttl=3600)
+    robots = "User-agent: *\nDisallow: /private\nCrawl-delay: 3\n"
+
+    first = _Session(_Resp(200, robots, {"ETag": '"v1"'}))
+    policy = safe_fetch.RobotsPolicy("https://example.com", session=first, cache=cache)
+    assert policy.crawl_delay == 3.0
+    assert not policy.can_fetch("https://example.com/private/x")
+    assert len(list((tmp_path / "consent").glob("*_robots_*.txt"))) == 1
+
+    second = _Session()
+    safe_fetch.RobotsPolicy("https://example.com", session=second, cache=cache)
+    assert second.calls == []
+    assert len(list((tmp_path / "consent").glob("*_robots_*.txt"))) == 1
+
+
+def test_robots_cache_revalidates_with_etag_when_stale(tmp_path, monkeypatch):
+    from src.neuraestate.scrapers import safe_fetch
+
+    monkeypatch.setattr(safe_fetch, "CONSENT_DIR", tmp_path / "consent")
+    (tmp_path / "consent").mkdir()
+    cache = safe_fetch.RobotsCache(tmp_path / "robots", ttl=0)
+    robots = "User-agent: *\nDisallow: /private\n"
+
+    safe_fetch.RobotsPolicy("https://example.com",
+                            session=_Session(_Resp(200, robots, {"ETag": '"v1"'})), cache=cache)
+    session = _Session(_Resp(304))
+    policy = safe_fetch.RobotsPolicy("https://example.com", session=session, cache=cache)
+
+    assert session.calls[0]["If-None-Match"] == '"v1"'
+    assert policy.text == robots
+    assert len(list((tmp_path / "consent").glob("*_robots_*.txt"))) == 1
+
+
+def test_pause_error_names_the_trigger(tmp_path, monkeypatch):
+    from src.neuraestate.scrapers import safe_fetch
+
+    monkeypatch.setattr(safe_fetch, "CRAWLER_PAUSE_FILE", tmp_path / "crawler.pause")
+    monkeypatch.delenv("CRAWLER_PAUSE", raising=False)
+    fetcher = safe_fetch.SafeFetcher()
+    assert safe_fetch.pause_reason() is None
+
+    (tmp_path / "crawler.pause").touch()
+    with pytest.raises(RuntimeError, match="pause file"):
+        fetcher.fetch("https://example.com/")
+
+    monkeypatch.setenv("CRAWLER_PAUSE", "1")
+    with pytest.raises(RuntimeError, match="CRAWLER_PAUSE=1"):
+        fetcher.fetch("https://example.com/")
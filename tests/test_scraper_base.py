@@ -0,0 +1,53 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from src.neuraestate.scrapers import base
+from src.neuraestate.schemas import ListingIn
+
+
+class _Scraper(base.Scraper):
+    parse_workers = 8
+
+    def __init__(self, urls):
+        self.urls = urls
+
+    def seed_urls(self):
+        return self.urls
+
+    async def fetch(self, client, url):
+        return f"<h1>{url}</h1>"
+
+    def parse_listing(self, html, url):
+        return ListingIn(external_id=url.rsplit("/", 1)[-1], title=html, url=url)
+
+
+def _collect(scraper, **kwargs):
+    async def run():
+        return [dto.external_id async for dto in scraper.run(**kwargs)]
+
+    return sorted(asyncio.run(run()))
+
+
+class _RecordingPool(ThreadPoolExecutor):
+    sizes = []
+
+    def __init__(self, max_workers):
+        self.sizes.append(max_workers)
+        super().__init__(max_workers)
+
+
+def test_own_pool_is_sized_by_seed_count(monkeypatch):
+    _RecordingPool.sizes = []
+    monkeypatch.setattr(base, "ProcessPoolExecutor", _RecordingPool)
+
+    assert _collect(_Scraper(["https://example.com/1"])) == ["1"]
+    assert _collect(_Scraper([])) == []  # nothing to parse: no pool at all
+    assert _RecordingPool.sizes == [1]
+
+
+def test_caller_executor_is_used_and_left_running(monkeypatch):
+    monkeypatch.setattr(base, "ProcessPoolExecutor", None)  # must not be started
+    with ThreadPoolExecutor(2) as pool:
+        urls = [f"https://example.com/{i}" for i in range(3)]
+        assert _collect(_Scraper(urls), executor=pool) == ["0", "1", "2"]
+        assert _collect(_Scraper(urls[:1]), executor=pool) == ["0"]  # reused across runs
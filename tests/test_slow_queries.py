@@ -0,0 +1,33 @@
+from sqlalchemy import create_engine, text
+
+from src.neuraestate.api.slow_queries import SlowQueryLog, install
+
+
+def test_install_is_opt_in():
+    assert install([], explain_engine=None, threshold_ms=0) is None
+
+
+def test_records_only_statements_over_threshold_grouped_by_fingerprint():
+    log = SlowQueryLog(threshold_ms=10, maxlen=2)
+    assert log.record("SELECT 1", {}, 3.0) is None
+    log.record("SELECT * FROM ods_listings WHERE bhk >= %(b)s", {"b": 2}, 15.0)
+    log.record("SELECT * FROM ods_listings WHERE bhk >= %(b)s", {"b": 3}, 25.0)
+    log.record("SELECT * FROM ods_listings WHERE city = %(c)s", {"c": "x" * 500}, 12.0)
+
+    snap = log.snapshot()
+    assert len(snap["recent"]) == 2  # ring buffer
+    assert snap["recent"][0]["params"] == {"c": "x" * 200}
+    top = snap["by_fingerprint"][0]
+    assert top["fingerprint"] == "SELECT * FROM ods_listings WHERE bhk >= ?"
+    assert (top["count"], top["max_ms"], top["avg_ms"]) == (2, 25.0, 20.0)
+    # no explain engine configured: no plans
+    assert all(e["plan"] is None for e in snap["recent"])
+
+
+def test_attach_times_real_statements():
+    engine = create_engine("sqlite://")
+    log = SlowQueryLog(threshold_ms=0)
+    log.attach(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT :x"), {"x": 1})
+    assert log.snapshot()["by_fingerprint"][0]["fingerprint"] == "SELECT ?"
@@ -0,0 +1,39 @@
+from sqlalchemy import create_engine, text
+
+from src.neuraestate.pipelines.snapshot import SNAPSHOT_SCHEMA, list_run_dates, load_snapshot, write_ods_snapshot
+
+
+def _engine(rows, db_dir):
+    # file-backed: the writer pulls rows from another thread
+    engine = create_engine(f"sqlite:///{db_dir / 'ods.db'}")
+    cols = ", ".join(f.name for f in SNAPSHOT_SCHEMA)
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE ods_listings ({cols})"))
+        for r in rows:
+            conn.execute(text("INSERT INTO ods_listings (id, source_id, price_inr, bhk, area_sqft, city) "
+                              "VALUES (:id, :sid, :price, :bhk, :area, :city)"), r)
+    return engine
+
+
+def test_snapshot_round_trip_with_partition_pruning(tmp_path):
+    rows = [
+        {"id": i, "sid": f"s{i}", "price": 1_000_000 + i, "bhk": 2, "area": 800.0, "city": city}
+        for i, city in enumerate(["Pune", "Mumbai", "Pune", None])
+    ]
+    manifest = write_ods_snapshot(_engine(rows, tmp_path), tmp_path / "snap", chunk_rows=2)
+    assert manifest["rows"] == 4
+    assert list_run_dates(tmp_path / "snap") == [manifest["run_date"]]
+
+    df = load_snapshot(["id", "price_inr", "city"], base_dir=tmp_path / "snap")
+    assert sorted(df["id"]) == [0, 1, 2, 3]
+    assert list(df.columns) == ["id", "price_inr", "city"]
+
+    pune = load_snapshot(["id"], filters=[("city", "==", "Pune")], base_dir=tmp_path / "snap")
+    assert sorted(pune["id"]) == [0, 2]
+
+
+def test_incomplete_run_is_not_latest(tmp_path):
+    write_ods_snapshot(_engine([{"id": 1, "sid": "a", "price": 1, "bhk": 1, "area": 1.0, "city": "Pune"}], tmp_path), tmp_path / "snap")
+    (tmp_path / "snap" / "run_date=2999-01-01").mkdir()  # interrupted write: no manifest
+    assert "2999-01-01" not in list_run_dates(tmp_path / "snap")
+    assert len(load_snapshot(base_dir=tmp_path / "snap")) == 1
@@ -0,0 +1,91 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg://u@localhost/db")
+from src.neuraestate.ml import train_model as tm  # noqa: E402
+from src.neuraestate.ml import registry  # noqa: E402
+
+
+def _frame(ids, start):
+    rng = np.random.default_rng(int(ids[0]))
+    area = rng.uniform(400, 2000, len(ids))
+    return pd.DataFrame({
+        "id": ids,
+        "processed_at": pd.date_range(start, periods=len(ids), freq="min"),
+        "price_inr": area * 6000,
+        "area_sqft": area,
+        "bhk": rng.integers(1, 4, len(ids)),
+        "bathrooms": rng.integers(1, 3, len(ids)).astype(float),
+        "city": rng.choice(["Pune", "Mumbai"], len(ids)),
+    })
+
+
+@pytest.fixture
+def out_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tm, "MODEL_PATH", tmp_path / "m.joblib")
+    monkeypatch.setattr(tm, "META_PATH", tmp_path / "meta.json")
+    monkeypatch.setattr(tm, "COMPACT_PATH", tmp_path / "m.npz")
+    monkeypatch.setattr(tm, "REGISTRY_DIR", tmp_path / "registry")
+    monkeypatch.setattr(tm, "N_ESTIMATORS", 10)
+    monkeypatch.setattr(tm, "ADD_TREES", 5)
+    return tmp_path
+
+
+def test_incremental_run_adds_trees_and_moves_watermark(out_dir):
+    tm.train_and_save(_frame(np.arange(1, 401), "2025-01-01"))
+    pipeline, frame, meta = tm.load_previous()
+    assert meta["mode"] == "full" and meta["n_estimators"] == 10
+
+    delta = _frame(np.arange(390, 451), "2025-02-01")  # 11 updated listings, 50 new
+    _, meta = tm.train_incremental(delta, frame, pipeline, meta)
+
+    assert meta["mode"] == "incremental"
+    assert meta["n_estimators"] == 15
+    assert meta["rows_total"] == 450 and meta["rows_delta"] == 61
+    assert meta["data_watermark"] == pd.Timestamp(delta["processed_at"].max()).isoformat()
+    saved = pd.read_parquet(registry.version_dir(base_dir=tm.REGISTRY_DIR) / registry.FRAME_FILE)
+    assert saved["id"].is_unique and len(saved) == 450
+
+
+def test_incremental_after_rollback_grows_the_rolled_back_model(out_dir):
+    tm.train_and_save(_frame(np.arange(1, 401), "2025-01-01"))
+    first = registry.current_version(tm.REGISTRY_DIR)
+    pipeline, frame, meta = tm.load_previous()
+    tm.train_incremental(_frame(np.arange(401, 451), "2025-02-01"), frame, pipeline, meta)
+
+    registry.set_current(first, tm.REGISTRY_DIR, legacy=tm.legacy_paths())
+
+    pipeline, frame, meta = tm.load_previous()
+    assert meta["model_version"] == first and len(frame) == 400
+    assert pipeline.named_steps["rf"].n_estimators == 10
+    assert json.loads(tm.META_PATH.read_text())["model_version"] == first
+
+
+def test_unreadable_frame_means_no_previous_run(out_dir):
+    tm.train_and_save(_frame(np.arange(1, 401), "2025-01-01"))
+    frame_path = registry.version_dir(base_dir=tm.REGISTRY_DIR) / registry.FRAME_FILE
+    frame_path.write_bytes(frame_path.read_bytes()[:100])  # truncated
+
+    assert tm.load_previous() is None
+
+
+def test_boundary_rows_already_trained_on_are_not_new():
+    frame = _frame(np.arange(1, 101), "2025-01-01")
+    # re-read at the watermark: the last row again, plus two rows of the same batch committed later
+    late = _frame(np.array([100, 101, 102]), "2025-01-01")
+    late["processed_at"] = frame["processed_at"].max()
+    late.loc[late["id"] == 100] = frame.loc[frame["id"] == 100].to_numpy()
+
+    assert tm.unseen_rows(late, frame)["id"].tolist() == [101, 102]
+    assert tm.unseen_rows(frame.tail(5), frame).empty
+
+
+def test_split_is_stable_per_listing():
+    df = _frame(np.arange(1, 1001), "2025-01-01")
+    mask = tm.split_mask(df)
+    assert 0.1 < mask.mean() < 0.3
+    assert (tm.split_mask(df.iloc[::-1])[::-1] == mask).all()
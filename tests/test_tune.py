@@ -0,0 +1,53 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg://u@localhost/db")
+from src.neuraestate.ml import train_model as tm  # noqa: E402
+from src.neuraestate.ml import tune  # noqa: E402
+
+
+def _frame(n=400):
+    rng = np.random.default_rng(7)
+    area = rng.uniform(400, 2500, n)
+    return pd.DataFrame({
+        "price_inr": area * rng.uniform(5000, 7000, n),
+        "area_sqft": area,
+        "bhk": rng.integers(1, 4, n),
+        "bathrooms": rng.integers(1, 3, n).astype(float),
+        "city": rng.choice(["Pune", "Mumbai"], n),
+    })
+
+
+def test_run_search_in_worker_processes():
+    X = np.column_stack([np.linspace(1, 10, 200), np.tile([0.0, 1.0], 100)])
+    y = 1000 * X[:, 0] + 50 * X[:, 1]
+
+    board = tune.run_search(X, y, families=["ridge_log"], folds=3, n_jobs=2)
+
+    assert [r["rank"] for r in board] == [1, 2, 3]
+    assert [r["rmse"] for r in board] == sorted(r["rmse"] for r in board)
+    assert all(r["folds"] == 3 and r["fit_s"] > 0 and r["size_mb"] > 0 for r in board)
+
+
+def test_pick_prefers_fastest_good_enough():
+    board = [
+        {"rank": 1, "rmse": 100.0, "single_row_ms": 30.0},
+        {"rank": 2, "rmse": 101.0, "single_row_ms": 0.5},
+        {"rank": 3, "rmse": 150.0, "single_row_ms": 0.1},
+    ]
+    assert tune.pick(board, tolerance=0.02)["rank"] == 2
+    assert tune.pick(board, tolerance=0.0)["rank"] == 1
+
+
+def test_tune_models_writes_leaderboard(tmp_path, monkeypatch):
+    monkeypatch.setattr(tm, "TUNE_PATH", tmp_path / "board.json")
+
+    result = tm.tune_models(_frame(), families=["ridge_log"], folds=2, n_jobs=1)
+
+    saved = json.loads((tmp_path / "board.json").read_text())
+    assert len(saved["leaderboard"]) == 3 and saved["folds"] == 2
+    assert saved["recommended"]["family"] == "ridge_log"
+    assert result["leaderboard"][0]["r2"] > 0.5